@@ -1,16 +1,58 @@
 import streamlit as st
-import pandas as pd
 import time
-import io
 import os
 import tempfile, shutil
 from src.workflow.graph import build_graph
-from langchain.memory import ConversationBufferMemory
+from src.data.dataset_store import get_dataset_store, hash_bytes
+from src.nodes.load_csv_node import ingest_chunked, optimized_id
+from src.data.tables import table_name
+from src.sandbox.engines import ENGINES, is_available as engine_available
+from src.memory.conversation_memory import ConversationMemory
+from src.service.client import get_service_client
 
 @st.cache_resource
 def get_compiled_graph():
     return build_graph()
 
+# Progresso exibido ao concluir cada nó do grafo (e o que vem a seguir)
+NODE_PROGRESS = {
+    "load_csv": (20, "📐 Preparando perfil dos dados..."),
+    "attach_dataset": (20, "📐 Preparando perfil dos dados..."),
+    "profile_dataset": (30, "🧠 Analisando pergunta..."),
+    "answer_question": (70, "⚡ Processando dados..."),
+    "execute_code": (90, "🎨 Gerando visualização..."),
+    "format_output": (100, "✅ Finalizando..."),
+}
+
+def format_cache_status(cache_status):
+    if not cache_status:
+        return ""
+    labels = {"llm": "LLM", "execution": "execução"}
+    statuses = {"hit": "⚡ cache", "skipped": "dispensado"}
+    parts = [
+        f"{labels.get(stage, stage)} {statuses.get(status, 'sem cache')}"
+        for stage, status in cache_status.items()
+    ]
+    return " · " + " · ".join(parts)
+
+def format_node_timings(node_timings):
+    """Linhas da tabela de desempenho por nó exibida na barra lateral."""
+    rows = []
+    for timing in node_timings:
+        row = {
+            "nó": timing["node"],
+            "tempo (s)": timing["seconds"],
+            "CPU (s)": timing["cpu_seconds"],
+        }
+        if "peak_memory_mb" in timing:
+            row["pico de memória (MB)"] = timing["peak_memory_mb"]
+        if "llm_usage.total_tokens" in timing:
+            row["tokens"] = timing["llm_usage.total_tokens"]
+        if "bytes_parsed" in timing:
+            row["bytes lidos"] = timing["bytes_parsed"]
+        rows.append(row)
+    return rows
+
 st.set_page_config(page_title="CSV Agent Chat", page_icon="📊", layout="wide")
 
 # ===========================
@@ -27,7 +69,9 @@ if "csv_info" not in st.session_state:
 if "temp_dir" not in st.session_state:
     st.session_state.temp_dir = tempfile.mkdtemp()
 if 'conversation_memory' not in st.session_state:
-    st.session_state.conversation_memory = ConversationBufferMemory(return_messages=True)
+    st.session_state.conversation_memory = ConversationMemory()
+if "node_timings" not in st.session_state:
+    st.session_state.node_timings = []
 
 st.title("📊 CSV Insight Bot")
 st.markdown("Converse com seus dados de forma natural!")
@@ -38,35 +82,91 @@ st.markdown("Converse com seus dados de forma natural!")
 with st.sidebar:
     st.header("⚙️ Configuração")
     api_key = st.text_input("🔑 OpenAI API Key", type="password")
-    uploaded_file = st.file_uploader("📁 Upload CSV", type="csv")
-
-    if uploaded_file and api_key:
-        if not st.session_state.csv_loaded or st.session_state.get("current_file") != uploaded_file.name:
+    # Com `CSV_AGENT_SERVICE_URL`, o app é só um cliente do serviço HTTP (`python -m src.service`)
+    service_client = get_service_client(api_key or None)
+    has_api_key = bool(api_key) or service_client is not None
+    uploaded_files = st.file_uploader("📁 Upload CSV", type="csv", accept_multiple_files=True)
+    optimize_dtypes = st.checkbox(
+        "🪶 Otimizar tipos (menos memória)",
+        value=False,
+        help="Reduz inteiros/floats, converte textos repetidos em categorias e detecta datas.",
+    )
+    figure_format = st.selectbox("🖼️ Formato dos gráficos", ["png", "webp", "svg"], index=0)
+    engine = st.selectbox(
+        "🚀 Engine de consulta",
+        [name for name in ENGINES if engine_available(name)],
+        index=0,
+        help="duckdb/polars executam filtros e agregações em paralelo; o pandas fica só para os gráficos.",
+    )
+
+    if uploaded_files and has_api_key:
+        file_names = [uploaded_file.name for uploaded_file in uploaded_files]
+        if not st.session_state.csv_loaded or st.session_state.get("current_files") != file_names:
             try:
                 st.session_state.chat_messages = []
-
-                file_copy = io.BytesIO(uploaded_file.getvalue())
-                preview_df = pd.read_csv(file_copy)
+                st.session_state.pop("service_session_id", None)
+
+                # Cada arquivo é ingerido e cacheado pelo próprio hash; o primeiro vira o `df`
+                tables = {}
+                entries = {}
+                for uploaded_file in uploaded_files:
+                    file_bytes = uploaded_file.getvalue()
+                    if service_client is not None:
+                        with st.spinner(f"📥 Enviando {uploaded_file.name} ao serviço..."):
+                            entry = service_client.upload(file_bytes, uploaded_file.name)
+                        entries[entry["dataset_id"]] = entry
+                        tables[table_name(uploaded_file.name, tables)] = entry["dataset_id"]
+                        continue
+                    dataset_id = hash_bytes(file_bytes)
+
+                    load_progress = st.progress(0, text=f"📥 Lendo {uploaded_file.name}...")
+                    entries[dataset_id] = ingest_chunked(
+                        file_bytes,
+                        dataset_id,
+                        cache_dir=st.session_state.temp_dir,
+                        progress_callback=lambda fraction, name=uploaded_file.name: load_progress.progress(
+                            fraction, text=f"📥 Lendo {name}... {fraction:.0%}"
+                        ),
+                    )
+                    load_progress.empty()
+                    tables[table_name(uploaded_file.name, tables)] = dataset_id
+
+                uploaded_file = uploaded_files[0]
+                dataset_id = next(iter(tables.values()))
+                entry = entries[dataset_id]
+
+                data_info = entry["data_info"]
+                column_names = data_info["columns"]
+                total_rows = data_info["total_rows"]
 
                 st.session_state.csv_info = {
                     "filename": uploaded_file.name,
-                    "rows": len(preview_df),
-                    "columns": len(preview_df.columns),
-                    "column_names": list(preview_df.columns),
-                    "dtypes": preview_df.dtypes.to_dict(),
+                    "rows": total_rows,
+                    "columns": len(column_names),
+                    "column_names": column_names,
+                    "dtypes": entry["schema"],
                 }
                 st.session_state.csv_loaded = True
-                st.session_state.current_file = uploaded_file.name
+                st.session_state.current_files = file_names
+                st.session_state.dataset_id = dataset_id
+                st.session_state.tables = tables if len(tables) > 1 else {}
+
+                tables_msg = ""
+                if len(tables) > 1:
+                    tables_msg = "\n                🗂️ **Tabelas (`tables`):** " + ", ".join(
+                        f"`{name}` ({entries[table_id]['data_info']['total_rows']:,} linhas)"
+                        for name, table_id in tables.items()
+                    ) + "\n"
 
                 welcome_msg = f"""
                 📊 **Arquivo carregado com sucesso!**
 
                 **{uploaded_file.name}**
-                - 📝 {len(preview_df):,} linhas
-                - 📊 {len(preview_df.columns)} colunas
-                - 🏷️ Colunas: {', '.join(preview_df.columns[:5])}{'...' if len(preview_df.columns) > 5 else ''}
-
-                🎯 **Análise completa: Todos os {len(preview_df):,} registros serão analisados para máxima precisão**
+                - 📝 {total_rows:,} linhas
+                - 📊 {len(column_names)} colunas
+                - 🏷️ Colunas: {', '.join(column_names[:5])}{'...' if len(column_names) > 5 else ''}
+                {tables_msg}
+                🎯 **Análise completa: Todos os {total_rows:,} registros serão analisados para máxima precisão**
                 
                 Pergunte, explore e visualize seus dados de forma simples! 🚀
                 """
@@ -96,17 +196,31 @@ with st.sidebar:
 
     for question in example_questions:
         if st.button(question, key=f"example_{question}", use_container_width=True):
-            if st.session_state.csv_loaded and api_key:
+            if st.session_state.csv_loaded and has_api_key:
                 st.session_state.pending_question = question.split(" ", 1)[1]
             else:
                 st.warning("⚠️ Configure API Key e carregue um CSV primeiro")
 
     if st.button("🗑️ Limpar Conversa", use_container_width=True):
         st.session_state.chat_messages = []
+        st.session_state.pop("service_session_id", None)
         if "temp_dir" in st.session_state and os.path.exists(st.session_state.temp_dir):
+            # As entradas do store apontam para a cópia do CSV e o cache colunar deste
+            # diretório: saem do store antes dele, e os arquivos são ingeridos de novo
+            store = get_dataset_store()
+            session_ids = {st.session_state.get("dataset_id"), *(st.session_state.get("tables") or {}).values()}
+            for dataset_id in session_ids - {None}:
+                store.discard(dataset_id)
+                store.discard(optimized_id(dataset_id))
+            st.session_state.csv_loaded = False
+            st.session_state.current_files = None
             shutil.rmtree(st.session_state.temp_dir, ignore_errors=True)
             st.session_state.temp_dir = tempfile.mkdtemp()
 
+    if st.session_state.node_timings:
+        with st.expander("⏱️ Desempenho da última pergunta"):
+            st.dataframe(format_node_timings(st.session_state.node_timings), hide_index=True)
+
 # ===========================
 # Área principal do chat
 # ===========================
@@ -123,15 +237,22 @@ with messages_container:
     for message in st.session_state.chat_messages:
         with st.chat_message(message["role"]):
             st.markdown(message["content"], unsafe_allow_html=False)
-            if message.get("image"):
-                st.image(message["image"], caption="Visualização gerada")
+            images = message.get("images") or ([message["image"]] if message.get("image") else [])
+            for index, image in enumerate(images, start=1):
+                if message.get("image_format") == "svg":
+                    image = image.decode("utf-8")
+                caption = "Visualização gerada" if len(images) == 1 else f"Visualização {index} de {len(images)}"
+                st.image(image, caption=caption)
             if message.get("processing_time"):
-                st.caption(f"⏱️ Processado em {message['processing_time']:.1f}s")
+                st.caption(
+                    f"⏱️ Processado em {message['processing_time']:.1f}s"
+                    f"{format_cache_status(message.get('cache_status'))}"
+                )
 
 # ===========================
 # Input do usuário
 # ===========================
-if st.session_state.csv_loaded and api_key:
+if st.session_state.csv_loaded and has_api_key:
     if hasattr(st.session_state, "pending_question"):
         user_input = st.session_state.pending_question
         del st.session_state.pending_question
@@ -149,33 +270,64 @@ if st.session_state.csv_loaded and api_key:
         progress_bar = st.progress(0)
         status_text = st.empty()
 
-        try:
-            status_text.text("🔄 Carregando dados...")
-            progress_bar.progress(20)
-
-            graph = get_compiled_graph()
+        with st.chat_message("assistant"):
+            stream_placeholder = st.empty()
+        streamed_tokens = []
 
-            status_text.text("🧠 Analisando pergunta...")
-            progress_bar.progress(40)
+        def on_token(token):
+            streamed_tokens.append(token)
+            stream_placeholder.markdown("".join(streamed_tokens) + "▌")
 
-            status_text.text("⚡ Processando dados...")
-            progress_bar.progress(60)
+        try:
+            status_text.text("🔄 Carregando dados...")
+            progress_bar.progress(5)
+
+            if service_client is not None:
+                # Dataset, memória e figuras ficam no serviço; o app só envia a pergunta
+                status_text.text("🛰️ Aguardando o serviço...")
+                progress_bar.progress(30)
+                result = service_client.ask(
+                    st.session_state.dataset_id,
+                    user_input,
+                    session_id=st.session_state.get("service_session_id"),
+                    tables=list((st.session_state.get("tables") or {}).values()),
+                    optimize_dtypes=optimize_dtypes,
+                    figure_format=figure_format,
+                    engine=engine,
+                )
+                st.session_state.service_session_id = result["session_id"]
+            else:
+                graph = get_compiled_graph()
+
+                csv_bytes = uploaded_files[0].getvalue()
+                graph_input = {
+                    "file_content": csv_bytes,
+                    "dataset_id": st.session_state.get("dataset_id"),
+                    "tables": st.session_state.get("tables"),
+                    "temp_dir": st.session_state.temp_dir,
+                    "optimize_dtypes": optimize_dtypes,
+                    "figure_format": figure_format,
+                    "engine": engine,
+                    "question": user_input,
+                    "api_key": api_key,
+                    "memory": st.session_state.get("conversation_memory"),
+                    "stream_callback": on_token,
+                }
 
-            csv_bytes = uploaded_file.getvalue()
-            graph_input = {
-                "file_content": csv_bytes,
-                "question": user_input,
-                "api_key": api_key,
-                "memory": st.session_state.get("conversation_memory"),
-            }
+                result = {}
+                for update in graph.stream(graph_input, stream_mode="updates"):
+                    for node_name, node_state in update.items():
+                        result = node_state
+                        progress, status = NODE_PROGRESS.get(node_name, (None, None))
+                        if progress is not None:
+                            progress_bar.progress(progress)
+                            status_text.text(status)
 
-            result = graph.invoke(graph_input)
+            stream_placeholder.empty()
 
             if "memory" in result:
                 st.session_state.conversation_memory = result["memory"]
-
-            status_text.text("🎨 Gerando visualização...")
-            progress_bar.progress(80)
+            st.session_state.node_timings = result.get("node_timings", [])
 
             progress_bar.progress(100)
             processing_time = time.time() - start_time
@@ -186,10 +338,12 @@ if st.session_state.csv_loaded and api_key:
                 "content": result.get("final_answer", "Desculpe, não consegui processar sua pergunta."),
                 "timestamp": time.time(),
                 "processing_time": processing_time,
+                "cache_status": result.get("cache_status"),
             }
 
-            if result.get("image_bytes"):
-                assistant_message["image"] = result["image_bytes"]
+            if result.get("images"):
+                assistant_message["images"] = result["images"]
+                assistant_message["image_format"] = result.get("image_format")
 
             if result.get("code"):
                 assistant_message["code"] = result["code"]
@@ -204,6 +358,7 @@ if st.session_state.csv_loaded and api_key:
             processing_time = time.time() - start_time
             progress_bar.empty()
             status_text.empty()
+            stream_placeholder.empty()
 
             st.session_state.chat_messages.append(
                 {
@@ -216,7 +371,7 @@ if st.session_state.csv_loaded and api_key:
             st.rerun()
 
 else:
-    if not api_key:
+    if not has_api_key:
         st.info("🔑 **Configure sua API Key da OpenAI** na barra lateral para começar.")
     elif not st.session_state.csv_loaded:
         st.info("📁 **Faça upload de um arquivo CSV** na barra lateral para começar a conversar.")
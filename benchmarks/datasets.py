@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+GENERATION_CHUNK_ROWS = 1_000_000
+CATEGORIES = np.array(["norte", "sul", "leste", "oeste", "centro"])
+
+# Formatos sintéticos: (colunas float, colunas int, colunas categóricas)
+SHAPES = {
+    "narrow": (3, 2, 1),
+    "wide": (100, 10, 10),
+}
+
+
+# ===========================
+# Synthetic CSVs
+# ===========================
+def dataset_path(data_dir, rows, shape, seed=0):
+    return os.path.join(data_dir, f"synthetic_{shape}_{rows}_{seed}.csv")
+
+
+def _chunk(rows, start, shape, rng):
+    n_float, n_int, n_cat = SHAPES[shape]
+    columns = {"id": np.arange(start, start + rows, dtype="int64")}
+
+    base = rng.normal(size=rows)
+    for i in range(n_float):
+        # Metade das colunas correlacionada com `base`, para correlação/PCA terem estrutura
+        noise = rng.normal(scale=1.0 + i % 3, size=rows)
+        values = (base * (i % 2) * 2 + noise) * (10 ** (i % 4))
+        if i % 5 == 4:
+            values[rng.random(rows) < 0.02] = np.nan
+        columns[f"valor_{i}"] = values
+
+    for i in range(n_int):
+        columns[f"contagem_{i}"] = rng.poisson(lam=3 + i, size=rows)
+
+    for i in range(n_cat):
+        columns[f"regiao_{i}"] = CATEGORIES[rng.integers(0, len(CATEGORIES), size=rows)]
+
+    columns["ativo"] = rng.random(rows) < 0.5
+    columns["data"] = pd.Timestamp("2020-01-01") + pd.to_timedelta(
+        rng.integers(0, 5 * 365, size=rows), unit="D"
+    )
+    return pd.DataFrame(columns)
+
+
+def generate_csv(data_dir, rows, shape="narrow", seed=0):
+    """
+    Gera (uma única vez) um CSV sintético com tipos mistos — floats com
+    nulos, inteiros, categorias, booleanos e datas — escrito em chunks para
+    não precisar de memória proporcional ao número de linhas.
+    """
+    if shape not in SHAPES:
+        raise ValueError(f"Formato desconhecido: {shape}")
+
+    path = dataset_path(data_dir, rows, shape, seed)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(data_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    partial = path + ".partial"
+    written = 0
+    with open(partial, "w", encoding="utf-8", newline="") as f:
+        while written < rows:
+            size = min(GENERATION_CHUNK_ROWS, rows - written)
+            _chunk(size, written, shape, rng).to_csv(f, index=False, header=written == 0)
+            written += size
+    os.replace(partial, path)
+    print(f"🧪 CSV sintético gerado: {path} ({os.path.getsize(path) / 1024 ** 2:.1f} MB)")
+    return path
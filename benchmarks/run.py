@@ -0,0 +1,282 @@
+"""
+Benchmark do pipeline completo de perguntas (`build_graph().invoke`) com CSVs
+sintéticos e um LLM stub local.
+
+Uso:
+    python -m benchmarks.run --preset quick
+    python -m benchmarks.run --sizes 10000 1000000 --shapes narrow wide --repeat 3
+    python -m benchmarks.run --preset quick --update-baseline
+    python -m benchmarks.run --preset quick --baseline benchmarks/baseline.json --tolerance 0.25
+    python -m benchmarks.run --preset huge --shapes narrow        # inclui 50 milhões de linhas
+
+Cada dataset roda em um processo próprio, então o pico de RSS medido é o
+daquele dataset. Sai com código 1 quando algum tempo ou o pico de RSS piora
+além da tolerância em relação ao baseline.
+"""
+import argparse
+import contextlib
+import multiprocessing
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.datasets import SHAPES, generate_csv
+from benchmarks.stub_llm import StubLLMServer
+from src.data.dataset_store import get_dataset_store, hash_bytes
+from src.memory.conversation_memory import ConversationMemory
+from src.workflow.graph import build_graph
+
+# Mesmas perguntas dos exemplos da barra lateral do app
+EXAMPLE_QUESTIONS = [
+    "Resumo estatístico das principais variáveis",
+    "Histograma de uma amostra dos dados",
+    "Correlação entre as principais variáveis numéricas",
+    "Boxplot para detectar outliers (amostra)",
+    "Análise descritiva básica",
+    "Padrões em uma amostra aleatória",
+    "Insights principais do dataset",
+]
+
+PRESETS = {
+    "quick": [10_000, 100_000],
+    "standard": [10_000, 100_000, 1_000_000],
+    "full": [10_000, 100_000, 1_000_000, 10_000_000],
+    # Opcional: o CSV é gerado em chunks, mas o upload é lido inteiro em memória (vários GB;
+    # dezenas de GB no formato largo)
+    "huge": [10_000, 100_000, 1_000_000, 10_000_000, 50_000_000],
+}
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_TOLERANCE = 0.25
+# Diferenças menores que isto (s) são ruído e nunca contam como regressão
+MIN_REGRESSION_SECONDS = 0.05
+
+
+# ===========================
+# Measurement
+# ===========================
+def peak_rss_mb():
+    """
+    Pico de RSS do processo e dos filhos já encerrados (workers do sandbox).
+    `ru_maxrss` é o pico da vida inteira do processo: só é por dataset porque
+    cada dataset roda em um processo próprio (`run_isolated`).
+    """
+    # Linux informa KB; macOS, bytes
+    scale = 1024 ** 2 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return round(own, 1), round(children, 1)
+
+
+def _node_seconds(node_timings):
+    totals = {}
+    for timing in node_timings:
+        totals[timing["node"]] = round(totals.get(timing["node"], 0.0) + timing["seconds"], 4)
+    return totals
+
+
+def _invoke(graph, state, verbose):
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    started = time.perf_counter()
+    with output:
+        result = graph.invoke(state)
+    return result, time.perf_counter() - started
+
+
+def run_isolated(base_url, path, args):
+    """Roda `run_dataset` em um processo novo (spawn), com grafo e store próprios."""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(_run_dataset_process, base_url, path, args).result()
+
+
+def _run_dataset_process(base_url, path, args):
+    return run_dataset(build_graph(), base_url, path, args)
+
+
+def run_dataset(graph, base_url, path, args):
+    with open(path, "rb") as f:
+        file_bytes = f.read()
+    dataset_id = hash_bytes(file_bytes)
+    get_dataset_store().clear()
+
+    base_state = {
+        "dataset_id": dataset_id,
+        "temp_dir": args.temp_dir,
+        "api_key": "stub",
+        "base_url": base_url,
+        "use_response_cache": args.with_cache,
+        "use_result_cache": args.with_cache,
+        "fastpath": args.fastpath,
+        "sandbox": args.sandbox,
+    }
+
+    # Primeira pergunta a frio: inclui leitura do CSV e cálculo do perfil
+    cold_result, cold_seconds = _invoke(graph, {
+        **base_state,
+        "dataset_id": None,
+        "file_content": file_bytes,
+        "question": args.questions[0],
+        "memory": ConversationMemory(),
+    }, args.verbose)
+    del file_bytes
+
+    questions = []
+    started = time.perf_counter()
+    for question in args.questions:
+        samples, nodes, failures = [], [], 0
+        for _ in range(args.repeat):
+            result, seconds = _invoke(graph, {
+                **base_state,
+                "question": question,
+                "memory": ConversationMemory(),
+            }, args.verbose)
+            samples.append(seconds)
+            nodes.append(_node_seconds(result.get("node_timings", [])))
+            failures += bool(result.get("code_error"))
+        questions.append({
+            "question": question,
+            "seconds": round(statistics.median(samples), 4),
+            "min_seconds": round(min(samples), 4),
+            "nodes": {
+                node: round(statistics.median(run.get(node, 0.0) for run in nodes), 4)
+                for node in sorted({node for run in nodes for node in run})
+            },
+            "failures": failures,
+        })
+    elapsed = time.perf_counter() - started
+
+    own_rss, children_rss = peak_rss_mb()
+    return {
+        "cold_seconds": round(cold_seconds, 4),
+        "cold_nodes": _node_seconds(cold_result.get("node_timings", [])),
+        "questions": questions,
+        "throughput_qps": round(len(args.questions) * args.repeat / elapsed, 3),
+        "peak_rss_mb": own_rss,
+        "peak_children_rss_mb": children_rss,
+    }
+
+
+# ===========================
+# Baseline Comparison
+# ===========================
+def _flatten(results):
+    metrics = {}
+    for name, run in results["runs"].items():
+        metrics[f"{name}|cold"] = run["cold_seconds"]
+        for item in run["questions"]:
+            metrics[f"{name}|{item['question']}"] = item["seconds"]
+    return metrics
+
+
+def compare(results, baseline, tolerance):
+    """Lista de regressões (tempo ou pico de RSS) acima da tolerância relativa."""
+    regressions = []
+    current, previous = _flatten(results), _flatten(baseline)
+    for key, seconds in current.items():
+        before = previous.get(key)
+        if before is None:
+            continue
+        if seconds > before * (1 + tolerance) and seconds - before > MIN_REGRESSION_SECONDS:
+            regressions.append(f"{key}: {before:.3f}s → {seconds:.3f}s")
+
+    for name, run in results["runs"].items():
+        before = baseline["runs"].get(name)
+        if before and run["peak_rss_mb"] > before["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{name}|peak_rss: {before['peak_rss_mb']} MB → {run['peak_rss_mb']} MB")
+        if before and run["throughput_qps"] < before["throughput_qps"] / (1 + tolerance):
+            regressions.append(f"{name}|throughput: {before['throughput_qps']} → {run['throughput_qps']} q/s")
+    return regressions
+
+
+# ===========================
+# CLI
+# ===========================
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de perguntas do CSV Agent")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--sizes", type=int, nargs="+", help="Número de linhas (substitui o preset)")
+    parser.add_argument("--shapes", nargs="+", choices=sorted(SHAPES), default=["narrow", "wide"])
+    parser.add_argument("--questions", nargs="+", default=EXAMPLE_QUESTIONS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "csv_agent_bench"))
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Latência simulada do LLM (s)")
+    parser.add_argument("--with-cache", action="store_true", help="Mantém os caches de resposta/resultado")
+    # Desligado por padrão: o benchmark mede o caminho de código (LLM stub + execução)
+    parser.add_argument("--fastpath", action="store_true", help="Permite o fastpath de análises prontas")
+    parser.add_argument("--sandbox", choices=["inline", "process"], default="inline")
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = args.sizes or PRESETS[args.preset]
+    args.temp_dir = tempfile.mkdtemp(prefix="csv_agent_bench_cache_")
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat,
+            "fastpath": args.fastpath,
+            "sandbox": args.sandbox,
+            "with_cache": args.with_cache,
+            "llm_latency": args.llm_latency,
+        },
+        "runs": {},
+    }
+
+    with StubLLMServer(latency=args.llm_latency) as stub:
+        for shape in args.shapes:
+            for rows in sizes:
+                name = f"{shape}_{rows}"
+                path = generate_csv(args.data_dir, rows, shape)
+                print(f"⏱️ {name}...")
+                run = run_isolated(stub.base_url, path, args)
+                results["runs"][name] = {"rows": rows, "shape": shape, **run}
+                print(
+                    f"   frio {run['cold_seconds']:.2f}s · {run['throughput_qps']:.2f} perguntas/s · "
+                    f"pico RSS {run['peak_rss_mb']} MB"
+                )
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"💾 Resultados em {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"📌 Baseline atualizado: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("ℹ️ Nenhum baseline encontrado; rode com --update-baseline para criar um")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"❌ {len(regressions)} regressão(ões) acima de {args.tolerance:.0%}:")
+        for regression in regressions:
+            print(f"   - {regression}")
+        return 1
+    print("✅ Sem regressões em relação ao baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Teste de carga local do serviço HTTP (`src/service/`) com o LLM stub.
+
+Uso:
+    python -m benchmarks.service_load --tenants 4 --requests 20 --rows 100000
+    python -m benchmarks.service_load --workers 2 --queue-size 4 --llm-latency 0.5
+
+Cada tenant envia o mesmo CSV e dispara perguntas concorrentes; o resultado
+mostra latência (p50/p95), vazão e quantos pedidos foram recusados por
+backpressure (503) ou limite do tenant (429).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.datasets import generate_csv
+from benchmarks.run import EXAMPLE_QUESTIONS
+from benchmarks.stub_llm import StubLLMServer
+from src.service.client import ServiceClient, ServiceError
+from src.service.server import make_server, start_in_thread
+from src.service.service import DEFAULT_QUEUE_SIZE, DEFAULT_WORKERS, AgentService
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 4)
+
+
+def run_load(base_url, file_bytes, args):
+    clients = [ServiceClient(base_url, tenant=f"tenant-{index}") for index in range(args.tenants)]
+    datasets = [client.upload(file_bytes, "bench.csv")["dataset_id"] for client in clients]
+
+    def ask(number):
+        client = clients[number % len(clients)]
+        question = args.questions[number % len(args.questions)]
+        started = time.perf_counter()
+        try:
+            client.ask(datasets[number % len(clients)], question, session_id=f"s{number}")
+            status = 200
+        except ServiceError as e:
+            status = e.status
+        return status, time.perf_counter() - started
+
+    total = args.tenants * args.requests
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        outcomes = list(pool.map(ask, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [seconds for status, seconds in outcomes if status == 200]
+    statuses = {}
+    for status, _ in outcomes:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "requests": total,
+        "statuses": statuses,
+        "p50_seconds": _percentile(latencies, 0.5),
+        "p95_seconds": _percentile(latencies, 0.95),
+        "mean_seconds": round(statistics.mean(latencies), 4) if latencies else None,
+        "throughput_qps": round(len(latencies) / elapsed, 3),
+        "elapsed_seconds": round(elapsed, 3),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga do serviço HTTP do CSV Agent")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--shape", default="narrow")
+    parser.add_argument("--tenants", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=10, help="Perguntas por tenant")
+    parser.add_argument("--clients", type=int, default=16, help="Conexões simultâneas")
+    parser.add_argument("--questions", nargs="+", default=EXAMPLE_QUESTIONS)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE)
+    parser.add_argument("--max-inflight", type=int, default=4, help="Pedidos simultâneos por tenant")
+    parser.add_argument("--sandbox", choices=["inline", "process"], default="process")
+    parser.add_argument("--llm-latency", type=float, default=0.0)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "csv_agent_bench"))
+    parser.add_argument("--output", default="service_load.json")
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    path = generate_csv(args.data_dir, args.rows, args.shape)
+    with open(path, "rb") as f:
+        file_bytes = f.read()
+
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with StubLLMServer(latency=args.llm_latency) as stub:
+        service = AgentService(
+            api_key="stub",
+            base_url=stub.base_url,
+            workers=args.workers,
+            queue_size=args.queue_size,
+            tenant_limits={"max_inflight": args.max_inflight, "requests_per_minute": 10 ** 6},
+            sandbox=args.sandbox,
+        )
+        server = make_server(service, port=0)
+        start_in_thread(server)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            with output:
+                results = run_load(base_url, file_bytes, args)
+        finally:
+            server.shutdown()
+            service.shutdown()
+
+    results["config"] = {
+        key: getattr(args, key)
+        for key in ("rows", "shape", "tenants", "requests", "clients", "workers", "queue_size",
+                    "max_inflight", "sandbox", "llm_latency")
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+    print(
+        f"🛰️ {results['requests']} pedidos em {results['elapsed_seconds']:.1f}s · "
+        f"{results['throughput_qps']:.2f} perguntas/s · p50 {results['p50_seconds']}s · "
+        f"p95 {results['p95_seconds']}s · status {results['statuses']}"
+    )
+    print(f"💾 Resultados em {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.cache.response_cache import normalize_question
+
+# Marcador presente no prompt ReAct (modo código)
+REACT_MARKER = "Responda **apenas** com um bloco de código Python"
+
+CANNED_CODE = {
+    "histogram": """
+import json
+import math
+
+numeric_cols = df.select_dtypes(include=['number']).columns[:12]
+n_cols = 4
+n_rows = max(1, math.ceil(len(numeric_cols) / n_cols))
+fig, axes = plt.subplots(n_rows, n_cols, figsize=(6*n_cols, 4*n_rows))
+axes = axes.flatten()
+for i, col in enumerate(numeric_cols):
+    fastplot.hist(axes[i], df[col], bins=50)
+    axes[i].set_title(col)
+plt.tight_layout()
+plt.savefig(img_path, dpi=150, bbox_inches='tight')
+plt.close()
+print(json.dumps({"answer": "Histogramas gerados."}, ensure_ascii=False))
+""",
+    "correlation": """
+import json
+
+fig, ax = plt.subplots(figsize=(10, 8))
+sns.heatmap(profile.corr.iloc[:20, :20], cmap="coolwarm", ax=ax)
+plt.savefig(img_path, dpi=150, bbox_inches='tight')
+plt.close()
+print(json.dumps({"answer": "Matriz de correlação gerada."}, ensure_ascii=False))
+""",
+    "boxplot": """
+import json
+
+numeric_cols = df.select_dtypes(include=['number']).columns[:12]
+fig, ax = plt.subplots(figsize=(14, 6))
+fastplot.boxplot(ax, df[numeric_cols])
+plt.savefig(img_path, dpi=150, bbox_inches='tight')
+plt.close()
+print(json.dumps({"answer": "Boxplots gerados."}, ensure_ascii=False))
+""",
+    "default": """
+import json
+
+summary = profile.describe.T[['mean', 'std', 'min', 'max']]
+ranges_df = profile.ranges()
+fig, ax = plt.subplots(figsize=(12, 6))
+ax.bar(ranges_df.index.astype(str)[:20], ranges_df['amplitude'][:20])
+plt.xticks(rotation=45)
+plt.savefig(img_path, dpi=150, bbox_inches='tight')
+plt.close()
+print(json.dumps({"answer": f"Resumo de {len(summary)} variáveis numéricas."}, ensure_ascii=False))
+""",
+}
+
+CANNED_TEXT = "O dataset contém variáveis numéricas e categóricas; faça uma pergunta de análise para gerar gráficos."
+
+
+def canned_response(messages):
+    """Resposta determinística a partir do prompt de sistema e da pergunta do usuário."""
+    system = messages[0]["content"] if messages else ""
+    if REACT_MARKER not in system:
+        return CANNED_TEXT
+
+    question = next(
+        (normalize_question(m["content"]) for m in reversed(messages) if m["role"] == "user"), ""
+    )
+    key = "default"
+    if "histogram" in question:
+        key = "histogram"
+    elif "correla" in question:
+        key = "correlation"
+    elif "boxplot" in question or "outlier" in question:
+        key = "boxplot"
+    return f"```python{CANNED_CODE[key]}```"
+
+
+# ===========================
+# Stub Server
+# ===========================
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        content = canned_response(body.get("messages", []))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": prompt_tokens + len(content) // 4,
+        }
+        base = {"id": "stub", "created": int(time.time()), "model": body.get("model", "stub")}
+
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for start in range(0, len(content), 16):
+                chunk = {**base, "object": "chat.completion.chunk", "choices": [
+                    {"index": 0, "delta": {"content": content[start:start + 16]}, "finish_reason": None}
+                ]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            final = {**base, "object": "chat.completion.chunk", "choices": [], "usage": usage}
+            self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+            return
+
+        payload = json.dumps({**base, "object": "chat.completion", "usage": usage, "choices": [
+            {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+        ]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class StubLLMServer:
+    """
+    Servidor HTTP local compatível com `/v1/chat/completions` que devolve
+    blocos de código ReAct fixos. Use `base_url` no estado do grafo para que o
+    cliente da OpenAI fale com ele em vez da API real. `latency` simula o
+    tempo de resposta do modelo, em segundos.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.latency = latency
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
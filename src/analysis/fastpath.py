@@ -0,0 +1,42 @@
+import json
+
+import matplotlib
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+
+from src.analysis.routines import ROUTINES, AnalysisContext
+from src.sandbox.fast_plots import PlotAccelerator
+from src.sandbox.rendering import PYPLOT_LOCK
+
+
+# ===========================
+# Fast Path Runner
+# ===========================
+def run_analysis(name, profile, load_frame, sink, columns=None, options=None, parallel_render=True):
+    """
+    Executa uma rotina pronta (sem LLM) e retorna o mesmo formato de
+    `run_code`: `{"stdout", "error", "images", "image_format", "sampling_notes"}`.
+    O `stdout` traz o JSON `{"answer": ...}`, como o código gerado faria.
+    """
+    accelerator = PlotAccelerator()
+    ctx = AnalysisContext(profile, load_frame, accelerator, columns, options)
+
+    error = None
+    answer = None
+    with PYPLOT_LOCK:
+        try:
+            answer = ROUTINES[name](ctx)
+            sink.capture_open_figures()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            plt.close("all")
+
+    return {
+        "stdout": json.dumps({"answer": answer}, ensure_ascii=False) if answer else "",
+        "error": error,
+        "images": [] if error else sink.render(parallel=parallel_render),
+        "image_format": sink.format,
+        "sampling_notes": list(accelerator.notes),
+    }
@@ -0,0 +1,284 @@
+import math
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+try:
+    from sklearn.cluster import KMeans
+    from sklearn.decomposition import PCA
+except ImportError:  # scikit-learn é opcional; sem ele usamos PCA/KMeans em numpy
+    KMeans = PCA = None
+
+MAX_PLOT_COLUMNS = 24
+MAX_HEATMAP_COLUMNS = 30
+CLUSTER_SAMPLE_SIZE = 50_000
+DEFAULT_CLUSTERS = 3
+KMEANS_ITERATIONS = 100
+SEED = 0
+
+
+# ===========================
+# Analysis Routines
+# ===========================
+# Cada rotina recebe um `AnalysisContext` e retorna o texto da resposta; as
+# figuras criadas com `plt` são capturadas pelo chamador. As estatísticas vêm
+# do `profile` pré-calculado sempre que possível, sem tocar no DataFrame; se o
+# perfil foi estimado numa amostra, são recalculadas nas colunas usadas.
+class AnalysisContext:
+    def __init__(self, profile, load_frame, accelerator, columns=None, options=None):
+        self.profile = profile
+        self.load_frame = load_frame
+        self.accel = accelerator
+        self.columns = list(columns or [])
+        self.options = dict(options or {})
+
+    def numeric_columns(self, limit=None):
+        numeric = self.profile.numeric_columns
+        selected = [col for col in self.columns if col in numeric] or numeric
+        return selected[:limit] if limit else selected
+
+    def exact_frame(self, columns):
+        """Colunas lidas do dataset quando o perfil é amostrado; None quando o perfil já é exato."""
+        return self.load_frame(list(columns)) if self.profile.sample_rows else None
+
+
+def _grid(n_items, n_cols=4, size=(6, 4)):
+    n_cols = max(1, min(n_cols, n_items))
+    n_rows = max(1, math.ceil(n_items / n_cols))
+    fig, axes = plt.subplots(n_rows, n_cols, figsize=(size[0] * n_cols, size[1] * n_rows), squeeze=False)
+    axes = axes.flatten()
+    for ax in axes[n_items:]:
+        ax.set_visible(False)
+    return fig, axes
+
+
+def _omitted(ctx, shown):
+    total = len(ctx.numeric_columns())
+    return f" (exibidas {shown} de {total} colunas numéricas)" if total > shown else ""
+
+
+def _no_numeric():
+    return "O dataset não possui colunas numéricas para esta análise."
+
+
+def _finite(series):
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    return values[np.isfinite(values)]
+
+
+def _describe(ctx, columns, frame=None):
+    """`describe` das colunas: do perfil, ou de `frame` (dataset inteiro) quando informado."""
+    if frame is None:
+        return ctx.profile.describe[columns]
+    return frame[columns].describe()
+
+
+def histograms(ctx):
+    columns = [col for col in ctx.numeric_columns(MAX_PLOT_COLUMNS) if col in ctx.profile.histograms]
+    if not columns:
+        return _no_numeric()
+
+    frame = ctx.exact_frame(columns)
+    fig, axes = _grid(len(columns))
+    for ax, col in zip(axes, columns):
+        counts, edges = ctx.profile.histograms[col]
+        if frame is not None:
+            # Mesmas faixas do perfil, com as contagens do dataset inteiro
+            counts, edges = np.histogram(np.clip(_finite(frame[col]), edges[0], edges[-1]), bins=edges)
+        ax.stairs(counts, edges, fill=True, alpha=0.7)
+        ax.set_title(str(col))
+    fig.tight_layout()
+
+    describe = _describe(ctx, columns, frame)
+    skewed = [
+        str(col) for col in columns
+        if describe.loc["std", col] and abs(describe.loc["mean", col] - describe.loc["50%", col]) > 0.2 * describe.loc["std", col]
+    ]
+    answer = f"Histogramas de {len(columns)} variáveis numéricas{_omitted(ctx, len(columns))}."
+    if skewed:
+        answer += f" Distribuições assimétricas (média distante da mediana): {', '.join(skewed[:10])}."
+    return answer
+
+
+def describe(ctx):
+    columns = ctx.numeric_columns()
+    if not columns:
+        return _no_numeric()
+
+    shown = columns[:MAX_HEATMAP_COLUMNS]
+    frame = ctx.exact_frame(shown)
+    table = _describe(ctx, shown, frame).T
+    lines = [
+        f"- **{col}**: média {row['mean']:.4g}, mediana {row['50%']:.4g}, "
+        f"desvio padrão {row['std']:.4g}, mín {row['min']:.4g}, máx {row['max']:.4g}"
+        for col, row in table.iterrows()
+    ]
+    null_counts = ctx.profile.null_counts.copy()
+    if frame is not None:
+        null_counts.update(frame[shown].isna().sum())
+    nulls = null_counts[null_counts > 0]
+    answer = (
+        f"Resumo estatístico de {len(columns)} variáveis numéricas "
+        f"({ctx.profile.total_rows:,} linhas):\n\n" + "\n".join(lines)
+    )
+    if len(nulls):
+        answer += "\n\nColunas com valores nulos: " + ", ".join(f"{col} ({int(n)})" for col, n in nulls.items())
+    return answer
+
+
+def correlation(ctx):
+    columns = ctx.numeric_columns(MAX_HEATMAP_COLUMNS)
+    if len(columns) < 2:
+        return "São necessárias ao menos duas colunas numéricas para calcular correlações."
+
+    frame = ctx.exact_frame(columns)
+    corr = ctx.profile.corr.loc[columns, columns] if frame is None else frame[columns].corr()
+    size = max(6, 0.5 * len(columns))
+    fig, ax = plt.subplots(figsize=(size + 2, size))
+    sns.heatmap(corr, annot=len(columns) <= 15, fmt=".2f", cmap="coolwarm", vmin=-1, vmax=1, ax=ax)
+    ax.set_title("Matriz de correlação")
+    fig.tight_layout()
+
+    mask = np.triu(np.ones(corr.shape, dtype=bool), k=1)
+    pairs = corr.where(mask).stack()
+    pairs = pairs.reindex(pairs.abs().sort_values(ascending=False).index).head(5)
+    if pairs.empty:
+        return "Não foi possível calcular correlações entre as colunas numéricas."
+    described = ", ".join(f"{a} e {b} ({r:+.2f})" for (a, b), r in pairs.items())
+    return f"Correlação de Pearson entre {len(columns)} variáveis{_omitted(ctx, len(columns))}. Pares mais correlacionados: {described}."
+
+
+def outliers(ctx):
+    columns = ctx.numeric_columns(MAX_PLOT_COLUMNS)
+    if not columns:
+        return _no_numeric()
+
+    frame = ctx.load_frame(columns)
+    fig, axes = _grid(len(columns), n_cols=6, size=(3, 4))
+    counts = {}
+    for ax, col in zip(axes, columns):
+        stats = ctx.accel.boxplot(ax, frame[col])
+        if stats:
+            q1, q3 = stats[0]["q1"], stats[0]["q3"]
+            values = frame[col].to_numpy(dtype="float64", na_value=np.nan)
+            outside = (values < q1 - 1.5 * (q3 - q1)) | (values > q3 + 1.5 * (q3 - q1))
+            counts[col] = int(np.count_nonzero(outside))
+        ax.set_title(str(col))
+    fig.tight_layout()
+
+    ranked = sorted(counts.items(), key=lambda item: -item[1])
+    with_outliers = [f"{col} ({n:,})" for col, n in ranked if n]
+    if not with_outliers:
+        return f"Nenhum outlier pelo critério de 1,5×IQR nas {len(columns)} variáveis analisadas."
+    return (
+        f"Outliers pelo critério de 1,5×IQR{_omitted(ctx, len(columns))}: "
+        f"{', '.join(with_outliers[:15])}."
+    )
+
+
+def ranges(ctx):
+    columns = ctx.numeric_columns()
+    if not columns:
+        return _no_numeric()
+
+    ranges_df = ctx.profile.ranges().loc[columns]
+    ranges_df["desvio_padrao"] = _describe(ctx, columns, ctx.exact_frame(columns)).loc["std"]
+
+    shown = ranges_df.head(MAX_HEATMAP_COLUMNS)
+    fig, ax = plt.subplots(figsize=(max(8, 0.5 * len(shown)), 6))
+    ax.bar([str(col) for col in shown.index], shown["amplitude"])
+    ax.set_title("Amplitude (Intervalo) de Cada Variável")
+    ax.set_ylabel("Amplitude")
+    ax.tick_params(axis="x", rotation=45)
+    fig.tight_layout()
+
+    lines = [
+        f"- **{col}**: de {row['min']:.4g} a {row['max']:.4g} (amplitude {row['amplitude']:.4g}, "
+        f"desvio padrão {row['desvio_padrao']:.4g}, variância {row['desvio_padrao'] ** 2:.4g})"
+        for col, row in shown.iterrows()
+    ]
+    return "Intervalo de cada variável numérica:\n\n" + "\n".join(lines)
+
+
+def clusters(ctx):
+    columns = ctx.numeric_columns()
+    if len(columns) < 2:
+        return "São necessárias ao menos duas colunas numéricas para identificar clusters."
+
+    n_clusters = int(ctx.options.get("n_clusters") or DEFAULT_CLUSTERS)
+    frame = ctx.load_frame(columns).dropna()
+    if len(frame) < n_clusters:
+        return "Não há linhas completas suficientes para identificar clusters."
+    if len(frame) > CLUSTER_SAMPLE_SIZE:
+        frame = ctx.accel.sample(frame, CLUSTER_SAMPLE_SIZE)
+
+    values = frame.to_numpy(dtype="float64")
+    std = values.std(axis=0)
+    values = (values - values.mean(axis=0)) / np.where(std > 0, std, 1)
+
+    components, explained = _pca(values)
+    labels = _kmeans(values, n_clusters)
+
+    fig, ax = plt.subplots(figsize=(9, 7))
+    ctx.accel.scatter(ax, components[:, 0], components[:, 1], hue=labels)
+    ax.set_xlabel(f"PC1 ({explained[0]:.0%})")
+    ax.set_ylabel(f"PC2 ({explained[1]:.0%})")
+    ax.set_title(f"KMeans ({n_clusters} clusters) sobre PCA")
+    fig.tight_layout()
+
+    sizes = pd.Series(labels).value_counts().sort_index()
+    described = ", ".join(f"cluster {label}: {count:,} pontos" for label, count in sizes.items())
+    return (
+        f"KMeans com {n_clusters} clusters sobre {len(columns)} variáveis padronizadas "
+        f"({len(frame):,} linhas). Os dois primeiros componentes principais explicam "
+        f"{explained[:2].sum():.0%} da variância. Tamanhos: {described}."
+    )
+
+
+def _pca(values):
+    if PCA is not None:
+        pca = PCA(n_components=2, random_state=SEED)
+        return pca.fit_transform(values), pca.explained_variance_ratio_
+    _, singular, vt = np.linalg.svd(values, full_matrices=False)
+    variance = singular ** 2
+    return values @ vt[:2].T, variance[:2] / variance.sum()
+
+
+def _kmeans(values, n_clusters):
+    if KMeans is not None:
+        return KMeans(n_clusters=n_clusters, n_init=10, random_state=SEED).fit_predict(values)
+
+    # k-means++ e iterações de Lloyd em numpy
+    rng = np.random.default_rng(SEED)
+    centers = [values[rng.integers(len(values))]]
+    for _ in range(1, n_clusters):
+        distances = np.min([((values - c) ** 2).sum(axis=1) for c in centers], axis=0)
+        total = distances.sum()
+        probs = distances / total if total > 0 else None
+        centers.append(values[rng.choice(len(values), p=probs)])
+    centers = np.array(centers)
+
+    labels = np.zeros(len(values), dtype=int)
+    for iteration in range(KMEANS_ITERATIONS):
+        distances = ((values[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        new_labels = distances.argmin(axis=1)
+        if iteration and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for k in range(n_clusters):
+            members = values[labels == k]
+            if len(members):
+                centers[k] = members.mean(axis=0)
+    return labels
+
+
+ROUTINES = {
+    "histograms": histograms,
+    "describe": describe,
+    "correlation": correlation,
+    "outliers": outliers,
+    "ranges": ranges,
+    "clusters": clusters,
+}
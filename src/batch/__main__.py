@@ -0,0 +1,91 @@
+"""
+Relatório em lote: responde uma lista de perguntas sobre um CSV e grava um
+relatório Markdown com respostas e figuras.
+
+Uso:
+    python -m src.batch dados.csv --questions perguntas.txt --output relatorio/
+    python -m src.batch dados.csv -q "Resumo estatístico" -q "Correlação entre as variáveis" --rpm 500
+"""
+import argparse
+import os
+import sys
+
+from src.batch.report import write_report
+from src.batch.runner import DEFAULT_CONCURRENCY, run_batch
+from src.sandbox.engines import ENGINES
+from src.sandbox.rendering import SUPPORTED_FORMATS
+
+
+def read_questions(path):
+    """Uma pergunta por linha; linhas vazias e iniciadas por `#` são ignoradas."""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Relatório em lote do CSV Agent")
+    parser.add_argument("csv", help="Arquivo CSV")
+    parser.add_argument("--questions", help="Arquivo com uma pergunta por linha")
+    parser.add_argument("-q", "--question", action="append", default=[], help="Pergunta (pode repetir)")
+    parser.add_argument("--output", default="relatorio")
+    parser.add_argument("--title")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Chamadas simultâneas ao LLM")
+    parser.add_argument("--rpm", type=int, help="Limite de requisições por minuto da API")
+    parser.add_argument("--tpm", type=int, help="Limite de tokens por minuto da API")
+    parser.add_argument("--sandbox", choices=["inline", "process"], default="process")
+    parser.add_argument("--engine", choices=ENGINES)
+    parser.add_argument("--figure-format", choices=SUPPORTED_FORMATS, default="png")
+    parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY"))
+    parser.add_argument("--base-url")
+    parser.add_argument("--no-code", dest="include_code", action="store_false",
+                        help="Não inclui o código gerado no relatório")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    questions = list(args.question)
+    if args.questions:
+        questions += read_questions(args.questions)
+    if not questions:
+        print("❌ Nenhuma pergunta informada (use --questions ou -q)")
+        return 2
+    if not args.api_key:
+        print("❌ Informe a chave da OpenAI com --api-key ou OPENAI_API_KEY")
+        return 2
+
+    with open(args.csv, "rb") as f:
+        file_bytes = f.read()
+
+    options = {"figure_format": args.figure_format}
+    if args.engine:
+        options["engine"] = args.engine
+
+    def on_result(item):
+        status = "❌" if item.get("error") else "✅"
+        print(f"{status} [{item['index'] + 1}/{len(questions)}] {item['question']} ({item['seconds']:.1f}s)")
+
+    batch = run_batch(
+        file_bytes, questions, args.api_key,
+        base_url=args.base_url,
+        concurrency=args.concurrency,
+        rpm=args.rpm,
+        tpm=args.tpm,
+        sandbox=args.sandbox,
+        options=options,
+        progress_callback=on_result,
+    )
+    path = write_report(batch, args.output, title=args.title or os.path.basename(args.csv),
+                        include_code=args.include_code)
+
+    stats = batch["limiter"]
+    print(
+        f"📄 Relatório em {path} · {len(questions)} perguntas em {batch['seconds']:.1f}s "
+        f"({stats['calls']} chamadas ao LLM, {stats['retries']} novas tentativas)"
+    )
+    return 1 if any(item.get("error") for item in batch["results"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
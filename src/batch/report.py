@@ -0,0 +1,64 @@
+import os
+from datetime import datetime
+
+FIGURES_DIR = "figures"
+
+
+# ===========================
+# Markdown Report
+# ===========================
+def write_report(batch, output_dir, title=None, include_code=True):
+    """
+    Grava `report.md` em `output_dir` com as respostas do lote, na ordem das
+    perguntas, e as figuras em `output_dir/figures/`. Retorna o caminho do
+    relatório.
+    """
+    figures_dir = os.path.join(output_dir, FIGURES_DIR)
+    os.makedirs(figures_dir, exist_ok=True)
+
+    results = batch["results"]
+    failed = sum(1 for item in results if item.get("error"))
+    lines = [
+        f"# {title or 'Relatório de análise'}",
+        "",
+        f"_Gerado em {datetime.now():%d/%m/%Y %H:%M} · dataset `{batch['dataset_id'][:12]}` · "
+        f"{len(results)} perguntas em {batch['seconds']:.1f}s"
+        + (f" · {failed} com erro" if failed else "")
+        + "_",
+        "",
+    ]
+    lines += [f"{item['index'] + 1}. [{item['question']}](#pergunta-{item['index'] + 1})" for item in results]
+
+    for item in results:
+        number = item["index"] + 1
+        lines += ["", f'<a id="pergunta-{number}"></a>', "", f"## {number}. {item['question']}", ""]
+        if item.get("error"):
+            lines += [f"> ❌ **Erro:** {_one_line(item['error'])}", ""]
+        if item.get("answer"):
+            lines += [item["answer"], ""]
+
+        for position, image in enumerate(item.get("images") or [], start=1):
+            filename = f"q{number:02d}_{position}.{item.get('image_format') or 'png'}"
+            with open(os.path.join(figures_dir, filename), "wb") as f:
+                f.write(image)
+            lines += [f"![Figura {position} da pergunta {number}]({FIGURES_DIR}/{filename})", ""]
+
+        if include_code and item.get("code"):
+            lines += ["<details><summary>Código</summary>", "", "```python", item["code"], "```", "", "</details>", ""]
+
+        lines.append(f"_⏱️ {item['seconds']:.1f}s{_cache_text(item.get('cache_status'))}_")
+
+    path = os.path.join(output_dir, "report.md")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+def _cache_text(cache_status):
+    if not cache_status:
+        return ""
+    return " · " + " · ".join(f"{layer}: {status}" for layer, status in cache_status.items())
+
+
+def _one_line(text):
+    return " ".join(str(text).split())[:500]
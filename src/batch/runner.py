@@ -0,0 +1,106 @@
+import asyncio
+import tempfile
+import time
+
+from src.llm.rate_limit import RateLimiter
+from src.memory.conversation_memory import ConversationMemory
+from src.nodes.load_csv_node import load_csv
+from src.nodes.profile_dataset_node import profile_dataset
+from src.workflow.graph import build_graph
+
+DEFAULT_CONCURRENCY = 4
+# Perguntas em andamento por chamada simultânea ao LLM: as demais esperam sem ocupar memória
+QUESTIONS_PER_SLOT = 2
+
+
+# ===========================
+# Dataset
+# ===========================
+def prepare_dataset(file_bytes, temp_dir, options=None):
+    """
+    Lê e perfila o dataset uma única vez; as perguntas do lote só o anexam
+    pelo `dataset_id`. Retorna o estado (`dataset_id`, `schema`, `data_info`).
+    """
+    state = {"file_content": file_bytes, "temp_dir": temp_dir, **(options or {})}
+    state = load_csv(state)
+    return profile_dataset(state)
+
+
+# ===========================
+# Batch Runner
+# ===========================
+async def run_batch_async(file_bytes, questions, api_key, base_url=None, temp_dir=None,
+                          concurrency=DEFAULT_CONCURRENCY, rpm=None, tpm=None, sandbox="process",
+                          options=None, progress_callback=None):
+    """
+    Responde várias perguntas independentes sobre o mesmo dataset.
+
+    O dataset é carregado e perfilado uma vez; cada pergunta roda no grafo
+    assíncrono com memória própria. As chamadas ao LLM passam por um
+    `RateLimiter` (`concurrency`, `rpm`, `tpm`, retry em 429) e, com
+    `sandbox="process"`, o código gerado roda em paralelo nos workers do
+    sandbox. `options` vai para o estado de todas as perguntas (ex.: `engine`,
+    `figure_format`). Retorna `{"dataset_id", "results", "seconds", "limiter"}`,
+    com os resultados na ordem das perguntas.
+    """
+    temp_dir = temp_dir or tempfile.mkdtemp(prefix="csv_agent_batch_")
+    started = time.perf_counter()
+    dataset_id = (await asyncio.to_thread(prepare_dataset, file_bytes, temp_dir, options))["dataset_id"]
+    print(f"📦 Dataset pronto em {time.perf_counter() - started:.1f}s: {dataset_id[:12]}")
+
+    limiter = RateLimiter(concurrency, rpm=rpm, tpm=tpm)
+    graph = build_graph(async_mode=True)
+    base_state = {
+        **(options or {}),
+        "dataset_id": dataset_id,
+        "temp_dir": temp_dir,
+        "api_key": api_key,
+        "base_url": base_url,
+        "sandbox": sandbox,
+        "llm_limiter": limiter,
+    }
+    gate = asyncio.Semaphore(max(1, concurrency) * QUESTIONS_PER_SLOT)
+
+    async def ask(index, question):
+        async with gate:
+            question_started = time.perf_counter()
+            try:
+                state = await graph.ainvoke({**base_state, "question": question, "memory": ConversationMemory()})
+                item = result_item(question, state)
+            except Exception as e:
+                item = {"question": question, "answer": None, "images": [], "error": f"{type(e).__name__}: {e}"}
+            item["index"] = index
+            item["seconds"] = round(time.perf_counter() - question_started, 3)
+            if progress_callback:
+                progress_callback(item)
+            return item
+
+    results = await asyncio.gather(*(ask(index, question) for index, question in enumerate(questions)))
+    return {
+        "dataset_id": dataset_id,
+        "results": list(results),
+        "seconds": round(time.perf_counter() - started, 3),
+        "limiter": dict(limiter.stats),
+    }
+
+
+def run_batch(file_bytes, questions, api_key, **kwargs):
+    """Versão síncrona de `run_batch_async`."""
+    return asyncio.run(run_batch_async(file_bytes, questions, api_key, **kwargs))
+
+
+def result_item(question, state):
+    """Campos do estado final do grafo que entram no relatório."""
+    error = state.get("execution_error") if state.get("code_error") else None
+    return {
+        "question": question,
+        "answer": state.get("final_answer"),
+        "mode": state.get("mode"),
+        "code": state.get("code"),
+        "images": state.get("images") or [],
+        "image_format": state.get("image_format"),
+        "cache_status": state.get("cache_status", {}),
+        "llm_usage": state.get("llm_usage"),
+        "node_timings": state.get("node_timings", []),
+        "error": error,
+    }
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_FUZZY_THRESHOLD = 0.85
+# A comparação aproximada é opt-in: `CSV_AGENT_FUZZY_CACHE=1` a liga no cache do processo
+FUZZY_ENV = "CSV_AGENT_FUZZY_CACHE"
+
+# Palavras sem conteúdo ignoradas na comparação aproximada
+STOPWORDS = {
+    "a", "o", "as", "os", "de", "da", "do", "das", "dos", "e", "em", "no", "na",
+    "nos", "nas", "um", "uma", "uns", "umas", "para", "por", "com", "me", "qual",
+    "quais", "the", "of", "and", "in", "to", "for", "show", "what",
+}
+
+# Palavras que mudam o sentido da pergunta: se só uma das perguntas as tem, não é hit
+MEANING_TOKENS = {
+    "nao", "sem", "nunca", "exceto", "menos", "not", "no", "without", "except",
+    "maior", "maiores", "menor", "menores", "mais", "acima", "abaixo", "antes", "depois",
+    "max", "maximo", "min", "minimo", "primeiro", "primeiros", "ultimo", "ultimos",
+    "crescente", "decrescente", "top", "bottom", "more", "less", "greater", "lower",
+    "higher", "above", "below", "before", "after", "first", "last", "ascending", "descending",
+}
+
+
+# ===========================
+# Question Normalization
+# ===========================
+def normalize_question(question):
+    """Minúsculas, sem acentos, emojis ou pontuação e com espaços colapsados."""
+    text = unicodedata.normalize("NFKD", question.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def question_tokens(question):
+    return frozenset(
+        token for token in normalize_question(question).split() if token not in STOPWORDS
+    )
+
+
+def digest(value):
+    """Hash estável de qualquer valor serializável em JSON."""
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _changes_meaning(tokens, other, columns=()):
+    """True se as perguntas diferem em um número, negação/comparativo ou nome de coluna."""
+    column_tokens = {
+        token for column in columns for token in normalize_question(str(column).replace("_", " ")).split()
+    }
+    return any(
+        token.isdigit() or token in MEANING_TOKENS or token in column_tokens
+        for token in tokens ^ other
+    )
+
+
+# ===========================
+# Response Cache
+# ===========================
+class ResponseCache:
+    """
+    Cache de respostas do LLM com TTL e evicção LRU.
+
+    A chave exata é (dataset, schema, pergunta normalizada, modo, histórico).
+    Com `fuzzy_threshold` (opt-in), perguntas com os mesmos tokens relevantes
+    (similaridade de Jaccard acima do limiar) no mesmo contexto também são
+    hit, desde que não difiram em números, negações, comparativos ou nomes de
+    coluna (`columns`), que mudam a resposta ("com"/"sem", "top 10"/"top 20").
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 fuzzy_threshold=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.fuzzy_threshold = fuzzy_threshold
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def context_key(dataset_id, schema, mode, history):
+        return digest([dataset_id, schema, mode, history])
+
+    def get(self, context_key, question, fuzzy=True, columns=()):
+        """Retorna a resposta em cache ou None."""
+        now = time.time()
+        exact_key = (context_key, normalize_question(question))
+
+        with self._lock:
+            self._purge_expired(now)
+
+            entry = self._entries.get(exact_key)
+            if entry is not None:
+                self._entries.move_to_end(exact_key)
+                return entry["response"]
+
+            if not fuzzy or self.fuzzy_threshold is None:
+                return None
+
+            tokens = question_tokens(question)
+            if not tokens:
+                return None
+
+            best_key, best_score = None, 0.0
+            for key, candidate in self._entries.items():
+                if key[0] != context_key or _changes_meaning(tokens, candidate["tokens"], columns):
+                    continue
+                union = tokens | candidate["tokens"]
+                score = len(tokens & candidate["tokens"]) / len(union)
+                if score > best_score:
+                    best_key, best_score = key, score
+
+            if best_key is not None and best_score >= self.fuzzy_threshold:
+                self._entries.move_to_end(best_key)
+                return self._entries[best_key]["response"]
+
+        return None
+
+    def put(self, context_key, question, response):
+        key = (context_key, normalize_question(question))
+        with self._lock:
+            self._entries[key] = {
+                "response": response,
+                "tokens": question_tokens(question),
+                "expires_at": time.time() + self.ttl_seconds,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _purge_expired(self, now):
+        expired = [key for key, entry in self._entries.items() if entry["expires_at"] <= now]
+        for key in expired:
+            del self._entries[key]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            fuzzy = os.environ.get(FUZZY_ENV, "") == "1"
+            _cache = ResponseCache(fuzzy_threshold=DEFAULT_FUZZY_THRESHOLD if fuzzy else None)
+        return _cache
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "csv_agent_results")
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 512 * 1024 ** 2
+
+
+def result_key(code, dataset_id, options=None):
+    payload = f"{dataset_id}\n{options!r}\n{code.strip()}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ===========================
+# Result Cache
+# ===========================
+class ResultCache:
+    """
+    Cache em disco do resultado da execução do código gerado.
+
+    A chave é o hash do código limpo + hash do dataset. Cada entrada é um JSON
+    (`raw_output`, `final_answer`) e, se houver, as imagens geradas. A evicção
+    remove as entradas menos usadas recentemente (mtime) ao exceder os limites.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _json_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _image_path(self, key, index):
+        return os.path.join(self.cache_dir, f"{key}.{index}.img")
+
+    def _entry_files(self, key):
+        return [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir)
+            if name.split(".", 1)[0] == key
+        ]
+
+    def get(self, key):
+        json_path = self._json_path(key)
+        try:
+            with open(json_path, encoding="utf-8") as f:
+                result = json.load(f)
+            images = []
+            for index in range(result.get("image_count", 0)):
+                image_path = self._image_path(key, index)
+                with open(image_path, "rb") as f:
+                    images.append(f.read())
+                os.utime(image_path)
+            os.utime(json_path)
+        except (OSError, ValueError):
+            return None
+        result["images"] = images
+        return result
+
+    def put(self, key, raw_output, final_answer=None, images=None, **extra):
+        images = images or []
+        with self._lock:
+            for path in self._entry_files(key):
+                os.remove(path)
+            for index, image_bytes in enumerate(images):
+                _atomic_write(self._image_path(key, index), image_bytes)
+
+            payload = {
+                "raw_output": raw_output,
+                "final_answer": final_answer,
+                "image_count": len(images),
+                **extra,
+            }
+            _atomic_write(self._json_path(key), json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+            self._evict()
+
+    def update(self, key, **fields):
+        """Atualiza campos textuais de uma entrada existente (ex.: `final_answer`)."""
+        json_path = self._json_path(key)
+        with self._lock:
+            try:
+                with open(json_path, encoding="utf-8") as f:
+                    payload = json.load(f)
+            except (OSError, ValueError):
+                return
+            payload.update(fields)
+            _atomic_write(json_path, json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+    def clear(self):
+        with self._lock:
+            for name in os.listdir(self.cache_dir):
+                os.remove(os.path.join(self.cache_dir, name))
+
+    def _evict(self):
+        entries = {}
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith((".json", ".img")):
+                continue
+            key = name.split(".", 1)[0]
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            size, mtime = entries.get(key, (0, 0))
+            entries[key] = (size + stat.st_size, max(mtime, stat.st_mtime))
+
+        total = sum(size for size, _ in entries.values())
+        oldest_first = sorted(entries.items(), key=lambda item: item[1][1])
+        while oldest_first and (len(entries) > self.max_entries or total > self.max_bytes):
+            key, (size, _) = oldest_first.pop(0)
+            for path in self._entry_files(key):
+                os.remove(path)
+            del entries[key]
+            total -= size
+
+
+def _atomic_write(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache()
+        return _cache
@@ -0,0 +1,166 @@
+import io
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNKSIZE = 200_000
+DEFAULT_SAMPLE_SIZE = 10_000
+# Linhas inteiras guardadas durante a leitura para o perfil do dataset (ver `profile.py`)
+DEFAULT_SAMPLE_ROWS = 20_000
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+# ===========================
+# Column Accumulator
+# ===========================
+class _ColumnStats:
+    """
+    Estatísticas incrementais de uma coluna.
+
+    Contagens, nulos, min/max e soma são exatos. Os quantis são aproximados a
+    partir de uma amostra uniforme de tamanho fixo (reservoir com chaves
+    aleatórias), portanto a memória usada não depende do tamanho do arquivo.
+    """
+
+    def __init__(self, sample_size, rng):
+        self.sample_size = sample_size
+        self.rng = rng
+        self.dtype = None
+        self.count = 0
+        self.nulls = 0
+        self.min = None
+        self.max = None
+        self.total = 0.0
+        self._keys = np.empty(0)
+        self._sample = np.empty(0)
+
+    def update(self, series):
+        self.dtype = _merge_dtype(self.dtype, series.dtype)
+        nulls = int(series.isna().sum())
+        self.nulls += nulls
+        self.count += len(series) - nulls
+
+        if not pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+            return
+
+        values = series.dropna().to_numpy(dtype="float64")
+        if values.size == 0:
+            return
+
+        chunk_min, chunk_max = values.min(), values.max()
+        self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+        self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+        self.total += float(values.sum())
+
+        keys = np.concatenate([self._keys, self.rng.random(values.size)])
+        sample = np.concatenate([self._sample, values])
+        if keys.size > self.sample_size:
+            keep = np.argpartition(keys, self.sample_size)[:self.sample_size]
+            keys, sample = keys[keep], sample[keep]
+        self._keys, self._sample = keys, sample
+
+    @property
+    def is_numeric(self):
+        return self.min is not None
+
+    def to_dict(self):
+        stats = {
+            "dtype": str(self.dtype),
+            "count": self.count,
+            "nulls": self.nulls,
+        }
+        if self.is_numeric:
+            stats.update({
+                "min": float(self.min),
+                "max": float(self.max),
+                "mean": self.total / self.count if self.count else None,
+                "quantiles": {
+                    str(q): float(v)
+                    for q, v in zip(QUANTILES, np.quantile(self._sample, QUANTILES))
+                },
+            })
+        return stats
+
+
+def _merge_dtype(current, new):
+    """Combina os dtypes inferidos em chunks diferentes (ex.: int64 + float64 -> float64)."""
+    if current is None or current == new:
+        return new
+    if pd.api.types.is_numeric_dtype(current) and pd.api.types.is_numeric_dtype(new):
+        if pd.api.types.is_bool_dtype(current) or pd.api.types.is_bool_dtype(new):
+            return np.dtype("object")
+        return np.dtype("float64")
+    return np.dtype("object")
+
+
+# ===========================
+# Streaming Read
+# ===========================
+def stream_csv_stats(file_bytes, chunksize=DEFAULT_CHUNKSIZE, sample_size=DEFAULT_SAMPLE_SIZE,
+                     progress_callback=None, seed=0, sample_rows=DEFAULT_SAMPLE_ROWS):
+    """
+    Lê o CSV em chunks e calcula `schema`, `data_info` e estatísticas por
+    coluna em uma única passada, sem materializar o DataFrame completo.
+    `sample` é uma amostra uniforme de até `sample_rows` linhas.
+
+    `progress_callback(fraction)` recebe a fração (0..1) de bytes já lida.
+    """
+    total_bytes = len(file_bytes)
+    file_like_object = io.BytesIO(file_bytes)
+    rng = np.random.default_rng(seed)
+    sample_rng = np.random.default_rng(seed + 1)
+
+    columns = None
+    accumulators = {}
+    total_rows = 0
+    sample, sample_keys = None, None
+
+    for chunk in pd.read_csv(file_like_object, chunksize=chunksize):
+        chunk.columns = chunk.columns.str.strip()
+        if columns is None:
+            columns = list(chunk.columns)
+            accumulators = {col: _ColumnStats(sample_size, rng) for col in columns}
+
+        for col in columns:
+            accumulators[col].update(chunk[col])
+        total_rows += len(chunk)
+        sample, sample_keys = _sample_rows(sample, sample_keys, chunk, sample_rows, sample_rng)
+
+        if progress_callback and total_bytes:
+            progress_callback(min(file_like_object.tell() / total_bytes, 1.0))
+
+    if columns is None:
+        columns = []
+
+    if progress_callback:
+        progress_callback(1.0)
+
+    schema_lite = {col: str(accumulators[col].dtype) for col in columns}
+    data_info = {
+        "shape": (total_rows, len(columns)),
+        "columns": columns,
+        "total_rows": total_rows,
+        "total_columns": len(columns),
+    }
+    column_stats = {col: accumulators[col].to_dict() for col in columns}
+
+    return {
+        "schema": schema_lite,
+        "data_info": data_info,
+        "column_stats": column_stats,
+        "sample": sample,
+    }
+
+
+def _sample_rows(sample, keys, chunk, size, rng):
+    """Reservoir de linhas com chaves aleatórias: mantém as `size` linhas de menor chave."""
+    chunk_keys = rng.random(len(chunk))
+    if len(chunk) > size:
+        keep = np.argpartition(chunk_keys, size)[:size]
+        chunk, chunk_keys = chunk.iloc[keep], chunk_keys[keep]
+    if sample is not None:
+        chunk = pd.concat([sample, chunk], ignore_index=True)
+        chunk_keys = np.concatenate([keys, chunk_keys])
+    if len(chunk) > size:
+        keep = np.argpartition(chunk_keys, size)[:size]
+        chunk, chunk_keys = chunk.iloc[keep], chunk_keys[keep]
+    return chunk.reset_index(drop=True), chunk_keys
@@ -0,0 +1,137 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow é opcional: sem ele o cache em disco fica desativado
+    feather = None
+
+
+# ===========================
+# Columnar Cache (Arrow IPC)
+# ===========================
+def is_available():
+    return feather is not None
+
+
+def cache_path(cache_dir, dataset_id):
+    """Caminho do arquivo Arrow IPC do dataset (ou None se o cache estiver desativado)."""
+    if not cache_dir or not is_available():
+        return None
+    return os.path.join(cache_dir, f"{_file_stem(dataset_id)}.arrow")
+
+
+def _file_stem(dataset_id):
+    # Ids derivados (ex.: `<hash>:opt`) viram nomes de arquivo válidos em qualquer SO
+    return dataset_id.replace(":", "_")
+
+
+def _meta_path(path):
+    return f"{os.path.splitext(path)[0]}.meta.json"
+
+
+def exists(path):
+    # O sidecar de metadados é gravado por último: sem ele o cache está incompleto.
+    return bool(path) and os.path.exists(path) and os.path.exists(_meta_path(path))
+
+
+def write_frame(df, path, schema, data_info, **extra):
+    """
+    Persiste o DataFrame em Arrow IPC sem compressão (permite memory-map) e
+    grava `schema`/`data_info` em um sidecar JSON para reabrir sem ler os dados.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    try:
+        tmp_path = f"{path}.tmp"
+        feather.write_feather(df, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+
+        meta = {"schema": schema, "data_info": data_info, **extra}
+        meta_path = _meta_path(path)
+        with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, default=str)
+        os.replace(f"{meta_path}.tmp", meta_path)
+    except Exception as e:
+        # Ex.: colunas object com tipos mistos que o Arrow não converte
+        print(f"⚠️ Não foi possível gravar o cache colunar: {e}")
+        return False
+
+    print(f"💾 Cache colunar gravado: {os.path.basename(path)}")
+    return True
+
+
+def read_metadata(path):
+    with open(_meta_path(path), encoding="utf-8") as f:
+        meta = json.load(f)
+    meta["data_info"]["shape"] = tuple(meta["data_info"]["shape"])
+    return meta
+
+
+def read_table(path, columns=None):
+    """Tabela Arrow via memory-map (sem cópia), para engines que leem Arrow direto."""
+    return feather.read_table(path, columns=columns, memory_map=True)
+
+
+def read_frame(path, columns=None):
+    """
+    Abre o arquivo via memory-map e converte para pandas. Com `columns`, só as
+    colunas pedidas são lidas do disco.
+    """
+    return read_table(path, columns=columns).to_pandas(split_blocks=True)
+
+
+def read_sample(path, rows, seed=0):
+    """Amostra uniforme de até `rows` linhas, lida via memory-map sem carregar o arquivo inteiro."""
+    table = read_table(path)
+    if table.num_rows > rows:
+        indices = np.sort(np.random.default_rng(seed).choice(table.num_rows, rows, replace=False))
+        table = table.take(indices)
+    return table.to_pandas()
+
+
+def read_columns(columns, path=None, csv_path=None):
+    """
+    Lê só as `columns` sem materializar o dataset: do cache colunar ou, enquanto
+    ele não existe, da cópia do CSV em disco. None se nenhum dos dois existir.
+    """
+    if exists(path):
+        return read_frame(path, columns=columns)
+    if csv_path and os.path.exists(csv_path):
+        wanted = set(columns)
+        try:
+            df = pd.read_csv(csv_path, usecols=lambda col: col.strip() in wanted)
+        except FileNotFoundError:
+            # A cópia é apagada assim que o cache colunar é gravado
+            return read_frame(path, columns=columns) if exists(path) else None
+        df.columns = df.columns.str.strip()
+        return df[list(columns)]
+    return None
+
+
+# ===========================
+# CSV Spool
+# ===========================
+def spool_path(cache_dir, dataset_id):
+    """Cópia do CSV em disco usada pela ingestão em chunks até o cache colunar existir."""
+    if not cache_dir:
+        return None
+    return os.path.join(cache_dir, f"{_file_stem(dataset_id)}.csv")
+
+
+def write_spool(file_bytes, path):
+    """Grava os bytes do upload em `path`; retorna o caminho, ou None se não for possível."""
+    if not path:
+        return None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(file_bytes)
+        os.replace(f"{path}.tmp", path)
+    except OSError as e:
+        print(f"⚠️ Não foi possível gravar a cópia do CSV em disco: {e}")
+        return None
+    return path
@@ -0,0 +1,176 @@
+import hashlib
+import itertools
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 8
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3
+
+
+# ===========================
+# Dataset Hash
+# ===========================
+def hash_bytes(file_bytes):
+    """Retorna o hash de conteúdo (sha256) usado como identificador do dataset."""
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def frame_nbytes(df):
+    """Memória ocupada pelo DataFrame (inclui strings de colunas object)."""
+    if df is None:
+        return 0
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+# ===========================
+# Dataset Store
+# ===========================
+class DatasetStore:
+    """
+    Cache LRU de datasets já carregados, compartilhado entre turnos e sessões.
+
+    Cada entrada é indexada pelo hash do conteúdo do upload e guarda o
+    DataFrame parseado, o `schema` e o `data_info`. A evicção acontece por
+    número de entradas e por memória total ocupada.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._eviction_listeners = []
+        # Versão de cada entrada: muda quando o DataFrame é substituído (cache dos workers do sandbox)
+        self._versions = itertools.count(1)
+
+    def __contains__(self, dataset_id):
+        with self._lock:
+            return dataset_id in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def total_bytes(self):
+        with self._lock:
+            return sum(entry["nbytes"] for entry in self._entries.values())
+
+    def get(self, dataset_id):
+        """Retorna a entrada do dataset (marcando como usada) ou None."""
+        with self._lock:
+            entry = self._entries.get(dataset_id)
+            if entry is not None:
+                self._entries.move_to_end(dataset_id)
+            return entry
+
+    def require(self, dataset_id):
+        """Como `get`, mas levanta KeyError se o dataset não está (ou não está mais) no store."""
+        entry = self.get(dataset_id)
+        if entry is None:
+            raise KeyError(f"Dataset '{dataset_id}' não está carregado; envie o arquivo novamente")
+        return entry
+
+    def get_dataframe(self, dataset_id):
+        """
+        Retorna o DataFrame do dataset. Entradas registradas só com metadados
+        (ingestão em chunks) são materializadas aqui, na primeira vez.
+        """
+        entry = self.require(dataset_id)
+
+        if entry["df"] is None:
+            with entry["lock"]:
+                if entry["df"] is None:
+                    print(f"📥 Materializando dataset: {dataset_id[:12]}")
+                    entry["df"] = entry["loader"]()
+                    entry["loader"] = None
+                    with self._lock:
+                        entry["nbytes"] = frame_nbytes(entry["df"])
+                        self._evict()
+        return entry["df"]
+
+    def put(self, dataset_id, df, schema, data_info, loader=None, nbytes=None, **extra):
+        """
+        Registra um dataset. `df` pode ser None desde que `loader` seja
+        informado; nesse caso o DataFrame só é lido quando necessário.
+        `nbytes` é a memória que o loader mantém ocupada até a materialização
+        (ex.: os bytes do upload), contada na evicção.
+        """
+        if df is None and loader is None:
+            raise ValueError("Informe o DataFrame ou um loader para o dataset")
+
+        entry = {
+            "df": df,
+            "loader": loader,
+            "schema": schema,
+            "data_info": data_info,
+            "nbytes": frame_nbytes(df) if nbytes is None else nbytes,
+            "lock": threading.Lock(),
+            "version": next(self._versions),
+            **extra,
+        }
+        with self._lock:
+            self._entries[dataset_id] = entry
+            self._entries.move_to_end(dataset_id)
+            self._evict()
+        return entry
+
+    def update(self, dataset_id, **fields):
+        """Atualiza campos de uma entrada existente (recalcula a memória se o DataFrame mudar)."""
+        with self._lock:
+            entry = self._entries[dataset_id]
+            entry.update(fields)
+            if "df" in fields:
+                entry["version"] = next(self._versions)
+                entry["nbytes"] = frame_nbytes(entry["df"])
+                self._evict()
+            return entry
+
+    def add_eviction_listener(self, listener):
+        """`listener(dataset_id)` é chamado sempre que um dataset sai do store."""
+        self._eviction_listeners.append(listener)
+
+    def discard(self, dataset_id):
+        with self._lock:
+            entry = self._entries.pop(dataset_id, None)
+        if entry is not None:
+            self._notify_eviction(dataset_id)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            dataset_ids = list(self._entries)
+            self._entries.clear()
+        for dataset_id in dataset_ids:
+            self._notify_eviction(dataset_id)
+
+    def _evict(self):
+        # Sempre mantém a entrada mais recente, mesmo que sozinha exceda o limite.
+        total = sum(entry["nbytes"] for entry in self._entries.values())
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or total > self.max_bytes
+        ):
+            dataset_id, entry = self._entries.popitem(last=False)
+            total -= entry["nbytes"]
+            print(f"🧹 Dataset removido do cache: {dataset_id[:12]}")
+            self._notify_eviction(dataset_id)
+
+    def _notify_eviction(self, dataset_id):
+        for listener in self._eviction_listeners:
+            try:
+                listener(dataset_id)
+            except Exception as e:
+                print(f"⚠️ Erro ao liberar dataset {dataset_id[:12]}: {e}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_dataset_store():
+    """Instância única do store no processo (compartilhada entre sessões)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DatasetStore()
+        return _store
@@ -0,0 +1,100 @@
+import warnings
+import pandas as pd
+
+from src.data.dataset_store import frame_nbytes
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = "string[pyarrow]"
+except ImportError:
+    STRING_DTYPE = None
+
+CATEGORY_MAX_RATIO = 0.5
+CATEGORY_MAX_UNIQUE = 10_000
+DATETIME_MIN_MATCH = 0.9
+DATETIME_SAMPLE_SIZE = 1_000
+
+
+# ===========================
+# Dtype Optimization
+# ===========================
+def optimize_dtypes(df):
+    """
+    Reduz a memória do DataFrame:
+    - inteiros/floats com downcast para o menor tipo que comporta os valores
+    - colunas texto com datas viram datetime64
+    - colunas texto de baixa cardinalidade viram `category`
+    - demais colunas texto viram strings do pyarrow (quando disponível)
+
+    Retorna o DataFrame otimizado e um relatório com a memória antes/depois.
+    """
+    before_bytes = frame_nbytes(df)
+    optimized = {}
+    conversions = {}
+
+    for col in df.columns:
+        series = df[col]
+        new_series = _optimize_series(series)
+        if new_series is not series and new_series.dtype != series.dtype:
+            optimized[col] = new_series
+            conversions[col] = f"{series.dtype} -> {new_series.dtype}"
+
+    if optimized:
+        df = df.copy(deep=False)
+        for col, new_series in optimized.items():
+            df[col] = new_series
+
+    after_bytes = frame_nbytes(df)
+    report = {
+        "before_bytes": before_bytes,
+        "after_bytes": after_bytes,
+        "saved_pct": round(100 * (1 - after_bytes / before_bytes), 1) if before_bytes else 0.0,
+        "conversions": conversions,
+    }
+    print(f"🪶 Dtypes otimizados: {before_bytes / 1024**2:.1f} MB -> {after_bytes / 1024**2:.1f} MB")
+    return df, report
+
+
+def _optimize_series(series):
+    dtype = series.dtype
+
+    if pd.api.types.is_bool_dtype(dtype):
+        return series
+    if pd.api.types.is_integer_dtype(dtype):
+        return pd.to_numeric(series, downcast="integer")
+    if pd.api.types.is_float_dtype(dtype):
+        return pd.to_numeric(series, downcast="float")
+    # Texto vem como `object` (pandas 2) ou `str`/`string` (pandas 3, pyarrow)
+    if isinstance(dtype, pd.CategoricalDtype):
+        return series
+    is_object = pd.api.types.is_object_dtype(dtype)
+    if not (is_object or pd.api.types.is_string_dtype(dtype)):
+        return series
+
+    non_null = series.dropna()
+    if non_null.empty:
+        return series
+
+    if _looks_like_datetime(non_null):
+        parsed = pd.to_datetime(series, errors="coerce", format="mixed")
+        if parsed.notna().sum() >= DATETIME_MIN_MATCH * len(non_null):
+            return parsed
+
+    n_unique = non_null.nunique()
+    if n_unique <= CATEGORY_MAX_UNIQUE and n_unique / len(series) <= CATEGORY_MAX_RATIO:
+        return series.astype("category")
+
+    if is_object and STRING_DTYPE and non_null.map(type).eq(str).all():
+        return series.astype(STRING_DTYPE)
+
+    return series
+
+
+def _looks_like_datetime(non_null):
+    sample = non_null.head(DATETIME_SAMPLE_SIZE)
+    if not sample.map(type).eq(str).all():
+        return False
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        parsed = pd.to_datetime(sample, errors="coerce", format="mixed")
+    return parsed.notna().mean() >= DATETIME_MIN_MATCH
@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+
+PROFILE_QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+HISTOGRAM_BINS = 30
+SUMMARY_MAX_COLUMNS = 30
+SUMMARY_TOP_CORRELATIONS = 5
+
+
+# ===========================
+# Dataset Profile
+# ===========================
+class DatasetProfile:
+    """
+    Agregados calculados uma única vez por dataset e reutilizados em todas as
+    perguntas. Fica disponível no código gerado como `profile`:
+
+    - `profile.describe`: `df.describe()` das colunas numéricas
+    - `profile.corr`: matriz de correlação (Pearson) das colunas numéricas
+    - `profile.quantiles`: quantis 1%, 5%, 25%, 50%, 75%, 95% e 99%
+    - `profile.null_counts` / `profile.cardinality`: nulos e valores distintos por coluna
+    - `profile.histograms[col]`: tupla `(counts, bin_edges)` com 30 bins
+
+    `sample_rows` é o tamanho da amostra quando o perfil foi estimado sem
+    ler o dataset inteiro (None quando é exato).
+    """
+
+    def __init__(self, describe, corr, quantiles, null_counts, cardinality, histograms, total_rows,
+                 sample_rows=None):
+        self.describe = describe
+        self.corr = corr
+        self.quantiles = quantiles
+        self.null_counts = null_counts
+        self.cardinality = cardinality
+        self.histograms = histograms
+        self.total_rows = total_rows
+        self.sample_rows = sample_rows
+
+    @property
+    def numeric_columns(self):
+        return list(self.describe.columns)
+
+    def ranges(self):
+        """Mínimo, máximo e amplitude de cada coluna numérica."""
+        ranges_df = self.describe.loc[["min", "max"]].T
+        ranges_df["amplitude"] = ranges_df["max"] - ranges_df["min"]
+        return ranges_df
+
+    def top_correlations(self, n=SUMMARY_TOP_CORRELATIONS):
+        """Pares de colunas com maior correlação absoluta."""
+        if self.corr.shape[0] < 2:
+            return []
+        mask = np.triu(np.ones(self.corr.shape, dtype=bool), k=1)
+        pairs = self.corr.where(mask).stack()
+        pairs = pairs.reindex(pairs.abs().sort_values(ascending=False).index)
+        return [(a, b, float(r)) for (a, b), r in pairs.head(n).items()]
+
+    def summary_text(self, max_columns=SUMMARY_MAX_COLUMNS, columns=None):
+        """Resumo compacto para os prompts (opcionalmente só das `columns` indicadas)."""
+        columns = list(self.cardinality.index) if columns is None else list(columns)
+        numeric = set(self.numeric_columns)
+
+        lines = []
+        for col in columns[:max_columns]:
+            if col not in self.cardinality.index:
+                continue
+            if col in numeric:
+                stats = self.describe[col]
+                lines.append(
+                    f"- {col}: min={_fmt(stats['min'])}, max={_fmt(stats['max'])}, "
+                    f"média={_fmt(stats['mean'])}, mediana={_fmt(stats['50%'])}, "
+                    f"nulos={int(self.null_counts.get(col, 0))}"
+                )
+            else:
+                lines.append(
+                    f"- {col}: {int(self.cardinality[col])} valores distintos, "
+                    f"nulos={int(self.null_counts.get(col, 0))}"
+                )
+
+        hidden = len(self.cardinality) - len(lines)
+        if hidden > 0:
+            lines.append(f"- ... (+{hidden} colunas)")
+
+        correlations = self.top_correlations()
+        if correlations:
+            pairs = ", ".join(f"{a}~{b} ({r:+.2f})" for a, b, r in correlations)
+            lines.append(f"Maiores correlações: {pairs}")
+        if self.sample_rows:
+            lines.append(f"(quantis, correlações e valores distintos estimados em {self.sample_rows:,} linhas)")
+
+        return "\n".join(lines)
+
+
+def _fmt(value):
+    if pd.isna(value):
+        return "NA"
+    return f"{value:.4g}"
+
+
+def build_profile(df, bins=HISTOGRAM_BINS, column_stats=None, total_rows=None):
+    """
+    Calcula o perfil. Sem `total_rows`, `df` é o dataset inteiro e os
+    agregados são exatos. Com `total_rows` maior que `df`, `df` é uma amostra
+    uniforme: contagens, nulos, mínimo, máximo e média vêm de `column_stats`
+    (exatos, da ingestão em uma passada) quando disponíveis; o resto é
+    estimado na amostra, com as contagens escaladas para o total de linhas.
+    """
+    numeric = df.select_dtypes(include=["number"])
+    total_rows = len(df) if total_rows is None else total_rows
+    sampled = len(df) < total_rows
+    scale = total_rows / len(df) if sampled and len(df) else 1.0
+    column_stats = column_stats or {}
+
+    describe = numeric.describe()
+    null_counts = df.isna().sum()
+    if sampled:
+        null_counts = (null_counts * scale).round().astype("int64")
+        describe.loc["count"] = (describe.loc["count"] * scale).round()
+        for col in df.columns:
+            stats = column_stats.get(col)
+            if not stats:
+                continue
+            null_counts[col] = stats["nulls"]
+            if col in describe.columns and stats.get("min") is not None:
+                describe.loc[["count", "mean", "min", "max"], col] = [
+                    stats["count"], stats["mean"], stats["min"], stats["max"]
+                ]
+
+    histograms = {}
+    for col in numeric.columns:
+        values = numeric[col].to_numpy(dtype="float64", na_value=np.nan)
+        values = values[np.isfinite(values)]
+        if not values.size:
+            continue
+        if not sampled:
+            histograms[col] = np.histogram(values, bins=bins)
+            continue
+        stats = column_stats.get(col) or {}
+        value_range = (stats["min"], stats["max"]) if stats.get("min") is not None else None
+        counts, edges = np.histogram(np.clip(values, *value_range) if value_range else values,
+                                     bins=bins, range=value_range)
+        non_null = stats.get("count") or values.size * scale
+        histograms[col] = (np.round(counts * non_null / values.size).astype("int64"), edges)
+
+    profile = DatasetProfile(
+        describe=describe,
+        corr=numeric.corr(),
+        quantiles=numeric.quantile(list(PROFILE_QUANTILES)),
+        null_counts=null_counts,
+        cardinality=df.nunique(dropna=True),
+        histograms=histograms,
+        total_rows=total_rows,
+        sample_rows=len(df) if sampled else None,
+    )
+    origin = f"amostra de {len(df):,} linhas" if sampled else "dataset completo"
+    print(f"📐 Perfil calculado ({origin}): {len(numeric.columns)} colunas numéricas")
+    return profile
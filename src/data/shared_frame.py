@@ -0,0 +1,166 @@
+import atexit
+import sys
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from src.data.dataset_store import get_dataset_store
+
+
+# ===========================
+# Shared Memory DataFrame
+# ===========================
+def publish_frame(df):
+    """
+    Copia as colunas numéricas com dtype NumPy para blocos de
+    `multiprocessing.shared_memory`, uma única vez por dataset.
+
+    Retorna `(descriptor, blocks)`: o descriptor é pequeno e serializável
+    (nome do bloco, dtype e tamanho de cada coluna) e é o que vai para os
+    workers; `blocks` precisa ser mantido vivo pelo processo que publicou.
+    As demais colunas são enviadas à parte (ver `with_rest`).
+    """
+    columns = []
+    blocks = []
+    rest_columns = []
+
+    for position, col in enumerate(df.columns):
+        series = df.iloc[:, position]
+        dtype = series.dtype
+        if not isinstance(dtype, np.dtype) or dtype.kind not in "iufb":
+            rest_columns.append(position)
+            continue
+
+        values = series.to_numpy()
+        block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+        blocks.append(block)
+        columns.append({
+            "position": position,
+            "name": col,
+            "shm_name": block.name,
+            "dtype": values.dtype.str,
+            "length": len(values),
+        })
+
+    descriptor = {
+        "columns": columns,
+        "column_order": list(df.columns),
+        "index": df.index if not isinstance(df.index, pd.RangeIndex) else None,
+        "length": len(df),
+        "rest_positions": rest_columns,
+    }
+    shared_bytes = sum(block.size for block in blocks)
+    print(f"🔗 {len(columns)} colunas publicadas em memória compartilhada ({shared_bytes / 1024**2:.1f} MB)")
+    return descriptor, blocks
+
+
+def with_rest(descriptor, df):
+    """Anexa ao descriptor as colunas não numéricas, que seguem serializadas."""
+    positions = descriptor["rest_positions"]
+    return {**descriptor, "rest": df.iloc[:, positions] if positions else None}
+
+
+def attach_frame(descriptor):
+    """
+    Reconstrói o DataFrame a partir do descriptor, com as colunas numéricas
+    como views somente leitura sobre a memória compartilhada (sem cópia).
+
+    Retorna `(df, blocks)`; os blocos devem ficar abertos enquanto o
+    DataFrame estiver em uso. Quem anexa não remove os blocos: isso cabe ao
+    processo que os publicou (ver `_attach_block`).
+    """
+    blocks = []
+    data = {}
+
+    for column in descriptor["columns"]:
+        block = _attach_block(column["shm_name"])
+        blocks.append(block)
+        values = np.ndarray((column["length"],), dtype=np.dtype(column["dtype"]), buffer=block.buf)
+        values.flags.writeable = False
+        data[column["position"]] = values
+
+    rest = descriptor.get("rest")
+    if rest is not None:
+        for rest_position, position in enumerate(descriptor["rest_positions"]):
+            data[position] = rest.iloc[:, rest_position]
+
+    index = descriptor["index"]
+    if index is None:
+        index = pd.RangeIndex(descriptor["length"])
+
+    ordered = [data[position] for position in range(len(descriptor["column_order"]))]
+    # Um bloco por coluna evita a consolidação (cópia) dos arrays compartilhados
+    df = pd.concat(
+        [pd.Series(values, index=index, copy=False) for values in ordered],
+        axis=1,
+        keys=range(len(ordered)),
+        copy=False,
+    )
+    df.columns = descriptor["column_order"]
+    return df, blocks
+
+
+def _attach_block(name):
+    """
+    Anexa um bloco existente sem assumir a posse dele. No Python 3.13+ o
+    bloco não é registrado no resource tracker (`track=False`). Antes disso o
+    registro é inevitável, mas os workers do sandbox são filhos do processo
+    que publicou e compartilham o tracker dele: o registro repetido não tem
+    efeito, e desfazê-lo aqui apagaria o registro do criador (KeyError no
+    `unlink` e blocos vazados se o processo principal cair).
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+# ===========================
+# Shared Frame Registry
+# ===========================
+class SharedFrameRegistry:
+    """Datasets publicados pelo processo principal, indexados pelo hash do dataset."""
+
+    def __init__(self):
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def publish(self, dataset_id, df):
+        """Publica o dataset (se ainda não publicado) e retorna o descriptor completo."""
+        with self._lock:
+            if dataset_id not in self._frames:
+                self._frames[dataset_id] = publish_frame(df)
+            return with_rest(self._frames[dataset_id][0], df)
+
+    def get(self, dataset_id):
+        with self._lock:
+            published = self._frames.get(dataset_id)
+            return published[0] if published else None
+
+    def release(self, dataset_id):
+        with self._lock:
+            published = self._frames.pop(dataset_id, None)
+        if published:
+            for block in published[1]:
+                block.close()
+                block.unlink()
+
+    def release_all(self):
+        for dataset_id in list(self._frames):
+            self.release(dataset_id)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_shared_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = SharedFrameRegistry()
+            get_dataset_store().add_eviction_listener(_registry.release)
+            atexit.register(_registry.release_all)
+        return _registry
@@ -0,0 +1,234 @@
+import os
+import re
+from collections.abc import Mapping
+
+import pandas as pd
+
+from src.data import columnar_cache
+from src.data.dataset_store import get_dataset_store
+
+try:
+    import duckdb
+except ImportError:  # duckdb é opcional; sem ele joins/concats usam pandas com projeção de colunas
+    duckdb = None
+
+JOIN_TYPES = {"inner": "INNER", "left": "LEFT", "right": "RIGHT", "outer": "FULL OUTER"}
+
+
+# ===========================
+# Table Names
+# ===========================
+def table_name(filename, taken=()):
+    """Nome de tabela a partir do arquivo: `Vendas 2024.csv` → `vendas_2024`."""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    name = re.sub(r"\W+", "_", stem.lower()).strip("_") or "tabela"
+    if name[0].isdigit():
+        name = f"t_{name}"
+    candidate, suffix = name, 2
+    while candidate in taken:
+        candidate = f"{name}_{suffix}"
+        suffix += 1
+    return candidate
+
+
+def table_sources(tables):
+    """
+    Descrição serializável das tabelas da sessão (`{nome: dataset_id}` →
+    `{nome: {dataset_id, columnar_path, schema, total_rows}}`), só com as que
+    estão no store.
+    """
+    store = get_dataset_store()
+    sources = {}
+    for name, dataset_id in (tables or {}).items():
+        entry = store.get(dataset_id)
+        if entry is None:
+            continue
+        sources[name] = {
+            "dataset_id": dataset_id,
+            "columnar_path": entry.get("columnar_path"),
+            "schema": entry["schema"],
+            "total_rows": entry["data_info"].get("total_rows"),
+        }
+    return sources
+
+
+def store_loader(source, columns=None):
+    """Carrega uma tabela no processo principal: cache colunar para subconjuntos de colunas, senão o store."""
+    path = source.get("columnar_path")
+    if columns is not None and columnar_cache.exists(path):
+        return columnar_cache.read_frame(path, columns=columns)
+    df = get_dataset_store().get_dataframe(source["dataset_id"])
+    return df if columns is None else df[columns]
+
+
+def columnar_loader(source, columns=None):
+    """Carrega uma tabela a partir do cache colunar (usado nos workers do sandbox)."""
+    path = source.get("columnar_path")
+    if not columnar_cache.exists(path):
+        raise KeyError(
+            f"Tabela '{source['dataset_id'][:12]}' indisponível no sandbox de processos (sem cache colunar)"
+        )
+    return columnar_cache.read_frame(path, columns=columns)
+
+
+# ===========================
+# Lazy Tables
+# ===========================
+class LazyTables(Mapping):
+    """
+    Tabelas da sessão, expostas ao código gerado como `tables`:
+
+    - `tables["nome"]`: DataFrame completo, carregado só no primeiro acesso
+    - `tables.load("nome", ["col_a", "col_b"])`: apenas as colunas pedidas
+    - `tables.join("a", "b", on="id", how="inner", columns=[...])`: junção
+    - `tables.concat(["a", "b"], columns=[...])`: empilhamento por nome de coluna
+    - `tables.sql("SELECT ... FROM a JOIN b ...")`: SQL arbitrário (requer duckdb)
+
+    Joins e concats rodam no duckdb quando disponível, lendo os arquivos Arrow
+    via memory-map; sem duckdb, só as colunas necessárias são carregadas antes
+    do merge do pandas.
+    """
+
+    def __init__(self, sources, loader=store_loader):
+        self.sources = dict(sources)
+        self._loader = loader
+        self._frames = {}
+        self._connection = None
+        self._registered = set()
+
+    def __getitem__(self, name):
+        if name not in self.sources:
+            raise KeyError(f"Tabela desconhecida: {name}. Disponíveis: {', '.join(self.sources)}")
+        if name not in self._frames:
+            self._frames[name] = self._loader(self.sources[name])
+        return self._frames[name]
+
+    def __iter__(self):
+        return iter(self.sources)
+
+    def __len__(self):
+        return len(self.sources)
+
+    def __repr__(self):
+        return f"<tables: {', '.join(self.sources)}>"
+
+    def schema(self, name):
+        return self.sources[name]["schema"]
+
+    def load(self, name, columns=None):
+        if columns is None:
+            return self[name]
+        columns = [columns] if isinstance(columns, str) else list(columns)
+        if name in self._frames:
+            return self._frames[name][columns]
+        return self._loader(self.sources[name], columns)
+
+    def join(self, left, right, on=None, how="inner", left_on=None, right_on=None,
+             columns=None, suffixes=("_x", "_y")):
+        """Junta duas tabelas; `columns` limita as colunas lidas (além das chaves)."""
+        left_on = _as_list(left_on or on)
+        right_on = _as_list(right_on or on)
+        if not left_on or len(left_on) != len(right_on):
+            raise ValueError("Informe `on` ou `left_on`/`right_on` com o mesmo número de colunas")
+        if how not in JOIN_TYPES:
+            raise ValueError(f"Tipo de junção não suportado: {how}")
+
+        left_cols = self._needed(left, left_on, columns)
+        right_cols = self._needed(right, right_on, columns)
+        # Chaves com o mesmo nome aparecem uma vez só, como no `merge` do pandas
+        shared_keys = [a for a, b in zip(left_on, right_on) if a == b]
+        right_cols = [col for col in right_cols if col not in shared_keys]
+
+        if duckdb is None:
+            return self.load(left, left_cols).merge(
+                self.load(right, right_cols + shared_keys), how=how,
+                left_on=left_on, right_on=right_on, suffixes=suffixes,
+            )
+
+        overlap = set(left_cols) & set(right_cols)
+        select = [
+            f'l.{_quote(col)} AS {_quote(col + suffixes[0] if col in overlap else col)}' for col in left_cols
+        ] + [
+            f'r.{_quote(col)} AS {_quote(col + suffixes[1] if col in overlap else col)}' for col in right_cols
+        ]
+        if how in ("right", "outer"):
+            # Em joins à direita/externos a chave compartilhada pode vir só da tabela da direita
+            select = [
+                f"COALESCE(l.{_quote(col)}, r.{_quote(col)}) AS {_quote(col)}" if col in shared_keys else item
+                for col, item in zip(left_cols, select)
+            ] + select[len(left_cols):]
+        condition = " AND ".join(f"l.{_quote(a)} = r.{_quote(b)}" for a, b in zip(left_on, right_on))
+        query = (
+            f"SELECT {', '.join(select)} FROM {self._relation(left)} AS l "
+            f"{JOIN_TYPES[how]} JOIN {self._relation(right)} AS r ON {condition}"
+        )
+        return self._db().execute(query).df()
+
+    def concat(self, names, columns=None):
+        """Empilha tabelas alinhando colunas pelo nome (colunas ausentes viram nulos)."""
+        names = list(names)
+        if duckdb is None:
+            return pd.concat([self.load(name, self._present(name, columns)) for name in names], ignore_index=True)
+
+        parts = []
+        for name in names:
+            present = self._present(name, columns)
+            projection = "*" if present is None else ", ".join(_quote(col) for col in present)
+            parts.append(f"SELECT {projection} FROM {self._relation(name)}")
+        return self._db().execute(" UNION ALL BY NAME ".join(parts)).df()
+
+    def sql(self, query):
+        """Executa SQL no duckdb com todas as tabelas registradas pelo nome."""
+        if duckdb is None:
+            raise RuntimeError("`tables.sql` requer o pacote duckdb; use `tables.join`/`tables.concat`")
+        for name in self.sources:
+            self._relation(name)
+        return self._db().execute(query).df()
+
+    def _needed(self, name, keys, columns):
+        schema = self.schema(name)
+        if columns is None:
+            return list(schema)
+        wanted = list(keys) + [col for col in columns if col in schema and col not in keys]
+        return wanted
+
+    def _present(self, name, columns):
+        if columns is None:
+            return None
+        return [col for col in columns if col in self.schema(name)]
+
+    def close(self):
+        """Fecha a conexão duckdb aberta por joins/concats/SQL (se houver)."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+            self._registered.clear()
+
+    def _db(self):
+        if self._connection is None:
+            self._connection = duckdb.connect()
+        return self._connection
+
+    def _relation(self, name):
+        """Registra a tabela no duckdb (Arrow via memory-map se houver cache colunar)."""
+        if name not in self.sources:
+            raise KeyError(f"Tabela desconhecida: {name}")
+        if name not in self._registered:
+            path = self.sources[name].get("columnar_path")
+            if name not in self._frames and columnar_cache.exists(path):
+                data = columnar_cache.read_table(path)
+            else:
+                data = self[name]
+            self._db().register(name, data)
+            self._registered.add(name)
+        return _quote(name)
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def _quote(identifier):
+    return '"' + str(identifier).replace('"', '""') + '"'
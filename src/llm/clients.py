@@ -0,0 +1,79 @@
+import asyncio
+import hashlib
+import os
+import threading
+import weakref
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+# Permite apontar para um servidor compatível (ex.: stub HTTP local nos testes)
+BASE_URL_ENV = "OPENAI_BASE_URL"
+
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+
+def _pool_key(api_key, base_url):
+    # A chave da API nunca é guardada em texto puro como chave do pool
+    return hashlib.sha256(f"{api_key}|{base_url or ''}".encode("utf-8")).hexdigest()
+
+
+def _base_url(base_url):
+    return base_url or os.environ.get(BASE_URL_ENV) or None
+
+
+# ===========================
+# Client Pool
+# ===========================
+_clients = {}
+_async_clients = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def get_client(api_key, base_url=None):
+    """
+    Cliente `OpenAI` reutilizado por chave de API (e base_url). O pool HTTP
+    mantém conexões keep-alive, evitando um novo handshake TLS a cada pergunta.
+    """
+    base_url = _base_url(base_url)
+    key = _pool_key(api_key, base_url)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = OpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT),
+            )
+            _clients[key] = client
+        return client
+
+
+def get_async_client(api_key, base_url=None):
+    """
+    Cliente `AsyncOpenAI` reutilizado por chave de API. O pool é separado por
+    event loop, pois conexões httpx assíncronas não podem trocar de loop.
+    """
+    base_url = _base_url(base_url)
+    key = _pool_key(api_key, base_url)
+    loop = asyncio.get_running_loop()
+    with _lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        client = loop_clients.get(key)
+        if client is None:
+            client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT),
+            )
+            loop_clients[key] = client
+        return client
+
+
+def close_clients():
+    """Fecha os clientes síncronos do pool (ex.: ao encerrar o processo)."""
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
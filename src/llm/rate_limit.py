@@ -0,0 +1,110 @@
+import asyncio
+import random
+import time
+
+from openai import APIConnectionError, APIStatusError, RateLimitError
+
+MAX_RETRIES = 5
+BASE_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class _Bucket:
+    """Token bucket: `capacity` unidades por minuto, reabastecido continuamente."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            self.available -= amount
+            return 0.0
+        return (amount - self.available) * 60 / self.capacity
+
+
+# ===========================
+# Rate Limiter
+# ===========================
+class RateLimiter:
+    """
+    Limita chamadas assíncronas ao LLM por concorrência, requisições por
+    minuto (`rpm`) e tokens por minuto (`tpm`, estimados pelo chamador).
+    Respostas 429/5xx são repetidas com backoff exponencial, respeitando o
+    `Retry-After` do servidor; enquanto um 429 está em espera, nenhuma outra
+    chamada é liberada.
+
+    Uso: `await limiter.call(lambda: client.chat.completions.create(...), tokens=n)`.
+    """
+
+    def __init__(self, max_concurrency=4, rpm=None, tpm=None, max_retries=MAX_RETRIES):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self._requests = _Bucket(rpm) if rpm else None
+        self._tokens = _Bucket(tpm) if tpm else None
+        self._semaphore = None
+        self._lock = None
+        self._paused_until = 0.0
+        self.stats = {"calls": 0, "retries": 0, "throttled_seconds": 0.0}
+
+    def _primitives(self):
+        # Criados sob demanda para pertencerem ao event loop que os usa
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._lock = asyncio.Lock()
+        return self._semaphore, self._lock
+
+    async def _acquire(self, tokens):
+        _, lock = self._primitives()
+        async with lock:
+            while True:
+                wait = max(0.0, self._paused_until - time.monotonic())
+                if not wait and self._requests is not None:
+                    wait = self._requests.wait_time(1)
+                if not wait and self._tokens is not None:
+                    wait = self._tokens.wait_time(tokens)
+                if not wait:
+                    return
+                self.stats["throttled_seconds"] += wait
+                await asyncio.sleep(wait)
+
+    async def call(self, request, tokens=0):
+        """Executa `request()` (corrotina) dentro dos limites, repetindo em 429/5xx."""
+        semaphore, _ = self._primitives()
+        attempt = 0
+        async with semaphore:
+            while True:
+                await self._acquire(tokens)
+                self.stats["calls"] += 1
+                try:
+                    return await request()
+                except (RateLimitError, APIStatusError, APIConnectionError) as e:
+                    status = getattr(e, "status_code", None)
+                    retryable = isinstance(e, APIConnectionError) or status in RETRYABLE_STATUS
+                    if not retryable or attempt >= self.max_retries:
+                        raise
+                    delay = _retry_after(e) or min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** attempt)
+                    delay *= 1 + random.random() * 0.1
+                    if status == 429:
+                        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                    attempt += 1
+                    self.stats["retries"] += 1
+                    print(f"⏳ LLM respondeu {status or 'erro de conexão'}; nova tentativa em {delay:.1f}s")
+                    await asyncio.sleep(delay)
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
@@ -0,0 +1,287 @@
+import os
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from src.prompt.prompt_builder import count_tokens
+
+SUMMARY_ENV = "CSV_AGENT_MEMORY_SUMMARY"
+# Orçamento (tokens) do histórico enviado ao LLM: resumo + fatos + turnos recentes
+DEFAULT_HISTORY_BUDGET = 900
+DEFAULT_SUMMARY_BUDGET = 250
+# Turnos mantidos compactados na íntegra; os mais antigos vão para o resumo
+RECENT_TURNS = 3
+ANSWER_TOKENS = 120
+CODE_TOKENS = 300
+MAX_RESULTS = 6
+MAX_COLUMNS = 12
+
+# Um único thread de resumo para o processo: o trabalho é curto e sequencial por sessão
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-summary")
+
+
+# ===========================
+# Compaction
+# ===========================
+def clip(text, max_tokens):
+    """Corta o texto para caber em `max_tokens`, preferindo terminar em fim de frase."""
+    text = (text or "").strip()
+    if count_tokens(text) <= max_tokens:
+        return text
+    cut = text[: max_tokens * 4]
+    sentence_end = max(cut.rfind(". "), cut.rfind("\n"))
+    if sentence_end > len(cut) // 2:
+        cut = cut[: sentence_end + 1]
+    return cut.rstrip() + " …"
+
+
+def compact_code(code):
+    """Código sem comentários de linha inteira e linhas em branco, limitado a `CODE_TOKENS`."""
+    lines = [
+        line.rstrip() for line in (code or "").splitlines()
+        if line.strip() and not line.strip().startswith("#")
+    ]
+    return clip("\n".join(lines), CODE_TOKENS)
+
+
+def columns_in(code, schema):
+    """Colunas do schema citadas como string literal no código."""
+    if not code or not schema:
+        return []
+    quoted = set(re.findall(r"""['"]([^'"\n]+)['"]""", code))
+    return [col for col in schema if col in quoted]
+
+
+# ===========================
+# Summarizers
+# ===========================
+def _turn_line(turn):
+    line = f"- {clip(turn['question'], 40)}"
+    if turn.get("analysis"):
+        line += f" [{turn['analysis']}]"
+    if turn.get("columns"):
+        line += f" (colunas: {', '.join(turn['columns'][:5])})"
+    if turn.get("error"):
+        line += " → falhou"
+    return line
+
+
+def extractive_summary(summary, turns, budget):
+    """
+    Resumo determinístico, sem LLM: uma linha por pergunta antiga. Quando o
+    orçamento estoura, as linhas mais antigas saem primeiro.
+    """
+    lines = [line for line in (summary or "").splitlines() if line.strip()]
+    lines += [_turn_line(turn) for turn in turns]
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > budget:
+        lines.pop(0)
+    return clip("\n".join(lines), budget)
+
+
+def llm_summarizer(api_key, base_url=None, model="gpt-4o-mini"):
+    """
+    Resumidor que usa o LLM para fundir o resumo anterior com os turnos que
+    saem da janela recente. Falhas voltam para o resumo extrativo.
+    """
+    from src.llm.clients import get_client
+
+    def summarize(summary, turns, budget):
+        new_turns = "\n".join(
+            f"Pergunta: {turn['question']}\nResposta: {turn.get('answer') or '(sem resposta)'}"
+            for turn in turns
+        )
+        try:
+            response = get_client(api_key, base_url).chat.completions.create(
+                model=model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": (
+                            "Você mantém o resumo de uma sessão de análise de dados. Funda o resumo "
+                            "atual com os novos turnos em tópicos curtos, preservando números, "
+                            f"colunas e conclusões. Máximo de {budget} tokens."
+                        ),
+                    },
+                    {"role": "user", "content": f"Resumo atual:\n{summary or '(vazio)'}\n\nNovos turnos:\n{new_turns}"},
+                ],
+                max_tokens=budget,
+                temperature=0,
+            )
+            return clip(response.choices[0].message.content, budget)
+        except Exception as e:
+            print(f"⚠️ Falha no resumo via LLM, usando resumo extrativo: {e}")
+            return extractive_summary(summary, turns, budget)
+
+    return summarize
+
+
+def summarizer_for(state):
+    """Resumo via LLM é opt-in (`state["memory_summary"]` ou `CSV_AGENT_MEMORY_SUMMARY` = `llm`)."""
+    mode = state.get("memory_summary") or os.environ.get(SUMMARY_ENV) or "extractive"
+    if mode == "llm" and state.get("api_key"):
+        return llm_summarizer(state["api_key"], state.get("base_url"))
+    return extractive_summary
+
+
+# ===========================
+# Conversation Memory
+# ===========================
+class ConversationMemory:
+    """
+    Memória da conversa com tamanho de prompt constante:
+
+    - turnos guardados compactos (pergunta, código sem comentários e a resposta
+      final, não a saída ReAct completa)
+    - fatos estruturados: colunas já usadas e resultados calculados
+    - resumo contínuo dos turnos antigos, sob `summary_budget` tokens
+
+    O resumo é atualizado de forma incremental em um thread de fundo quando um
+    turno sai da janela recente; o prompt nunca espera por ele e usa o último
+    resumo pronto.
+    """
+
+    def __init__(self, history_budget=DEFAULT_HISTORY_BUDGET, summary_budget=DEFAULT_SUMMARY_BUDGET,
+                 recent_turns=RECENT_TURNS, summarizer=None):
+        self.history_budget = history_budget
+        self.summary_budget = summary_budget
+        self.recent_turns = recent_turns
+        self.summarizer = summarizer
+        self.summary = ""
+        self.turns = []
+        self.columns = Counter()
+        self.results = []
+        self._lock = threading.Lock()
+        self._pending = None
+
+    # --- escrita -------------------------------------------------------------
+    def add_question(self, question):
+        with self._lock:
+            self.turns.append({"question": question, "answer": None, "code": None, "columns": []})
+
+    def add_answer(self, route, answer=None, code=None, columns=(), analysis=None):
+        """Registra a resposta do LLM (ou da rota sem LLM) para a pergunta atual."""
+        with self._lock:
+            turn = self._current()
+            turn.update(route=route, code=compact_code(code) if code else None,
+                        columns=list(columns), analysis=analysis, error=None)
+            self.columns.update(columns)
+        if answer is not None:
+            self.record_result(answer)
+
+    def discard_answer(self):
+        """Descarta a resposta da pergunta atual (nova tentativa após erro no código)."""
+        with self._lock:
+            turn = self._current()
+            turn.update(answer=None, code=None, error=None)
+
+    def record_result(self, answer, error=None):
+        """Resposta final da pergunta atual; fecha o turno e agenda o resumo se necessário."""
+        with self._lock:
+            turn = self._current()
+            # String vazia (e não None) marca o turno como encerrado mesmo sem resposta
+            turn["answer"] = clip(answer, ANSWER_TOKENS) if answer else ""
+            turn["error"] = clip(error, 40) if error else None
+            if turn["answer"] and not turn["error"] and turn.get("route") != "text":
+                self.results.append({"question": clip(turn["question"], 30), "answer": clip(answer, 60)})
+                del self.results[:-MAX_RESULTS]
+        self._schedule_summary()
+
+    def _current(self):
+        if not self.turns:
+            self.turns.append({"question": "", "answer": None, "code": None, "columns": []})
+        return self.turns[-1]
+
+    # --- resumo incremental --------------------------------------------------
+    def _schedule_summary(self):
+        with self._lock:
+            if self._pending is not None and not self._pending.done():
+                return
+            if len(self._closed_turns()) <= self.recent_turns:
+                return
+            self._pending = _executor.submit(self._summarize)
+
+    def _closed_turns(self):
+        return [turn for turn in self.turns if turn["answer"] is not None or turn.get("error")]
+
+    def _summarize(self):
+        while True:
+            with self._lock:
+                closed = self._closed_turns()
+                old = closed[: max(len(closed) - self.recent_turns, 0)]
+                summary = self.summary
+            if not old:
+                return
+            summarizer = self.summarizer or extractive_summary
+            new_summary = summarizer(summary, old, self.summary_budget)
+            with self._lock:
+                self.summary = new_summary
+                self.turns = [turn for turn in self.turns if not any(turn is item for item in old)]
+
+    def wait(self, timeout=None):
+        """Espera o resumo em andamento (útil em benchmarks e no encerramento)."""
+        pending = self._pending
+        if pending is not None:
+            pending.result(timeout=timeout)
+
+    # --- leitura -------------------------------------------------------------
+    def facts_text(self):
+        parts = []
+        if self.summary:
+            parts.append(f"Resumo da conversa até aqui:\n{self.summary}")
+        if self.columns:
+            top = [col for col, _ in self.columns.most_common(MAX_COLUMNS)]
+            parts.append(f"Colunas já analisadas: {', '.join(top)}")
+        if self.results:
+            lines = [f"- {item['question']}: {item['answer']}" for item in self.results]
+            parts.append("Resultados já calculados:\n" + "\n".join(lines))
+        return "\n\n".join(parts)
+
+    def context_messages(self, budget=None):
+        """
+        Mensagens de histórico para o prompt: um bloco de sistema com resumo e
+        fatos, os turnos recentes compactados (mais novos primeiro até o
+        orçamento) e, por último, a pergunta atual.
+        """
+        budget = budget or self.history_budget
+        with self._lock:
+            facts = self.facts_text()
+            turns = list(self.turns)
+
+        messages = []
+        used = 0
+        if facts:
+            facts = clip(facts, self.summary_budget * 2)
+            messages.append({"role": "system", "content": facts})
+            used += count_tokens(facts)
+
+        current = turns.pop() if turns and turns[-1]["answer"] is None and not turns[-1].get("error") else None
+        history = []
+        for turn in reversed(turns):
+            pair = [
+                {"role": "user", "content": turn["question"]},
+                {"role": "assistant", "content": _render_answer(turn)},
+            ]
+            tokens = sum(count_tokens(message["content"]) for message in pair)
+            if used + tokens > budget:
+                break
+            history[:0] = pair
+            used += tokens
+        messages += history
+
+        if current is not None:
+            messages.append({"role": "user", "content": current["question"]})
+        return messages
+
+
+def _render_answer(turn):
+    parts = []
+    if turn.get("analysis"):
+        parts.append(f"[Análise pronta executada sem LLM: {turn['analysis']}]")
+    if turn.get("code"):
+        parts.append(f"```python\n{turn['code']}\n```")
+    if turn.get("error"):
+        parts.append(f"Erro: {turn['error']}")
+    elif turn.get("answer"):
+        parts.append(turn["answer"] if not parts else f"Resultado: {turn['answer']}")
+    return "\n".join(parts) or "(sem resposta)"
@@ -1,34 +1,117 @@
-from openai import OpenAI
-from langchain.memory import ConversationBufferMemory
-
+from src.memory.conversation_memory import ConversationMemory, columns_in, summarizer_for
+from src.prompt.prompt_builder import count_tokens
 from src.prompt.system_prompt import default_system_prompt
 from src.prompt.react_prompt import react_analysis_prompt
+from src.cache.response_cache import ResponseCache, get_response_cache
+from src.llm.clients import get_client, get_async_client
+from src.router.intent_router import get_intent_router
+from src.sandbox.engines import resolve_engine
+
+# Rotas atendidas sem chamada ao LLM
+SKIP_LLM_ROUTES = ("direct", "fastpath")
 
 # ===========================
 # Answer Question
 # ===========================
 def answer_question(state):
-    api_key = state["api_key"]
+    request = prepare_request(state)
+
+    raw_output = request["cached_output"]
+    if raw_output is None and request["route"] not in SKIP_LLM_ROUTES:
+        client = get_client(state["api_key"], state.get("base_url"))
+        response = client.chat.completions.create(**request["params"])
+
+        if request["stream_callback"]:
+            raw_output, usage = consume_stream(response, request["stream_callback"])
+        else:
+            raw_output, usage = response.choices[0].message.content, response.usage
+        state["llm_usage"] = usage_dict(usage)
+
+    return finish_answer(state, request, raw_output)
+
+async def answer_question_async(state):
+    """Mesma lógica de `answer_question`, com cliente `AsyncOpenAI` compartilhado."""
+    request = prepare_request(state)
+
+    raw_output = request["cached_output"]
+    if raw_output is None and request["route"] not in SKIP_LLM_ROUTES:
+        client = get_async_client(state["api_key"], state.get("base_url"))
+        limiter = state.get("llm_limiter")
+        if limiter is not None:
+            # Lote/serviço: chamadas limitadas por concorrência e RPM/TPM, com retry em 429
+            response = await limiter.call(
+                lambda: client.chat.completions.create(**request["params"]),
+                tokens=estimated_tokens(request["params"]),
+            )
+        else:
+            response = await client.chat.completions.create(**request["params"])
+
+        if request["stream_callback"]:
+            raw_output, usage = await consume_stream_async(response, request["stream_callback"])
+        else:
+            raw_output, usage = response.choices[0].message.content, response.usage
+        state["llm_usage"] = usage_dict(usage)
+
+    return finish_answer(state, request, raw_output)
+
+def prepare_request(state):
+    """
+    Decide a rota (direta, código ou texto) pelo roteador de intenção, monta as
+    mensagens do prompt e consulta o cache de respostas. Se houver hit, ou se a
+    rota for direta, `cached_output` já traz a resposta.
+
+    Quando o código anterior falhou (`code_error`), é uma nova tentativa: o
+    código e o erro vão para o LLM e o cache é ignorado na leitura.
+    """
     question = state["question"]
     
     memory = state.get("memory")
     if not memory:
         print("⚠️ Memória não encontrada no state")
-        memory = ConversationBufferMemory(return_messages=True)
-    
-    client = OpenAI(api_key=api_key)
-    memory.chat_memory.add_user_message(question)
-
-    analysis_keywords = [
-        "gráfico", "plot", "histograma", "boxplot", "scatter", "correlação", 
-        "distribuição", "exploratória", "eda", "análise", "estatística",
-        "intervalo", "mínimo", "máximo", "média", "mediana", "moda",
-        "desvio padrão", "variância", "variabilidade", "outliers",
-        "tendência central", "amplitude", "calcul", "mostre", "crie",
-        "padrões", "tendências"
-    ]
-    
-    needs_analysis = any(kw in question.lower() for kw in analysis_keywords)
+        memory = ConversationMemory()
+    if memory.summarizer is None:
+        memory.summarizer = summarizer_for(state)
+
+    retry_error = state.get("execution_error") if state.get("code_error") else None
+    if retry_error:
+        state["code_retries"] = state.get("code_retries", 0) + 1
+        state["code_error"] = False
+        # A resposta que falhou sai do histórico; a corrigida entra no lugar
+        memory.discard_answer()
+        decision = {"route": "code", "reason": f"nova tentativa {state['code_retries']} após erro"}
+    else:
+        memory.add_question(question)
+        decision = get_intent_router().route(question, state)
+    print(f"🧭 Rota: {decision['route']} ({decision['reason']})")
+
+    if decision["route"] == "direct":
+        stream_callback = state.get("stream_callback")
+        if stream_callback:
+            stream_callback(decision["answer"])
+        return {
+            "memory": memory,
+            "route": "direct",
+            "needs_analysis": False,
+            "cached_output": decision["answer"],
+        }
+
+    # Resolvido uma vez por pergunta: o prompt, a chave do cache e a execução usam o mesmo engine
+    state["engine"] = resolve_engine(state)
+
+    if decision["route"] == "fastpath":
+        return {
+            "memory": memory,
+            "route": "fastpath",
+            "needs_analysis": True,
+            "analysis": {
+                "name": decision["analysis"],
+                "columns": decision["columns"],
+                "options": decision["options"],
+            },
+            "cached_output": None,
+        }
+
+    needs_analysis = decision["route"] == "code"
     
     print(f"🤖 Pergunta: '{question}'")
     print(f"🧠 Requer análise: {needs_analysis}")
@@ -43,30 +126,93 @@ def answer_question(state):
         max_tokens = 600
     
     context_messages.append({"role": "system", "content": system_prompt})
+    # Resumo, fatos e turnos recentes dentro do orçamento, terminando na pergunta atual
+    context_messages += memory.context_messages(state.get("memory_token_budget"))
 
-    chat_history = memory.chat_memory.messages
-    recent_messages = chat_history[-4:] if len(chat_history) > 4 else chat_history
-    
-    for msg in recent_messages:
-        if hasattr(msg, 'type'):
-            role = "user" if msg.type == "human" else "assistant"
-            context_messages.append({
-                "role": role, 
-                "content": msg.content[:300]
-            })
-
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=context_messages,
-        max_tokens=max_tokens,
-        temperature=0.1
-    )
-
-    raw_output = response.choices[0].message.content.strip()
-    memory.chat_memory.add_ai_message(raw_output)
-
-    if len(memory.chat_memory.messages) > 16:
-        memory.chat_memory.messages = memory.chat_memory.messages[-16:]
+    mode = "code" if needs_analysis else "text"
+    use_cache = state.get("use_response_cache", True)
+    if retry_error:
+        # A correção sobrescreve no cache a resposta que gerou o erro
+        context_key = state.get("response_cache_key")
+        context_messages.append({"role": "assistant", "content": state.get("react_response", "")})
+        context_messages.append({
+            "role": "user",
+            "content": (
+                f"O código acima falhou com o erro:\n{retry_error[-1500:]}\n"
+                "Corrija o código e responda novamente apenas com o bloco ```python```."
+            ),
+        })
+    else:
+        # Com várias tabelas, o conjunto de tabelas da sessão também faz parte do contexto
+        dataset_key = state.get("dataset_id")
+        if state.get("tables"):
+            dataset_key = [dataset_key, sorted(state["tables"].items())]
+        # O engine muda o prompt de código, então faz parte do modo na chave do cache
+        engine = state["engine"] if needs_analysis else "pandas"
+        cache_mode = mode if engine == "pandas" else f"{mode}:{engine}"
+        context_key = ResponseCache.context_key(
+            dataset_key, state["schema"], cache_mode, context_messages[1:-1]
+        )
+        state["response_cache_key"] = context_key
+
+    lookup = use_cache and not retry_error
+    cached_output = get_response_cache().get(context_key, question, columns=state["schema"]) if lookup else None
+    stream_callback = state.get("stream_callback")
+
+    if cached_output is not None:
+        print("⚡ Resposta do LLM obtida do cache")
+        if stream_callback:
+            stream_callback(cached_output)
+
+    return {
+        "memory": memory,
+        "route": decision["route"],
+        "needs_analysis": needs_analysis,
+        "use_cache": use_cache and context_key is not None,
+        "context_key": context_key,
+        "cached_output": cached_output,
+        "retry": bool(retry_error),
+        "stream_callback": stream_callback,
+        "params": {
+            "model": "gpt-4o-mini",
+            "messages": context_messages,
+            "max_tokens": max_tokens,
+            "temperature": 0.1,
+            "stream": bool(stream_callback),
+            **({"stream_options": {"include_usage": True}} if stream_callback else {}),
+        },
+    }
+
+def finish_answer(state, request, raw_output):
+    """Atualiza cache e memória e separa código ReAct de resposta textual."""
+    raw_output = (raw_output or "").strip()
+    memory = request["memory"]
+    needs_analysis = request["needs_analysis"]
+
+    cache_status = state.setdefault("cache_status", {})
+    if request["route"] == "direct":
+        cache_status["llm"] = "skipped"
+        memory.add_answer("direct", answer=raw_output)
+        state["final_answer"] = raw_output
+        state["mode"] = "text"
+        state["memory"] = memory
+        return state
+
+    if request["route"] == "fastpath":
+        cache_status["llm"] = "skipped"
+        analysis = request["analysis"]
+        memory.add_answer("fastpath", columns=analysis["columns"] or (), analysis=analysis["name"])
+        state["analysis"] = analysis
+        state["mode"] = "fastpath"
+        state["memory"] = memory
+        return state
+
+    if request["cached_output"] is not None:
+        cache_status["llm"] = "hit"
+    else:
+        cache_status["llm"] = "miss"
+        if request["use_cache"]:
+            get_response_cache().put(request["context_key"], state["question"], raw_output)
 
     print(f"📝 RESPOSTA ReAct:\n{raw_output}\n" + "="*50)
 
@@ -77,18 +223,70 @@ def answer_question(state):
             state["code"] = code
             state["mode"] = "code"
             state["react_response"] = raw_output
+            # O resultado do código é registrado na memória por `format_output`
+            memory.add_answer("code", code=code, columns=columns_in(code, state["schema"]))
         else:
             print("⚠️ Não foi possível extrair código ReAct, usando resposta como texto")
             state["final_answer"] = raw_output
             state["mode"] = "text"
+            memory.add_answer("text", answer=raw_output)
     else:
         clean_text = clean_text_response(raw_output)
         state["final_answer"] = clean_text
         state["mode"] = "text"
+        memory.add_answer("text", answer=clean_text)
+
+    # Uma vez por pergunta: a nova tentativa após erro no código não conta de novo
+    if request["cached_output"] is None and not request.get("retry"):
+        get_intent_router().record(state["question"], state["mode"])
     
     state["memory"] = memory
     return state
 
+def consume_stream(response, stream_callback):
+    """
+    Repassa cada token do stream da OpenAI ao callback e devolve o texto
+    completo e o uso de tokens (enviado no último chunk, sem `choices`).
+    """
+    parts = []
+    usage = None
+    for chunk in response:
+        usage = getattr(chunk, "usage", None) or usage
+        if not chunk.choices:
+            continue
+        token = chunk.choices[0].delta.content
+        if token:
+            parts.append(token)
+            stream_callback(token)
+    return "".join(parts), usage
+
+async def consume_stream_async(response, stream_callback):
+    parts = []
+    usage = None
+    async for chunk in response:
+        usage = getattr(chunk, "usage", None) or usage
+        if not chunk.choices:
+            continue
+        token = chunk.choices[0].delta.content
+        if token:
+            parts.append(token)
+            stream_callback(token)
+    return "".join(parts), usage
+
+def estimated_tokens(params):
+    """Estimativa de tokens de uma chamada (prompt + limite da resposta) para o limite de TPM."""
+    return sum(count_tokens(message["content"]) for message in params["messages"]) + params["max_tokens"]
+
+def usage_dict(usage):
+    """Tokens de prompt/resposta do objeto `usage` da OpenAI (ou None se o servidor não informar)."""
+    if usage is None:
+        return None
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        "total_tokens": getattr(usage, "total_tokens", None),
+    }
+
 def extract_react_code(raw_output: str) -> str | None:
     """
     Extrai o bloco único de código Python de uma resposta ReAct.
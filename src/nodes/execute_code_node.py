@@ -1,14 +1,19 @@
 import os
-import pandas as pd
-import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
-import streamlit as st
-import io
-from io import StringIO
-import contextlib 
 import re
 
+from src.data import columnar_cache
+from src.data.dataset_store import get_dataset_store
+from src.data.shared_frame import get_shared_registry
+from src.sandbox.runner import build_namespace, run_code
+from src.sandbox.rendering import FigureSink, DEFAULT_FORMAT
+from src.sandbox.pool import get_sandbox_pool
+from src.sandbox.engines import resolve_engine
+from src.sandbox.code_analysis import prepare_code
+from src.cache.result_cache import get_result_cache, result_key
+from src.nodes.profile_dataset_node import get_profile
+from src.analysis.fastpath import run_analysis
+from src.data.tables import LazyTables, table_sources
+
 # ==========================
 # Execute Code
 # ==========================
@@ -16,69 +21,192 @@ def execute_code(state):
     if state.get("mode") == "text":
         return state
 
-    if "cached_dataframe" not in state:
-        csv_string = state["dataframe_csv"]
-        state["cached_dataframe"] = pd.read_csv(StringIO(csv_string))
-    
-    df = state["cached_dataframe"]
+    figure_format = state.get("figure_format", DEFAULT_FORMAT)
+    figure_dpi = state.get("figure_dpi")
+    # Já resolvido em `prepare_request`; só resolve aqui se o nó rodar isolado
+    engine = state.get("engine") or resolve_engine(state)
+
+    fastpath = state.get("mode") == "fastpath"
+    columns, notes = None, []
+    if fastpath:
+        analysis = state["analysis"]
+        code = f"fastpath:{analysis['name']}:{analysis.get('columns')}:{analysis.get('options')}"
+    else:
+        prepared = prepare_code(
+            state["code"], state["schema"], state["data_info"].get("total_rows"), state.get("tables") or ()
+        )
+        code, notes = prepared["code"], prepared["notes"]
+        for warning in prepared["warnings"]:
+            print(f"⚠️ {warning}")
+        state["code_warnings"] = prepared["warnings"]
+        # Os engines duckdb/polars leem o dataset inteiro por conta própria
+        if engine == "pandas":
+            columns = prepared["columns"]
+        if state.get("tables"):
+            # O mesmo código sobre outro conjunto de tabelas não pode reutilizar o resultado
+            code += f"\n# tables: {sorted(state['tables'].items())}"
 
-    tmpdir = st.session_state.get("temp_dir")
-    if not os.path.exists(tmpdir):
-        os.makedirs(tmpdir, exist_ok=True)
+    cache_status = state.setdefault("cache_status", {})
+    use_cache = state.get("use_result_cache", True)
+    cache_key = result_key(code, state["dataset_id"], [figure_format, figure_dpi, engine])
+    if use_cache:
+        cached = get_result_cache().get(cache_key)
+        if cached is not None:
+            print("⚡ Resultado da execução obtido do cache")
+            cache_status["execution"] = "hit"
+            state["raw_output"] = cached["raw_output"]
+            state["sampling_notes"] = cached.get("sampling_notes", [])
+            _set_images(state, cached["images"], figure_format)
+            if cached.get("final_answer"):
+                state["final_answer"] = cached["final_answer"]
+            state["code_error"] = False
+            return state
 
-    img_path = os.path.join(tmpdir, "plot.png")
+    dataset_id = state["dataset_id"]
+    store = get_dataset_store()
+    # Uma única consulta ao store: o dataset pode ser evictado entre os nós
+    entry = store.require(dataset_id)
+    columnar_path = entry.get("columnar_path")
+    sources = table_sources(state.get("tables"))
+    pool = None if fastpath else sandbox_pool(state)
 
-    code = state["code"]
-    lines = code.split("\n")
-    cleaned_lines = []
-    for line in lines:
-        if "pd.read_csv" in line or "read_csv" in line:
-            continue
-        if "img_path" in line and "=" in line and not "savefig" in line:
-            continue
-        if "savefig(" in line:
-            line = re.sub(r"'[^']*\.png'", "img_path", line)
-            line = re.sub(r'"[^"]*\.png"', "img_path", line)
-        cleaned_lines.append(line)
-    code = "\n".join(cleaned_lines)
-
-    local_env = {
-        "df": df,
-        "plt": plt,
-        "pd": pd,
-        "np": np,
-        "sns": sns,
-        "img_path": img_path
-    }
-
-    plt.switch_backend("Agg")
-    plt.ioff()
-
-    stdout, stderr = io.StringIO(), io.StringIO()
-    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+    if fastpath:
+        # As rotinas prontas são código do próprio app (não gerado pelo LLM): rodam
+        # no processo principal mesmo com `sandbox=process` e leem só as colunas que usam
+        result = run_analysis(
+            analysis["name"],
+            get_profile(dataset_id),
+            lambda columns: load_frame(dataset_id, columns, entry)[columns],
+            FigureSink(figure_format, figure_dpi),
+            columns=analysis.get("columns"),
+            options=analysis.get("options"),
+        )
+    elif pool is not None:
+        _materialize_tables(sources, code)
+        result = pool.run(
+            code,
+            dataset_id,
+            dataset_version=entry.get("version"),
+            columnar_path=columnar_path,
+            csv_path=entry.get("csv_path"),
+            profile=get_profile(dataset_id),
+            dataframe_loader=lambda: store.get_dataframe(dataset_id),
+            shared_frame_loader=(
+                (lambda: get_shared_registry().publish(dataset_id, store.get_dataframe(dataset_id)))
+                if state.get("shared_memory", True) else None
+            ),
+            limits=state.get("sandbox_limits"),
+            figure_format=figure_format,
+            figure_dpi=figure_dpi,
+            tables=sources or None,
+            engine=engine,
+            columns=_projection(state["schema"], columns),
+        )
+    else:
+        df = load_frame(dataset_id, _projection(state["schema"], columns), entry)
+        sink = FigureSink(figure_format, figure_dpi)
+        tables = LazyTables(sources) if sources else None
+        namespace = build_namespace(
+            df, sink, get_profile(dataset_id), columnar_path, tables, engine, csv_path=entry.get("csv_path")
+        )
         try:
-            exec(code, local_env)
-            plt.close("all")
-        except Exception as e:
-            error_msg = stderr.getvalue() or str(e)
-            print(f"❌ Erro na execução: {error_msg}")
-            state["final_answer"] = f"Erro ao executar código: {error_msg}"
-            state["code_error"] = True
-            return state
+            result = run_code(code, namespace)
+        finally:
+            if tables is not None:
+                tables.close()
+
+    if result["error"]:
+        error_msg = result["error"]
+        print(f"❌ Erro na execução: {error_msg}")
+        state["final_answer"] = f"Erro ao executar código: {error_msg}"
+        state["execution_error"] = error_msg
+        state["code_error"] = True
+        return state
 
-    state["raw_output"] = stdout.getvalue()
+    state["raw_output"] = result["stdout"]
+    state["sampling_notes"] = notes + result.get("sampling_notes", [])
     state["code_error"] = False
+    _set_images(state, result["images"], figure_format)
 
-    print(f"📁 Arquivo existe: {os.path.exists(img_path)}")
-    if os.path.exists(img_path):
-        with open(img_path, "rb") as f:
-            state["image_bytes"] = f.read()
-        print(f"✅ Imagem carregada com sucesso")
+    if result["images"]:
+        print(f"✅ {len(result['images'])} imagem(ns) gerada(s)")
     else:
-        print("⚠️ Nenhum gráfico gerado - arquivo não encontrado")
-        if os.path.exists(tmpdir):
-            files = os.listdir(tmpdir)
-            print(f"📁 Arquivos no diretório temporário: {files}")
-        state["image_bytes"] = None
+        print("⚠️ Nenhum gráfico gerado")
+
+    cache_status["execution"] = "miss"
+    if use_cache:
+        get_result_cache().put(
+            cache_key, state["raw_output"], images=state["images"],
+            sampling_notes=state["sampling_notes"],
+        )
+        state["result_cache_key"] = cache_key
 
     return state
+
+
+def _projection(schema, columns):
+    """Colunas a carregar (None = todas); sem nenhuma citada, basta uma para manter `len(df)`."""
+    if columns is None or len(columns) == len(schema):
+        return None
+    if columns:
+        print(f"📉 Carregando {len(columns)}/{len(schema)} colunas usadas pelo código")
+        return columns
+    return list(schema)[:1]
+
+
+def load_frame(dataset_id, columns=None, entry=None):
+    """
+    DataFrame do código gerado. Com `columns`, lê só essas colunas (do cache
+    colunar ou da cópia do CSV), a menos que o dataset inteiro já esteja em
+    memória no store. Código que só usa `load_columns` recebe uma coluna.
+    """
+    store = get_dataset_store()
+    entry = entry or store.require(dataset_id)
+    if columns is not None and entry.get("df") is None:
+        df = columnar_cache.read_columns(columns, entry.get("columnar_path"), entry.get("csv_path"))
+        if df is not None:
+            return df
+    return store.get_dataframe(dataset_id)
+
+
+def _materialize_tables(sources, code):
+    """
+    Os workers leem as tabelas do cache colunar, que só é gravado quando o
+    DataFrame é lido pela primeira vez; garante isso para as tabelas citadas
+    no código.
+    """
+    store = get_dataset_store()
+    for name, source in sources.items():
+        if columnar_cache.exists(source["columnar_path"]):
+            continue
+        if re.search(rf"['\"]{re.escape(name)}['\"]", code):
+            store.get_dataframe(source["dataset_id"])
+
+
+def _set_images(state, images, figure_format):
+    state["images"] = images
+    state["image_format"] = figure_format
+    # Compatibilidade: primeira imagem continua em `image_bytes`
+    state["image_bytes"] = images[0] if images else None
+
+
+def use_process_sandbox(state):
+    """
+    O código gerado roda por padrão no pool de processos, com limites de
+    tempo, CPU e memória. `state["sandbox"]` ou `CSV_AGENT_SANDBOX=inline`
+    executa no próprio processo. As rotinas do fastpath não passam por ele.
+    """
+    sandbox = state.get("sandbox") or os.environ.get("CSV_AGENT_SANDBOX", "process")
+    return sandbox == "process"
+
+
+def sandbox_pool(state):
+    """Pool de processos do sandbox, ou None para executar no próprio processo."""
+    if not use_process_sandbox(state):
+        return None
+    try:
+        return get_sandbox_pool()
+    except (OSError, RuntimeError) as e:
+        # Sem processos filhos (ex.: ambiente restrito): a execução continua no processo
+        print(f"⚠️ Sandbox de processos indisponível, executando no próprio processo: {e}")
+        return None
@@ -1,6 +1,8 @@
 import json
 import re
 
+from src.cache.result_cache import get_result_cache
+
 # ===========================
 # Format Output
 # ===========================
@@ -8,9 +10,29 @@ def format_output(state):
     if state.get("mode") == "text":
         return state
 
+    memory = state.get("memory")
     if state.get("code_error"):
+        if memory is not None:
+            memory.record_result(None, error=state.get("execution_error") or "erro na execução")
         return state
 
+    _extract_answer(state)
+
+    notes = state.get("sampling_notes")
+    if notes and state.get("final_answer"):
+        state["final_answer"] += "\n\n_ℹ️ Amostragem aplicada nos gráficos: " + "; ".join(notes) + "._"
+
+    cache_key = state.pop("result_cache_key", None)
+    if cache_key and state.get("final_answer"):
+        get_result_cache().update(cache_key, final_answer=state["final_answer"])
+
+    if memory is not None:
+        memory.record_result(state.get("final_answer"))
+    return state
+
+
+def _extract_answer(state):
+    """Extrai o campo `answer` do JSON impresso pelo código gerado."""
     raw_output = state.get("raw_output", "")
 
     try:
@@ -1,25 +1,267 @@
 import io
+import os
 import pandas as pd
 
+from src.data import columnar_cache
+from src.data.dataset_store import get_dataset_store, hash_bytes
+from src.data.chunked_reader import stream_csv_stats
+from src.data.dtype_optimizer import optimize_dtypes
+
+# Acima deste tamanho o upload é ingerido em chunks (sem materializar o DataFrame)
+CHUNKED_THRESHOLD_BYTES = 256 * 1024 ** 2
+# A versão com dtypes otimizados fica no store com id próprio: `<hash>:opt`
+OPTIMIZED_SUFFIX = ":opt"
+
 # ===========================
 # Load CSV
 # ===========================
 def load_csv(state):
-    file_bytes = state.pop("file_content")
-    file_like_object = io.BytesIO(file_bytes)
-    
-    df = pd.read_csv(file_like_object)
+    store = get_dataset_store()
+    file_bytes = state.pop("file_content", None)
+
+    dataset_id = state.get("dataset_id")
+    if not dataset_id:
+        dataset_id = hash_bytes(file_bytes)
+
+    # A versão otimizada é sempre derivada da original, que é a lida do CSV
+    optimize = state.get("optimize_dtypes") or dataset_id.endswith(OPTIMIZED_SUFFIX)
+    dataset_id = dataset_id.removesuffix(OPTIMIZED_SUFFIX)
+    if optimize:
+        entry = store.get(optimized_id(dataset_id))
+        if entry is not None:
+            return _set_dataset(state, optimized_id(dataset_id), entry)
+
+    columnar_path = columnar_cache.cache_path(state.get("temp_dir"), dataset_id)
+
+    entry = store.get(dataset_id)
+    if entry is not None:
+        print(f"♻️ Dataset em cache: {dataset_id[:12]}")
+    elif columnar_cache.exists(columnar_path):
+        print(f"🗂️ Reabrindo cache colunar: {dataset_id[:12]}")
+        entry = register_columnar(dataset_id, columnar_path)
+    else:
+        if file_bytes is None:
+            raise ValueError("Dataset não encontrado no cache e nenhum arquivo foi enviado")
+
+        state["bytes_parsed"] = len(file_bytes)
+        chunked = state.get("chunked")
+        if chunked is None:
+            chunked = len(file_bytes) > CHUNKED_THRESHOLD_BYTES
+
+        if chunked:
+            entry = ingest_chunked(file_bytes, dataset_id, cache_dir=state.get("temp_dir"))
+        else:
+            df = read_csv_bytes(file_bytes)
+
+            schema_lite = {col: str(dtype) for col, dtype in df.dtypes.items()}
+            data_info = {
+                "shape": df.shape,
+                "columns": list(df.columns),
+                "total_rows": df.shape[0],
+                "total_columns": df.shape[1]
+            }
+            if columnar_path and not columnar_cache.write_frame(df, columnar_path, schema_lite, data_info):
+                columnar_path = None
+            entry = store.put(dataset_id, df, schema_lite, data_info, columnar_path=columnar_path)
+
+    if optimize:
+        dataset_id, entry = optimize_entry(dataset_id, state.get("temp_dir"))
+
+    return _set_dataset(state, dataset_id, entry)
+
+
+def optimized_id(dataset_id):
+    """Id da versão do dataset com dtypes otimizados."""
+    return dataset_id if dataset_id.endswith(OPTIMIZED_SUFFIX) else dataset_id + OPTIMIZED_SUFFIX
+
+
+def requested_id(state):
+    """Id do dataset que a pergunta usa: o original ou, com `optimize_dtypes`, a versão otimizada."""
+    dataset_id = state.get("dataset_id")
+    if dataset_id and state.get("optimize_dtypes"):
+        return optimized_id(dataset_id)
+    return dataset_id
+
+
+def is_dataset_ready(state):
+    """True se o dataset pedido (já otimizado, se for o caso) está no store."""
+    dataset_id = requested_id(state)
+    return bool(dataset_id) and dataset_id in get_dataset_store()
+
+
+def attach_dataset(state):
+    """Caminho rápido de `load_csv`: o dataset já está no store, só copia os metadados."""
+    dataset_id = requested_id(state)
+    entry = get_dataset_store().get(dataset_id)
+    if entry is None:
+        # Evictado depois do roteamento: segue o caminho completo
+        return load_csv(state)
+    state.pop("file_content", None)
+    print(f"♻️ Dataset em cache: {dataset_id[:12]}")
+    return _set_dataset(state, dataset_id, entry)
+
+
+def _set_dataset(state, dataset_id, entry):
+    source_id = dataset_id.removesuffix(OPTIMIZED_SUFFIX)
+    if source_id != dataset_id and state.get("tables"):
+        # A tabela principal da sessão passa a ser a versão otimizada
+        state["tables"] = {
+            name: dataset_id if table_id == source_id else table_id
+            for name, table_id in state["tables"].items()
+        }
+    state["dataset_id"] = dataset_id
+    state["schema"] = entry["schema"]
+    state["data_info"] = entry["data_info"]
+    if entry.get("column_stats"):
+        state["column_stats"] = entry["column_stats"]
+    if state.get("tables"):
+        ensure_tables(state)
+    return state
+
+
+def ensure_tables(state):
+    """
+    Garante que as tabelas da sessão (`state["tables"]`, `{nome: dataset_id}`)
+    estejam no store, reabrindo do cache colunar as que foram evictadas. Nada
+    é lido do disco aqui: cada tabela só é carregada quando o código a usa.
+    """
+    store = get_dataset_store()
+    available = {}
+    for name, dataset_id in state["tables"].items():
+        if store.get(dataset_id) is None:
+            columnar_path = columnar_cache.cache_path(state.get("temp_dir"), dataset_id)
+            if not columnar_cache.exists(columnar_path):
+                print(f"⚠️ Tabela '{name}' não está mais em cache e foi ignorada")
+                continue
+            register_columnar(dataset_id, columnar_path)
+        available[name] = dataset_id
+    state["tables"] = available
+    return state
+
+
+def read_csv_bytes(file_bytes):
+    return read_csv_source(io.BytesIO(file_bytes))
+
+
+def read_csv_source(source):
+    """Lê o CSV de bytes em memória (`BytesIO`) ou de um caminho em disco."""
+    df = pd.read_csv(source)
     df.columns = df.columns.str.strip()
-    
+    return df
+
+
+def optimize_entry(dataset_id, cache_dir=None):
+    """
+    Versão do dataset com dtypes otimizados (opt-in), com a memória
+    antes/depois em `data_info`. Fica no store com id próprio
+    (`optimized_id`) e cache colunar próprio: a entrada original não muda, e
+    outras sessões com o mesmo conteúdo continuam vendo os dados originais.
+    Retorna `(id, entrada)`.
+    """
+    store = get_dataset_store()
+    opt_id = optimized_id(dataset_id)
+    entry = store.get(opt_id)
+    if entry is not None:
+        return opt_id, entry
+
+    columnar_path = columnar_cache.cache_path(cache_dir, opt_id)
+    if columnar_cache.exists(columnar_path):
+        return opt_id, register_columnar(opt_id, columnar_path)
+
+    source = store.require(dataset_id)
+    df, report = optimize_dtypes(store.get_dataframe(dataset_id))
+
     schema_lite = {col: str(dtype) for col, dtype in df.dtypes.items()}
-    state["dataframe_csv"] = df.to_csv(index=False)
-    
-    state["schema"] = schema_lite
-    state["data_info"] = {
-        "shape": df.shape,
-        "columns": list(df.columns),
-        "total_rows": df.shape[0],
-        "total_columns": df.shape[1]
-    }
-        
-    return state
\ No newline at end of file
+    data_info = {**source["data_info"], "memory": report}
+    column_stats = source.get("column_stats")
+
+    if columnar_path and not columnar_cache.write_frame(
+        df, columnar_path, schema_lite, data_info,
+        column_stats=column_stats, dtypes_optimized=True,
+    ):
+        columnar_path = None
+
+    entry = store.put(
+        opt_id, df, schema_lite, data_info,
+        columnar_path=columnar_path, column_stats=column_stats, dtypes_optimized=True,
+    )
+    return opt_id, entry
+
+
+def register_columnar(dataset_id, columnar_path):
+    """Registra no store um dataset já persistido em Arrow IPC (leitura via memory-map)."""
+    meta = columnar_cache.read_metadata(columnar_path)
+    return get_dataset_store().put(
+        dataset_id,
+        None,
+        meta["schema"],
+        meta["data_info"],
+        loader=lambda: columnar_cache.read_frame(columnar_path),
+        columnar_path=columnar_path,
+        column_stats=meta.get("column_stats"),
+        dtypes_optimized=meta.get("dtypes_optimized", False),
+    )
+
+
+def ingest_chunked(file_bytes, dataset_id=None, progress_callback=None, chunksize=None, cache_dir=None):
+    """
+    Ingestão em chunks: calcula schema, data_info e estatísticas por coluna em
+    uma passada e registra o dataset no store sem materializar o DataFrame.
+    O DataFrame completo só é lido se o código gerado precisar dele; até lá,
+    com `cache_dir`, o CSV fica em uma cópia em disco e não na memória.
+    """
+    store = get_dataset_store()
+    dataset_id = dataset_id or hash_bytes(file_bytes)
+    columnar_path = columnar_cache.cache_path(cache_dir, dataset_id)
+
+    entry = store.get(dataset_id)
+    if entry is None and columnar_cache.exists(columnar_path):
+        entry = register_columnar(dataset_id, columnar_path)
+    if entry is not None:
+        if progress_callback:
+            progress_callback(1.0)
+        return entry
+
+    kwargs = {"progress_callback": progress_callback}
+    if chunksize:
+        kwargs["chunksize"] = chunksize
+    stats = stream_csv_stats(file_bytes, **kwargs)
+
+    # O loader lê da cópia em disco: o store não segura os bytes do upload até a
+    # materialização. Sem diretório de cache, os bytes ficam em memória e contam na evicção.
+    csv_path = columnar_cache.write_spool(file_bytes, columnar_cache.spool_path(cache_dir, dataset_id))
+    source = csv_path or file_bytes
+
+    return store.put(
+        dataset_id,
+        None,
+        stats["schema"],
+        stats["data_info"],
+        loader=_chunked_loader(source, columnar_path, stats),
+        nbytes=0 if csv_path else len(file_bytes),
+        columnar_path=columnar_path,
+        csv_path=csv_path,
+        column_stats=stats["column_stats"],
+        sample=stats["sample"],
+    )
+
+
+def _chunked_loader(source, columnar_path, stats):
+    """
+    Materializa um dataset ingerido em chunks (`source`: caminho da cópia do
+    CSV ou os bytes) e grava o cache colunar; depois dele, a cópia é apagada.
+    """
+    def loader():
+        spooled = not isinstance(source, bytes)
+        df = read_csv_source(source if spooled else io.BytesIO(source))
+        if columnar_path and columnar_cache.write_frame(
+            df, columnar_path, stats["schema"], stats["data_info"],
+            column_stats=stats["column_stats"],
+        ) and spooled:
+            try:
+                os.remove(source)
+            except OSError:
+                pass
+        return df
+
+    return loader
@@ -0,0 +1,48 @@
+from src.data import columnar_cache
+from src.data.dataset_store import get_dataset_store
+from src.data.profile import build_profile
+
+# Linhas lidas do cache colunar para estimar o perfil sem materializar o dataset
+PROFILE_SAMPLE_ROWS = 20_000
+
+# ===========================
+# Profile Dataset
+# ===========================
+def profile_dataset(state):
+    profile = get_profile(state["dataset_id"])
+    state["profile_summary"] = profile.summary_text()
+    return state
+
+
+def get_profile(dataset_id):
+    """
+    Retorna o perfil do dataset, calculando-o apenas na primeira vez. Com o
+    DataFrame em memória o perfil é exato; senão, vem das estatísticas da
+    ingestão e de uma amostra limitada, sem materializar o dataset.
+    """
+    store = get_dataset_store()
+    entry = store.require(dataset_id)
+
+    profile = entry.get("profile")
+    if profile is None:
+        profile = _build_profile(dataset_id, entry)
+        # Direto na entrada: ela pode ter saído do store durante o cálculo
+        entry["profile"] = profile
+    return profile
+
+
+def _build_profile(dataset_id, entry):
+    if entry.get("df") is not None:
+        return build_profile(entry["df"])
+
+    sample = entry.get("sample")
+    if sample is None and columnar_cache.exists(entry.get("columnar_path")):
+        sample = columnar_cache.read_sample(entry["columnar_path"], PROFILE_SAMPLE_ROWS)
+    if sample is None:
+        return build_profile(get_dataset_store().get_dataframe(dataset_id))
+
+    return build_profile(
+        sample,
+        column_stats=entry.get("column_stats"),
+        total_rows=entry["data_info"].get("total_rows"),
+    )
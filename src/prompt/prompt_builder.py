@@ -0,0 +1,176 @@
+import math
+import re
+from collections import defaultdict
+
+from src.cache.response_cache import normalize_question
+from src.data.dataset_store import get_dataset_store
+from src.data.tables import table_sources
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:  # tiktoken é opcional; sem ele usamos ~4 caracteres por token
+    _ENCODING = None
+
+DEFAULT_TOKEN_BUDGET = 3000
+# Níveis de detalhe testados em ordem até o prompt caber no orçamento:
+# (todas as colunas no schema?, máximo de colunas com perfil detalhado)
+DETAIL_LEVELS = [(True, 40), (True, 15), (False, 15), (False, 8), (False, 3)]
+
+
+# ===========================
+# Token Counting
+# ===========================
+def count_tokens(text):
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+# ===========================
+# Column Selection
+# ===========================
+def _column_tokens(column):
+    spaced = re.sub(r"([a-z])([A-Z])", r"\1 \2", str(column))
+    return [token for token in normalize_question(spaced.replace("_", " ")).split() if len(token) >= 2]
+
+
+def _matches(token, question_tokens):
+    # Prefixo de 5 letras tolera plural/flexão ("vendas" ~ "venda", "valores" ~ "valor")
+    return any(
+        token == word or (len(token) >= 5 and len(word) >= 5 and token[:5] == word[:5])
+        for word in question_tokens
+    )
+
+
+def rank_columns(question, schema, profile=None):
+    """
+    Ordena as colunas por relevância para a pergunta. Retorna
+    `(colunas_ordenadas, relevantes)`, onde `relevantes` são as citadas pelo
+    nome na pergunta mais as mais correlacionadas com elas (pelo perfil).
+    """
+    normalized = normalize_question(question)
+    question_tokens = set(normalized.split())
+
+    scores = {}
+    for col in schema:
+        col_tokens = _column_tokens(col)
+        score = 0.0
+        if col_tokens and " ".join(col_tokens) in normalized:
+            score += 3
+        score += sum(1 for token in col_tokens if _matches(token, question_tokens))
+        if score:
+            scores[col] = score
+
+    if profile is not None and scores:
+        corr = profile.corr
+        for col in list(scores):
+            if col not in corr.columns:
+                continue
+            partners = corr[col].drop(col).abs().sort_values(ascending=False).head(2)
+            for partner, value in partners.items():
+                if value >= 0.5:
+                    scores.setdefault(partner, 0.5)
+
+    relevant = sorted(scores, key=lambda col: -scores[col])
+    others = [col for col in schema if col not in scores]
+    return relevant + others, relevant
+
+
+def compress_schema(schema, columns):
+    """Schema agrupado por dtype: `float64: a, b | object: c`."""
+    groups = defaultdict(list)
+    for col in columns:
+        groups[schema[col]].append(str(col))
+    return " | ".join(f"{dtype}: {', '.join(cols)}" for dtype, cols in groups.items())
+
+
+# ===========================
+# Prompt Builder
+# ===========================
+def _dataset_context(state, ranked, relevant, all_in_schema, max_profile_columns):
+    schema = state["schema"]
+    profile = _get_profile(state)
+
+    if all_in_schema:
+        schema_columns = ranked
+    else:
+        schema_columns = (relevant or ranked)[:max_profile_columns]
+
+    schema_text = compress_schema(schema, schema_columns)
+    hidden = len(schema) - len(schema_columns)
+    if hidden > 0:
+        schema_text += f" | ... (+{hidden} colunas omitidas)"
+
+    profile_columns = (relevant or ranked)[:max_profile_columns]
+    if profile is not None:
+        profile_text = profile.summary_text(max_columns=max_profile_columns, columns=profile_columns)
+    else:
+        profile_text = state.get("profile_summary", "")
+
+    return {
+        "schema_text": schema_text,
+        "profile_text": profile_text,
+        "tables_text": _tables_text(state, max_profile_columns),
+        "columns_shown": len(schema_columns),
+        # Perfil estimado em amostra (ingestão em chunks): os prompts não o tratam como exato
+        "profile_sample_rows": profile.sample_rows if profile is not None else None,
+    }
+
+
+def _tables_text(state, max_columns):
+    """Uma linha por tabela da sessão: `- nome (N linhas): dtype: a, b | ...`."""
+    sources = table_sources(state.get("tables"))
+    if len(sources) < 2:
+        return ""
+
+    lines = []
+    for name, source in sources.items():
+        schema = source["schema"]
+        ranked, _ = rank_columns(state.get("question", ""), schema)
+        text = compress_schema(schema, ranked[:max_columns])
+        if len(schema) > max_columns:
+            text += f" | ... (+{len(schema) - max_columns} colunas)"
+        primary = " = df" if source["dataset_id"] == state.get("dataset_id") else ""
+        rows = source["total_rows"]
+        rows_text = f"{rows:,} linhas" if rows is not None else "? linhas"
+        lines.append(f"- `{name}`{primary} ({rows_text}): {text}")
+    return "\n".join(lines)
+
+
+def _get_profile(state):
+    entry = get_dataset_store().get(state.get("dataset_id")) if state.get("dataset_id") else None
+    return entry.get("profile") if entry else None
+
+
+def build_prompt(state, render, name, budget=None):
+    """
+    Monta o prompt com `render(context)` escolhendo o maior nível de detalhe
+    do dataset que cabe no orçamento de tokens (`state["prompt_token_budget"]`).
+    O tamanho final é registrado em `state["prompt_stats"]`.
+    """
+    budget = budget or state.get("prompt_token_budget") or DEFAULT_TOKEN_BUDGET
+    schema = state["schema"]
+    ranked, relevant = rank_columns(state.get("question", ""), schema, _get_profile(state))
+
+    prompt, tokens, context = None, None, None
+    for all_in_schema, max_profile_columns in DETAIL_LEVELS:
+        context = _dataset_context(state, ranked, relevant, all_in_schema, max_profile_columns)
+        prompt = render(context)
+        tokens = count_tokens(prompt)
+        if tokens <= budget:
+            break
+
+    state["prompt_stats"] = {
+        "prompt": name,
+        "tokens": tokens,
+        "budget": budget,
+        "columns_shown": context["columns_shown"],
+        "total_columns": len(schema),
+        "relevant_columns": relevant,
+    }
+    print(
+        f"🧮 Prompt {name}: {tokens} tokens (orçamento {budget}), "
+        f"{context['columns_shown']}/{len(schema)} colunas, relevantes: {relevant[:5]}"
+    )
+    return prompt
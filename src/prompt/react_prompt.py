@@ -1,23 +1,66 @@
+from src.sandbox.fast_plots import ROW_THRESHOLD
+from src.sandbox.engines import DEFAULT_ENGINE
+from src.prompt.prompt_builder import build_prompt
+
 def react_analysis_prompt(state):
+    """Prompt ReAct; com engine duckdb/polars ganha a variante que pede SQL ou Polars lazy."""
+    engine = state.get("engine") or DEFAULT_ENGINE
+    name = "react" if engine == "pandas" else f"react-{engine}"
+    return build_prompt(state, lambda context: _render(state, context, engine), name)
+
+def _render(state, context, engine="pandas"):
     data_info = state.get('data_info', {})
-    schema = state["schema"]
     dataset_shape = data_info.get('shape', 'N/A')
     total_rows = data_info.get('total_rows', 'N/A')
+    tables_section = _tables_section(context['tables_text'])
+    engine_section = ENGINE_SECTIONS.get(engine, "")
+    sample_rows = context.get('profile_sample_rows')
+    if sample_rows:
+        profile_scope = (
+            f"contagens, nulos, mín, máx e média exatos; quantis, desvio padrão, correlações, "
+            f"histogramas e valores distintos estimados em uma amostra de {sample_rows:,} linhas"
+        )
+        profile_intro = (
+            "Existe um objeto `profile` com os agregados acima, parte deles estimada em amostra. "
+            "Use-o para visão geral; se a pergunta pedir valores exatos, calcule-os sobre as colunas necessárias:"
+        )
+        describe_hint = "`profile.describe` (estimativa de `df.describe()`)"
+        corr_hint = "`profile.corr` (estimativa de `df.corr(numeric_only=True)`)"
+    else:
+        profile_scope = "todos os registros"
+        profile_intro = "Existe um objeto `profile` com agregados já calculados sobre o dataset inteiro. Use-o em vez de recalcular:"
+        describe_hint = "`profile.describe` (= `df.describe()`)"
+        corr_hint = "`profile.corr` (= `df.corr(numeric_only=True)`)"
 
     return f"""
         Você é um agente especialista em análise de dados.  
-        Você recebe um DataFrame Pandas chamado `df` já carregado, com {dataset_shape} ({total_rows:,} linhas) e colunas {list(schema.keys())}.
+        Você recebe um DataFrame Pandas chamado `df` já carregado, com {dataset_shape} ({total_rows:,} linhas).
+        Colunas por tipo: {context['schema_text']}
 
+        Perfil pré-calculado ({profile_scope}):
+{context['profile_text']}
+{tables_section}{engine_section}
         ## INSTRUÇÕES GERAIS
         - Responda **apenas** com um bloco de código Python, dentro de ```python ... ```
-        - Import todas as bibliotecas necessárias dentro do bloco de código.  
+        - Importe dentro do bloco de código as bibliotecas necessárias (exceto `plt` e `sns`).  
         - Não escreva texto fora do bloco de código.  
         - Não use `pd.read_csv`, o DataFrame já está disponível como `df`.
+        - Se a análise usar poucas colunas, prefira `load_columns([...])`, que lê apenas essas colunas do cache.
+        - {profile_intro}
+            • {describe_hint}, {corr_hint}, `profile.quantiles`
+            • `profile.null_counts`, `profile.cardinality`, `profile.ranges()` (min, max, amplitude)
+            • `profile.histograms[col]` → `(counts, bin_edges)`; desenhe com `ax.stairs(counts, bin_edges, fill=True)`
+        - Para gráficos use o objeto `fastplot`, que agrega/amostra automaticamente datasets grandes:
+            • `fastplot.hist(ax, serie, bins=50)`, `fastplot.boxplot(ax, df_ou_serie)`
+            • `fastplot.scatter(ax, x, y, hue=None)` (hexbin/amostra acima de {ROW_THRESHOLD:,} linhas), `fastplot.sample(df, n)`
+            • Não reimporte `plt` nem `sns`: eles já estão disponíveis.
+        - Respeite os tipos acima: colunas `category`/`string` não são numéricas, colunas `datetime64` já estão convertidas (não use `pd.to_datetime` de novo) e não converta inteiros/floats reduzidos para tipos maiores sem necessidade.
         - Para as analises ao fazer o gráfico NUNCA use grids fixos como (3,3), (2,2), (4,4).
         - Sempre calcule dinamicamente o número de linhas e colunas do subplot
         - Para QUALQUER pergunta de análise, você DEVE:
             1. Calcular os valores solicitados
             2. SEMPRE criar uma visualização  
+        - Cada figura salva com `plt.savefig(img_path)` é exibida ao usuário; para análises com vários painéis você pode salvar mais de uma figura.
         - Sempre termine com:
         plt.savefig(img_path, dpi=150, bbox_inches='tight')
         plt.close()
@@ -35,20 +78,20 @@ def react_analysis_prompt(state):
             fig, axes = plt.subplots(n_rows, n_cols, figsize=(6*n_cols, 4*n_rows))
             axes = axes.flatten()
             for i, col in enumerate(numeric_cols):
-                axes[i].hist(df[col].dropna(), bins=50, color='blue', alpha=0.7)
+                fastplot.hist(axes[i], df[col], bins=50, color='blue', alpha=0.7)
                 axes[i].set_title(col)
             plt.tight_layout()
             ```
 
         2. **Estatísticas descritivas**
-        - Use `df.describe()` ou cálculos de min/máx/média.
+        - Use {describe_hint} ou `profile.ranges()` para min/máx.
         - Apenas `print(json.dumps(...))`, sem gráfico.
 
         3. **Correlação**
-        - Use `sns.heatmap(df.corr(), annot=True, cmap="coolwarm")`.
+        - Use `sns.heatmap(profile.corr, annot=True, cmap="coolwarm")`.
 
         4. **Outliers**
-        - Use `sns.boxplot()` em colunas numéricas.
+        - Use `fastplot.boxplot(ax, df[numeric_cols])` (estatísticas via quantis, sem desenhar milhões de pontos).
 
         5. **Tendências temporais**
         - Se existir coluna datetime: faça `df.resample(...)` e `plt.plot(...)`.
@@ -61,19 +104,17 @@ def react_analysis_prompt(state):
         - Clusters / agrupamentos:
             • Aplique PCA (2 componentes) para reduzir dimensões
             • Aplique KMeans (padrão 3 clusters, a não ser que o usuário peça outro número)
-            • Gere gráfico de dispersão em 2D com cores por cluster
+            • Gere gráfico de dispersão em 2D com cores por cluster usando `fastplot.scatter(ax, x, y, hue=clusters)`
             • Texto final deve explicar se há padrões ou separações claras
         
         8. **Intervalos**, **Variabilidade**, **Desvio Padrão** ou  **Variância**
         - Sempre que o usuário pedir intervalos, você deve usar o exemplo abaixo:
             ```python
-            import matplotlib.pyplot as plt
             import pandas as pd
 
             numeric_cols = df.select_dtypes(include=['number']).columns
 
-            ranges_df = df[numeric_cols].agg(['min', 'max']).T
-            ranges_df['amplitude'] = ranges_df['max'] - ranges_df['min']
+            ranges_df = profile.ranges()
 
             for col in numeric_cols:
                 min_val = ranges_df.loc[col, 'min']
@@ -96,8 +137,6 @@ def react_analysis_prompt(state):
         ```python
         - Sempre inicie o bloco de código Python com:
             import pandas as pd
-            import matplotlib.pyplot as plt
-            import seaborn as sns
             import numpy as np
             import json
             import math
@@ -108,7 +147,7 @@ def react_analysis_prompt(state):
             fig, axes = plt.subplots(n_rows, n_cols, figsize=(6*n_cols, 4*n_rows))
             axes = axes.flatten()
             for i, col in enumerate(numeric_cols):
-                axes[i].hist(df[col].dropna(), bins=30)
+                fastplot.hist(axes[i], df[col], bins=30)
                 axes[i].set_title(col)
             plt.tight_layout()
             plt.savefig(img_path, dpi=150, bbox_inches='tight')
@@ -116,3 +155,34 @@ def react_analysis_prompt(state):
             print(json.dumps({{"answer": "Histogramas gerados para todas as variáveis numéricas."}}, ensure_ascii=False))
             ```
     """
+
+def _tables_section(tables_text):
+    if not tables_text:
+        return ""
+    return f"""
+        Tabelas da sessão (dicionário `tables`, carregadas sob demanda):
+{tables_text}
+        - Acesse com `tables["nome"]` ou, para poucas colunas, `tables.load("nome", [...])`.
+        - Para combinar tabelas use `tables.join("a", "b", on="chave", how="inner", columns=[...])`
+          e `tables.concat(["a", "b"], columns=[...])`, nunca `pd.merge`/`pd.concat` sobre as tabelas inteiras.
+        - Passe em `columns` apenas as colunas necessárias.
+"""
+
+ENGINE_SECTIONS = {
+    "duckdb": """
+        ## ENGINE: DUCKDB
+        - Faça filtros, agrupamentos e agregações em SQL com `sql("...")`: o dataset é a tabela `df`
+          (ex.: `sql("SELECT regiao, AVG(valor) AS media FROM df GROUP BY regiao")`).
+        - `sql(...)` devolve uma relação duckdb; converta para pandas com `.df()` apenas o resultado
+          agregado que vai para o gráfico ou para a resposta.
+        - Não faça `groupby`/filtros do pandas sobre o `df` inteiro; não importe duckdb (use `sql`/`con`).
+""",
+    "polars": """
+        ## ENGINE: POLARS
+        - Use o `LazyFrame` `lf` (já carregado) e o módulo `pl`: monte a consulta de forma lazy
+          (ex.: `lf.group_by("regiao").agg(pl.col("valor").mean()).collect()`).
+        - Converta para pandas com `.collect().to_pandas()` apenas o resultado agregado que vai
+          para o gráfico ou para a resposta.
+        - Não faça `groupby`/filtros do pandas sobre o `df` inteiro; não importe polars (use `pl`).
+""",
+}
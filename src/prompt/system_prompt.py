@@ -1,15 +1,34 @@
+from src.prompt.prompt_builder import build_prompt
+
 def default_system_prompt(state):
+    return build_prompt(state, lambda context: _render(state, context), "default")
+
+def _render(state, context):
     data_info = state.get('data_info', {})
     dataset_shape = data_info.get('shape', 'N/A')
-    schema = state["schema"]
-    
+    sample_rows = context.get('profile_sample_rows')
+    if sample_rows:
+        scope = "TODOS os dados para contagens, nulos, mín, máx e média; o restante é estimado em amostra"
+        profile_header = (
+            "Perfil pré-calculado (contagens, nulos, mín, máx e média sobre todos os registros; "
+            f"quantis, correlações e valores distintos estimados em {sample_rows:,} linhas)"
+        )
+        basis = "Quando citar quantis, correlações ou valores distintos, diga que são estimativas de uma amostra."
+    else:
+        scope = "TODOS os dados disponíveis para máxima precisão"
+        profile_header = "Perfil pré-calculado sobre todos os registros"
+        basis = "Mencione que a análise é baseada em todos os registros do dataset."
+
     return f"""
             Você é um assistente de análise de dados.
 
             Dataset: {dataset_shape} linhas/colunas
-            Análise: TODOS os dados disponíveis para máxima precisão
-            Colunas disponíveis: {list(schema.keys())}
-            
+            Análise: {scope}
+            Colunas disponíveis (por tipo): {context['schema_text']}
+
+            {profile_header} (use estes valores nas respostas):
+{context['profile_text']}
+{_tables_section(context['tables_text'])}            
             REGRA IMPORTANTE:
             - NÃO use pd.read_csv nem recarregue o dataset.
             - O DataFrame já está disponível na variável df.
@@ -36,5 +55,13 @@ def default_system_prompt(state):
         
             RESPONDA COM TEXTO EXPLICATIVO E MARKDOWN formatado.
             Seja conciso e direto, sem incluir código Python.
-            Mencione que a análise é baseada em todos os registros do dataset.
-        """
\ No newline at end of file
+            {basis}
+        """
+
+def _tables_section(tables_text):
+    if not tables_text:
+        return ""
+    return f"""
+            Outras tabelas carregadas na sessão:
+{tables_text}
+"""
@@ -0,0 +1,130 @@
+import json
+import math
+import os
+import tempfile
+import threading
+from collections import Counter, defaultdict
+
+from src.cache.response_cache import question_tokens
+
+DEFAULT_LOG_PATH = os.path.join(tempfile.gettempdir(), "csv_agent_router", "questions.jsonl")
+# Acima deste tamanho o log é rotacionado: fica só o arquivo atual e um anterior (`.1`)
+DEFAULT_MAX_LOG_BYTES = 5 * 1024 ** 2
+MIN_TRAINING_SAMPLES = 50
+MIN_CONFIDENCE = 0.85
+
+
+# ===========================
+# Question Log
+# ===========================
+class QuestionLog:
+    """
+    Registro JSONL (`{"question", "route"}`) das perguntas já roteadas, usado
+    no treino. As perguntas são dados do usuário: o arquivo é criado só para
+    o dono (0600) e rotacionado acima de `max_bytes`.
+    """
+
+    def __init__(self, path=DEFAULT_LOG_PATH, max_bytes=DEFAULT_MAX_LOG_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def append(self, question, route):
+        record = json.dumps({"question": question, "route": route}, ensure_ascii=False)
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) > self.max_bytes:
+                os.replace(self.path, f"{self.path}.1")
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+            with os.fdopen(fd, "a", encoding="utf-8") as f:
+                f.write(record + "\n")
+
+    def read(self):
+        samples = []
+        for path in (f"{self.path}.1", self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if record.get("question") and record.get("route"):
+                        samples.append((record["question"], record["route"]))
+        return samples
+
+
+# ===========================
+# Naive Bayes Classifier
+# ===========================
+class QuestionClassifier:
+    """
+    Naive Bayes multinomial sobre os tokens normalizados da pergunta.
+    Pequeno o bastante para treinar em milissegundos a cada início do app.
+    """
+
+    def __init__(self):
+        self.class_counts = Counter()
+        self.token_counts = defaultdict(Counter)
+        self.vocabulary = set()
+
+    @property
+    def trained(self):
+        return len(self.class_counts) >= 2
+
+    def fit(self, samples):
+        self.class_counts.clear()
+        self.token_counts.clear()
+        self.vocabulary.clear()
+        for question, label in samples:
+            tokens = question_tokens(question)
+            self.class_counts[label] += 1
+            self.token_counts[label].update(tokens)
+            self.vocabulary.update(tokens)
+        return self
+
+    def predict_proba(self, question):
+        tokens = [token for token in question_tokens(question) if token in self.vocabulary]
+        total = sum(self.class_counts.values())
+        vocab_size = len(self.vocabulary)
+
+        log_probs = {}
+        for label, count in self.class_counts.items():
+            label_total = sum(self.token_counts[label].values())
+            score = math.log(count / total)
+            for token in tokens:
+                score += math.log((self.token_counts[label][token] + 1) / (label_total + vocab_size))
+            log_probs[label] = score
+
+        top = max(log_probs.values())
+        exp = {label: math.exp(score - top) for label, score in log_probs.items()}
+        norm = sum(exp.values())
+        return {label: value / norm for label, value in exp.items()}
+
+    def predict(self, question):
+        probs = self.predict_proba(question)
+        label = max(probs, key=probs.get)
+        return label, probs[label]
+
+
+def train_from_log(log, min_samples=MIN_TRAINING_SAMPLES):
+    """Treina com o log de perguntas; retorna `None` se ainda não houver dados suficientes."""
+    samples = log.read()
+    if len(samples) < min_samples:
+        return None
+    classifier = QuestionClassifier().fit(samples)
+    if not classifier.trained:
+        return None
+    print(f"🎓 Classificador de intenção treinado com {len(samples)} perguntas")
+    return classifier
+
+
+def classifier_route(classifier, min_confidence=MIN_CONFIDENCE):
+    """Adapta o classificador à interface de rota; abstém-se abaixo da confiança mínima."""
+    def route(question, state):
+        label, confidence = classifier.predict(question)
+        if confidence < min_confidence:
+            return None
+        return {"route": label, "reason": "classificador", "confidence": confidence}
+    return route
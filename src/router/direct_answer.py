@@ -0,0 +1,68 @@
+import re
+
+from src.cache.response_cache import normalize_question
+
+ROW_COUNT = re.compile(
+    r"\b(quant[ao]s\s+(linhas|registros|observacoes|amostras)|numero\s+de\s+(linhas|registros)"
+    r"|total\s+de\s+(linhas|registros)|how\s+many\s+rows|number\s+of\s+rows|row\s+count)\b"
+)
+COLUMN_COUNT = re.compile(
+    r"\b(quant[ao]s\s+colunas|numero\s+de\s+colunas|total\s+de\s+colunas"
+    r"|how\s+many\s+columns|number\s+of\s+columns|column\s+count)\b"
+)
+COLUMN_LIST = re.compile(
+    r"\b(quais\s+(sao\s+)?(as\s+)?colunas|liste\s+(as\s+)?colunas|nomes?\s+das\s+colunas"
+    r"|colunas\s+disponiveis|which\s+columns|list\s+(the\s+|all\s+)?columns|column\s+names)\b"
+)
+DTYPES = re.compile(
+    r"\b(tipos?\s+(de\s+dados|das\s+colunas|de\s+cada\s+coluna)|dtypes?"
+    r"|data\s+types?|column\s+types?)\b"
+)
+SHAPE = re.compile(r"\b(shape|dimens(ao|oes)|tamanho\s+do\s+dataset|size\s+of\s+the\s+dataset)\b")
+
+# Perguntas com estes termos pedem mais do que uma consulta simples
+COMPLEX = re.compile(
+    r"\b(por|cada|entre|onde|where|per|by|group|grafico|plot|media|mean|maior|menor|acima|abaixo"
+    r"|nul\w*|null\w*|missing|faltantes?|vazi\w*|unic\w*|unique|distint\w*|duplicad\w*"
+    r"|contem|com|with|have|has|containing)\b"
+)
+
+
+# ===========================
+# Direct Answer Router
+# ===========================
+def direct_route(question, state):
+    """
+    Responde consultas simples (nº de linhas/colunas, nomes e tipos das
+    colunas) direto do `data_info`/`schema`, sem chamar o LLM.
+    """
+    normalized = normalize_question(question)
+    data_info = state.get("data_info") or {}
+    schema = state.get("schema") or {}
+    if not data_info or COMPLEX.search(normalized.replace("de cada coluna", "")):
+        return None
+
+    total_rows = data_info.get("total_rows")
+    total_columns = data_info.get("total_columns", len(schema))
+    parts = []
+
+    if SHAPE.search(normalized):
+        parts.append(f"O dataset tem **{total_rows:,} linhas** e **{total_columns} colunas**.")
+    else:
+        if ROW_COUNT.search(normalized):
+            parts.append(f"O dataset tem **{total_rows:,} linhas**.")
+        if COLUMN_COUNT.search(normalized):
+            parts.append(f"O dataset tem **{total_columns} colunas**.")
+    if COLUMN_LIST.search(normalized):
+        parts.append("**Colunas:**\n\n" + "\n".join(f"- `{col}`" for col in schema))
+    if DTYPES.search(normalized):
+        parts.append("**Tipos das colunas:**\n\n" + "\n".join(f"- `{col}`: {dtype}" for col, dtype in schema.items()))
+
+    if not parts:
+        return None
+    return {
+        "route": "direct",
+        "answer": "\n\n".join(parts),
+        "reason": "consulta de metadados",
+        "confidence": 1.0,
+    }
@@ -0,0 +1,65 @@
+import re
+
+from src.cache.response_cache import normalize_question
+from src.prompt.prompt_builder import rank_columns
+
+# Intenções atendidas pelas rotinas prontas de `src/analysis/routines.py`
+INTENTS = {
+    "histograms": re.compile(r"\b(histogram\w*|distribuic\w*|distribution\w*)"),
+    "describe": re.compile(
+        r"\b(resumo\s+estatistic\w*|estatisticas?\s+(descritiv\w*|basic\w*)|analise\s+descritiva"
+        r"|describe|summary\s+statistics|descriptive\s+(statistics|analysis))"
+    ),
+    "correlation": re.compile(r"\b(correlac\w*|correla\w*\s+entre|correlation\w*|heatmap|mapa\s+de\s+calor)"),
+    "outliers": re.compile(r"\b(boxplot\w*|outliers?|valores?\s+atipicos?|anomal\w*)"),
+    "ranges": re.compile(
+        r"\b(intervalos?|amplitudes?|ranges?|variabilidade|variability"
+        r"|desvio\s+padrao|standard\s+deviation|variancia|variance)\b"
+    ),
+    "clusters": re.compile(r"\b(clusters?|clusteriz\w*|agrupament\w*|kmeans|k\s+means|pca|segmenta\w*)"),
+}
+
+# Pedidos condicionados (por grupo, filtro, período...) continuam indo para o LLM
+CONDITIONAL = re.compile(
+    r"\b(por|by|per|group|grupo\s+de|onde|where|quando|when|se|if|filtr\w*|ao\s+longo|over\s+time"
+    r"|tempo|temporal|mensal|anual|diari\w*|monthly|daily|yearly|versus|vs|contra|acima|abaixo)\b"
+)
+N_CLUSTERS = re.compile(r"\b(\d{1,2})\s*(clusters?|grupos?|groups?|segmentos?)\b")
+
+
+# ===========================
+# Fast Path Router
+# ===========================
+def fastpath_route(question, state):
+    """
+    Reconhece pedidos que correspondem a exatamente uma rotina pronta
+    (histogramas, describe, correlação, outliers, intervalos, PCA+KMeans) e
+    os despacha sem chamar o LLM. Desative com `state["fastpath"] = False`.
+    """
+    if not state.get("fastpath", True) or not state.get("dataset_id"):
+        return None
+
+    normalized = normalize_question(question)
+    if CONDITIONAL.search(normalized):
+        return None
+
+    matches = [name for name, pattern in INTENTS.items() if pattern.search(normalized)]
+    if len(matches) != 1:
+        return None
+
+    options = {}
+    n_clusters = N_CLUSTERS.search(normalized)
+    if matches[0] == "clusters" and n_clusters:
+        options["n_clusters"] = int(n_clusters.group(1))
+
+    # Colunas citadas pelo nome restringem a rotina a elas
+    _, columns = rank_columns(question, state.get("schema") or {})
+
+    return {
+        "route": "fastpath",
+        "analysis": matches[0],
+        "columns": columns,
+        "options": options,
+        "reason": f"rotina '{matches[0]}'",
+        "confidence": 0.9,
+    }
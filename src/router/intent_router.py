@@ -0,0 +1,73 @@
+import os
+import threading
+
+from src.router.classifier import QuestionLog, classifier_route, train_from_log, DEFAULT_LOG_PATH
+from src.router.direct_answer import direct_route
+from src.router.fastpath_route import fastpath_route
+from src.router.keyword_router import keyword_route
+
+ROUTES = ("direct", "fastpath", "code", "text")
+
+
+# ===========================
+# Intent Router
+# ===========================
+class IntentRouter:
+    """
+    Decide a rota de cada pergunta consultando uma cadeia de roteadores
+    `fn(question, state) -> dict | None`; o primeiro que não se abstém vence.
+
+    Ordem padrão: resposta direta (metadados) → rotinas prontas → classificador
+    aprendido (opcional) → palavras-chave. Rotas: `direct` e `fastpath` (sem
+    LLM), `code` e `text`.
+    """
+
+    def __init__(self, routers=None, log=None):
+        self.routers = list(routers) if routers is not None else [direct_route, fastpath_route, keyword_route]
+        self.log = log
+
+    def register(self, router, position=None):
+        """Adiciona um roteador à cadeia (por padrão, antes do fallback de palavras-chave)."""
+        position = len(self.routers) - 1 if position is None else position
+        self.routers.insert(max(position, 0), router)
+
+    def route(self, question, state=None):
+        state = state or {}
+        for router in self.routers:
+            decision = router(question, state)
+            if decision is not None and decision.get("route") in ROUTES:
+                return decision
+        return {"route": "text", "reason": "padrão", "confidence": 0.0}
+
+    def record(self, question, route):
+        """Registra a rota efetivamente usada, para treinar o classificador."""
+        if self.log is not None and route in ("code", "text"):
+            try:
+                self.log.append(question, route)
+            except OSError as e:
+                print(f"⚠️ Falha ao registrar pergunta no log do roteador: {e}")
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_intent_router():
+    """
+    Roteador único do processo. As perguntas só são registradas em disco
+    quando há uso para elas: com `CSV_AGENT_ROUTER_LOG` definido ou com
+    `CSV_AGENT_ROUTER=learned`, que treina o classificador a partir do log
+    (padrão: `DEFAULT_LOG_PATH`) na primeira chamada.
+    """
+    global _router
+    with _router_lock:
+        if _router is None:
+            learned = os.environ.get("CSV_AGENT_ROUTER", "keyword") == "learned"
+            log_path = os.environ.get("CSV_AGENT_ROUTER_LOG") or (DEFAULT_LOG_PATH if learned else None)
+            log = QuestionLog(log_path) if log_path else None
+            _router = IntentRouter(log=log)
+            if learned:
+                classifier = train_from_log(log)
+                if classifier is not None:
+                    _router.register(classifier_route(classifier))
+        return _router
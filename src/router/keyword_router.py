@@ -0,0 +1,43 @@
+import re
+
+from src.cache.response_cache import normalize_question
+
+# Radicais (sem acento) que indicam análise com código/gráfico, em português e inglês.
+# Cada termo casa apenas no início de palavra: "calcul" casa "calcule"/"calculate",
+# mas não trechos no meio de outras palavras.
+CODE_TERMS = [
+    # português
+    "grafico", "plot", "histograma", "boxplot", "scatter", "dispersao", "correlac",
+    "distribuic", "exploratori", "eda", "analise", "estatistic", "intervalo",
+    "minimo", "maximo", "media", "mediana", "moda", "desvio padrao", "variancia",
+    "variabilidade", "outlier", "tendencia", "amplitude", "calcul", "mostre",
+    "crie", "gere", "padroes", "cluster", "agrupament", "quartil", "percentil",
+    "visualiz", "heatmap", "mapa de calor", "compar", "soma",
+    # inglês
+    "chart", "graph", "histogram", "correlation", "distribution", "exploratory",
+    "analysis", "analyze", "analyse", "statistic", "minimum", "maximum", "mean",
+    "average", "median", "standard deviation", "variance", "variability",
+    "trend", "range", "calculate", "compute", "show", "create", "pattern",
+    "quantile", "percentile", "sum of",
+]
+
+
+def compile_terms(terms):
+    """Um único regex compilado para todos os termos (alternância ordenada do mais longo)."""
+    ordered = sorted(set(terms), key=len, reverse=True)
+    pattern = r"\b(?:" + "|".join(re.escape(term).replace(r"\ ", r"\s+") for term in ordered) + r")"
+    return re.compile(pattern)
+
+
+CODE_PATTERN = compile_terms(CODE_TERMS)
+
+
+# ===========================
+# Keyword Router
+# ===========================
+def keyword_route(question, state=None):
+    """Roteia para `code` se a pergunta contém algum termo de análise; senão `text`."""
+    match = CODE_PATTERN.search(normalize_question(question))
+    if match:
+        return {"route": "code", "reason": f"termo '{match.group(0)}'", "confidence": 0.7}
+    return {"route": "text", "reason": "nenhum termo de análise", "confidence": 0.6}
@@ -0,0 +1,287 @@
+import ast
+
+from src.data.tables import table_name
+from src.sandbox.fast_plots import ROW_THRESHOLD
+
+IMAGE_ARG = "img_path"
+FRAME = "df"
+# Imports que o namespace já provê (com os wrappers para datasets grandes)
+PROVIDED_IMPORTS = {("matplotlib.pyplot", "plt"), ("seaborn", "sns")}
+# Argumentos que tornam uma chamada do seaborn restrita às colunas citadas
+COLUMN_KEYWORDS = {"x", "y", "vars", "x_vars", "y_vars"}
+PAIRPLOT_MAX_VARS = 6
+# Operações linha a linha no Python: viram aviso acima de `ROW_THRESHOLD` linhas
+ROW_LOOP_METHODS = {"iterrows", "itertuples"}
+
+
+# ===========================
+# Code Preparation
+# ===========================
+def prepare_code(code, schema, total_rows=None, tables=()):
+    """
+    Pré-processa o código gerado pelo LLM com uma passada na AST:
+
+    - `read_csv(...)` vira `df` (ou `tables["nome"]` quando o arquivo é uma
+      tabela da sessão) e atribuições a `img_path` e imports de `plt`/`sns`
+      (`import ...` ou `from ... import ...`) são removidos
+    - o caminho passado a `savefig` é trocado por `img_path`
+    - `sns.pairplot(df)` em tabelas com muitas colunas numéricas recebe `vars=`
+    - loops linha a linha (`iterrows`, `apply(axis=1)`) em datasets grandes
+      geram avisos
+
+    Retorna `{"code", "columns", "warnings", "notes"}`. `columns` é a lista
+    de colunas de `df` usadas pelo código, ou None quando ele precisa do
+    DataFrame inteiro (ex.: `df.describe()`, `df.columns`). Código com erro de
+    sintaxe volta sem alterações, para o erro aparecer na execução.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return {"code": code, "columns": None, "warnings": [], "notes": []}
+
+    rewriter = _Rewriter(schema, tables)
+    tree = ast.fix_missing_locations(rewriter.visit(tree))
+
+    warnings = []
+    if total_rows and total_rows > ROW_THRESHOLD:
+        warnings = _row_loop_warnings(tree, total_rows)
+
+    return {
+        "code": ast.unparse(tree),
+        "columns": referenced_columns(tree, schema),
+        "warnings": warnings,
+        "notes": rewriter.notes,
+    }
+
+
+# ===========================
+# I/O Rewriting
+# ===========================
+class _Rewriter(ast.NodeTransformer):
+    def __init__(self, schema, tables):
+        self.schema = schema
+        self.tables = set(tables)
+        self.notes = []
+
+    def visit_Import(self, node):
+        node.names = [alias for alias in node.names if (alias.name, alias.asname) not in PROVIDED_IMPORTS]
+        return node if node.names else None
+
+    def visit_ImportFrom(self, node):
+        # `from matplotlib import pyplot as plt` também trocaria `plt` pelo módulo sem os wrappers
+        module = None if node.level else node.module
+        node.names = [
+            alias for alias in node.names if (f"{module}.{alias.name}", alias.asname) not in PROVIDED_IMPORTS
+        ]
+        return node if node.names else None
+
+    def visit_Assign(self, node):
+        self.generic_visit(node)
+        targets = [target for target in node.targets if not _is_name(target, IMAGE_ARG)]
+        if not targets:
+            return None
+        node.targets = targets
+        # `df = pd.read_csv(...)` vira `df = df` depois da reescrita: descartado
+        if all(_is_name(target, FRAME) for target in targets) and _is_name(node.value, FRAME):
+            return None
+        return node
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        func = node.func
+        if isinstance(func, ast.Attribute) and func.attr == "read_csv":
+            return self._read_csv_source(node)
+        if isinstance(func, ast.Attribute) and func.attr == "savefig":
+            if node.args and _is_path_expr(node.args[0]):
+                node.args[0] = ast.Name(IMAGE_ARG, ast.Load())
+            for keyword in node.keywords:
+                if keyword.arg == "fname" and _is_path_expr(keyword.value):
+                    keyword.value = ast.Name(IMAGE_ARG, ast.Load())
+        if _is_seaborn_call(node, "pairplot"):
+            self._limit_pairplot(node)
+        return node
+
+    def _read_csv_source(self, node):
+        path = node.args[0] if node.args else None
+        if isinstance(path, ast.Constant) and isinstance(path.value, str):
+            name = table_name(path.value)
+            if name in self.tables:
+                return ast.Subscript(ast.Name("tables", ast.Load()), ast.Constant(name), ast.Load())
+        return ast.Name(FRAME, ast.Load())
+
+    def _limit_pairplot(self, node):
+        """Pairplot de todas as colunas numéricas cresce com o quadrado delas: limita a `PAIRPLOT_MAX_VARS`."""
+        if not _is_name(_call_data(node), FRAME):
+            return
+        if any(keyword.arg in COLUMN_KEYWORDS for keyword in node.keywords):
+            return
+        numeric = [col for col, dtype in self.schema.items() if _is_numeric(dtype)]
+        if len(numeric) <= PAIRPLOT_MAX_VARS:
+            return
+        selected = numeric[:PAIRPLOT_MAX_VARS]
+        node.keywords.append(ast.keyword(
+            "vars", ast.List([ast.Constant(col) for col in selected], ast.Load())
+        ))
+        self.notes.append(f"pairplot limitado a {len(selected)} de {len(numeric)} colunas numéricas")
+
+
+# ===========================
+# Column Extraction
+# ===========================
+def referenced_columns(tree, schema):
+    """
+    Colunas de `df` usadas pelo código, ou None se algum uso de `df` depende
+    do DataFrame inteiro. Os usos aceitos são seleções por nome constante
+    (`df["a"]`, `df[["a", "b"]]`, `df.a`, `df.loc[mask, "a"]`,
+    `df[mask]["a"]`, `df.groupby("a")["b"]`), `len(df)` e chamadas do seaborn
+    com `data=df` e `x`/`y`/`vars`.
+    """
+    parents = {child: node for node in ast.walk(tree) for child in ast.iter_child_nodes(node)}
+    constant_lists = _constant_lists(tree)
+
+    used_frame = False
+    for node in ast.walk(tree):
+        if not _is_name(node, FRAME):
+            continue
+        used_frame = True
+        if not _is_projectable(node, parents, schema, constant_lists):
+            return None
+
+    if not used_frame:
+        return []
+
+    # Todo uso de `df` é uma projeção por nome: basta o conjunto de nomes constantes citados
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            names.add(node.value)
+        elif isinstance(node, ast.Attribute) and _is_name(node.value, FRAME):
+            names.add(node.attr)
+    return [col for col in schema if col in names]
+
+
+def _is_projectable(node, parents, schema, constant_lists):
+    if isinstance(node.ctx, (ast.Store, ast.Del)):
+        return True
+    parent = parents.get(node)
+
+    if isinstance(parent, ast.Subscript) and parent.value is node:
+        if _is_column_selection(parent.slice, constant_lists):
+            return True
+        # Filtro por máscara seguido de seleção de colunas: `df[mask]["a"]`
+        outer = parents.get(parent)
+        return (
+            isinstance(outer, ast.Subscript) and outer.value is parent
+            and _is_column_selection(outer.slice, constant_lists)
+        )
+
+    if isinstance(parent, ast.Attribute) and parent.value is node:
+        outer = parents.get(parent)
+        # `df.count()` é o método mesmo que exista uma coluna `count`
+        if parent.attr in schema and not (isinstance(outer, ast.Call) and outer.func is parent):
+            return True
+        if parent.attr == "loc" and isinstance(outer, ast.Subscript):
+            index = outer.slice
+            return (
+                isinstance(index, ast.Tuple) and len(index.elts) == 2
+                and _is_column_selection(index.elts[1], constant_lists)
+            )
+        if parent.attr == "shape" and isinstance(outer, ast.Subscript):
+            return isinstance(outer.slice, ast.Constant) and outer.slice.value == 0
+        if parent.attr == "groupby" and isinstance(outer, ast.Call) and outer.func is parent:
+            selection = parents.get(outer)
+            return (
+                isinstance(selection, ast.Subscript) and selection.value is outer
+                and _is_column_selection(selection.slice, constant_lists)
+            )
+        return False
+
+    if isinstance(parent, ast.Call) and _is_name(parent.func, "len"):
+        return True
+
+    call = parents.get(parent) if isinstance(parent, ast.keyword) else parent
+    if isinstance(call, ast.Call) and _is_seaborn_call(call) and _call_data(call) is node:
+        return any(keyword.arg in COLUMN_KEYWORDS for keyword in call.keywords)
+
+    return False
+
+
+def _is_column_selection(index, constant_lists):
+    if isinstance(index, ast.Constant):
+        return isinstance(index.value, str)
+    if isinstance(index, (ast.List, ast.Tuple)):
+        return all(isinstance(item, ast.Constant) and isinstance(item.value, str) for item in index.elts)
+    if isinstance(index, ast.Name):
+        return index.id in constant_lists
+    return False
+
+
+def _constant_lists(tree):
+    """Variáveis atribuídas uma única vez a uma lista de strings (`cols = ["a", "b"]`)."""
+    assigned, lists = {}, set()
+    for node in ast.walk(tree):
+        targets = []
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, (ast.AugAssign, ast.AnnAssign, ast.For)):
+            targets = [node.target]
+        for target in targets:
+            if isinstance(target, ast.Name):
+                assigned[target.id] = assigned.get(target.id, 0) + 1
+                if isinstance(node, ast.Assign) and _is_column_selection(node.value, set()):
+                    lists.add(target.id)
+    return {name for name in lists if assigned[name] == 1}
+
+
+# ===========================
+# Heavy Operations
+# ===========================
+def _row_loop_warnings(tree, total_rows):
+    warnings = []
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)):
+            continue
+        method = node.func.attr
+        row_apply = method == "apply" and any(
+            keyword.arg == "axis" and isinstance(keyword.value, ast.Constant) and keyword.value.value in (1, "columns")
+            for keyword in node.keywords
+        )
+        if method in ROW_LOOP_METHODS or row_apply:
+            label = "apply(axis=1)" if row_apply else method
+            warnings.append(
+                f"`{label}` na linha {node.lineno} percorre {total_rows:,} linhas no Python; "
+                "prefira operações vetorizadas"
+            )
+    return warnings
+
+
+# ===========================
+# Helpers
+# ===========================
+def _is_name(node, name):
+    return isinstance(node, ast.Name) and node.id == name
+
+
+def _is_path_expr(node):
+    return isinstance(node, (ast.Constant, ast.JoinedStr, ast.BinOp, ast.Call)) and not (
+        isinstance(node, ast.Constant) and not isinstance(node.value, str)
+    )
+
+
+def _is_seaborn_call(node, name=None):
+    func = node.func
+    return (
+        isinstance(func, ast.Attribute) and _is_name(func.value, "sns")
+        and (name is None or func.attr == name)
+    )
+
+
+def _call_data(call):
+    for keyword in call.keywords:
+        if keyword.arg == "data":
+            return keyword.value
+    return call.args[0] if call.args else None
+
+
+def _is_numeric(dtype):
+    return str(dtype).lower().startswith(("int", "uint", "float"))
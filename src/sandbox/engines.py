@@ -0,0 +1,83 @@
+import os
+
+from src.data import columnar_cache
+
+try:
+    import duckdb
+except ImportError:  # duckdb é opcional
+    duckdb = None
+
+try:
+    import polars as pl
+except ImportError:  # polars é opcional
+    pl = None
+
+ENGINE_ENV = "CSV_AGENT_ENGINE"
+ENGINES = ("pandas", "duckdb", "polars")
+DEFAULT_ENGINE = "pandas"
+
+
+# ===========================
+# Engine Selection
+# ===========================
+def is_available(engine):
+    if engine == "duckdb":
+        return duckdb is not None
+    if engine == "polars":
+        return pl is not None
+    return engine == "pandas"
+
+
+def resolve_engine(state):
+    """
+    Engine pedido em `state["engine"]` ou `CSV_AGENT_ENGINE`; volta para
+    pandas se o pacote não estiver instalado. Chamado uma vez por pergunta
+    (`prepare_request`), que grava o resultado em `state["engine"]`.
+    """
+    engine = (state.get("engine") or os.environ.get(ENGINE_ENV) or DEFAULT_ENGINE).lower()
+    if engine not in ENGINES:
+        print(f"⚠️ Engine desconhecido '{engine}', usando pandas")
+        return DEFAULT_ENGINE
+    if not is_available(engine):
+        print(f"⚠️ Engine '{engine}' não instalado, usando pandas")
+        return DEFAULT_ENGINE
+    return engine
+
+
+# ===========================
+# Namespace
+# ===========================
+def engine_namespace(engine, df, columnar_path=None):
+    """
+    Variáveis extras do código gerado para o engine escolhido:
+
+    - duckdb: `con` (conexão com o dataset registrado como a tabela `df`) e
+      `sql(query)`, que devolve uma relação duckdb (`.df()` converte para pandas)
+    - polars: `pl` e `lf`, um `LazyFrame` do dataset (`.collect().to_pandas()`)
+
+    Com cache colunar, o engine lê o arquivo Arrow via memory-map em vez de
+    copiar o DataFrame pandas.
+    """
+    if engine == "duckdb":
+        con = duckdb.connect()
+        if columnar_cache.exists(columnar_path):
+            con.register("df", columnar_cache.read_table(columnar_path))
+        else:
+            con.register("df", df)
+        return {"con": con, "sql": con.sql}
+
+    if engine == "polars":
+        if columnar_cache.exists(columnar_path):
+            lf = pl.scan_ipc(columnar_path, memory_map=True)
+        else:
+            lf = pl.from_pandas(df).lazy()
+        return {"pl": pl, "lf": lf}
+
+    return {}
+
+
+def close_engine(namespace):
+    """Fecha a conexão duckdb aberta por `engine_namespace` (se houver)."""
+    con = namespace.get("con")
+    if con is not None:
+        con.close()
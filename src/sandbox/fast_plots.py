@@ -0,0 +1,226 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+# Acima deste número de linhas os gráficos passam a usar agregação/amostragem
+ROW_THRESHOLD = 200_000
+SAMPLE_SIZE = 50_000
+MAX_FLIERS = 2_000
+SAMPLE_SEED = 0
+
+
+# ===========================
+# Plot Accelerator
+# ===========================
+class PlotAccelerator:
+    """
+    Funções de gráfico para datasets grandes, expostas ao código gerado como
+    `fastplot`:
+
+    - `fastplot.hist(ax, serie, bins=None)`: histograma pré-calculado com numpy (exato)
+    - `fastplot.boxplot(ax, df_ou_serie)`: estatísticas do boxplot via quantis (exato)
+    - `fastplot.scatter(ax, x, y, hue=None)`: amostra estratificada ou hexbin
+    - `fastplot.sample(df, n, stratify=None)`: amostra aleatória/estratificada
+
+    Sempre que uma amostragem é aplicada, uma nota é registrada em `notes`
+    e anexada à resposta final.
+    """
+
+    def __init__(self, row_threshold=ROW_THRESHOLD, sample_size=SAMPLE_SIZE):
+        self.row_threshold = row_threshold
+        self.sample_size = sample_size
+        self.notes = []
+
+    def _note(self, text):
+        if text not in self.notes:
+            self.notes.append(text)
+
+    def is_large(self, data):
+        return data is not None and len(data) > self.row_threshold
+
+    def sample(self, data, n=None, stratify=None):
+        """Amostra uniforme (ou estratificada por `stratify`) de no máximo `n` linhas."""
+        n = n or self.sample_size
+        if len(data) <= n:
+            return data
+
+        if stratify is not None and isinstance(data, pd.DataFrame) and stratify in data.columns:
+            # Sorteio por posições dentro de cada grupo: a coluna do grupo continua no resultado
+            fraction = n / len(data)
+            rng = np.random.default_rng(SAMPLE_SEED)
+            positions = [
+                rng.choice(group, max(1, int(round(len(group) * fraction))), replace=False)
+                for group in data.groupby(stratify, observed=True, sort=False).indices.values()
+            ]
+            sampled = data.iloc[np.sort(np.concatenate(positions))] if positions else data.iloc[:0]
+            self._note(f"amostra estratificada por `{stratify}` de {len(sampled):,} de {len(data):,} linhas")
+            return sampled
+
+        self._note(f"amostra aleatória de {n:,} de {len(data):,} linhas")
+        return data.sample(n, random_state=SAMPLE_SEED)
+
+    def hist(self, ax, data, bins=None, **kwargs):
+        """
+        Histograma com contagem feita pelo numpy; desenha só as barras. Como
+        `ax.hist`: `bins` padrão do matplotlib e retorno `(n, bins, patches)`.
+        """
+        values = _finite_values(data)
+        bins = plt.rcParams["hist.bins"] if bins is None else bins
+        counts, edges = np.histogram(values, bins=bins)
+        kwargs.setdefault("alpha", 0.7)
+        patches = ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge", **kwargs)
+        return counts, edges, patches
+
+    def boxplot(self, ax, data, **kwargs):
+        """Boxplot a partir de quantis; outliers desenhados limitados a `MAX_FLIERS` por coluna."""
+        frame = data.to_frame() if isinstance(data, pd.Series) else data
+        frame = frame.select_dtypes(include=["number"])
+
+        stats = []
+        for col in frame.columns:
+            values = _finite_values(frame[col])
+            if values.size == 0:
+                continue
+            q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+            iqr = q3 - q1
+            low, high = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+            inside = values[(values >= low) & (values <= high)]
+            fliers = values[(values < low) | (values > high)]
+            if fliers.size > MAX_FLIERS:
+                rng = np.random.default_rng(SAMPLE_SEED)
+                fliers = rng.choice(fliers, MAX_FLIERS, replace=False)
+                self._note(f"outliers de `{col}` exibidos por amostra de {MAX_FLIERS:,} pontos")
+            stats.append({
+                "label": str(col),
+                "med": median,
+                "q1": q1,
+                "q3": q3,
+                "whislo": inside.min() if inside.size else q1,
+                "whishi": inside.max() if inside.size else q3,
+                "fliers": fliers,
+            })
+
+        ax.bxp(stats, **kwargs)
+        return stats
+
+    def scatter(self, ax, x, y, hue=None, data=None, method="auto", gridsize=60, **kwargs):
+        """
+        Dispersão. Acima do limite de linhas usa hexbin (densidade) quando não
+        há `hue`; com `hue`, usa amostra estratificada pela categoria.
+        """
+        if data is not None:
+            frame = data
+            x_col, y_col = x, y
+        else:
+            frame = pd.DataFrame({"x": np.asarray(x), "y": np.asarray(y)})
+            if hue is not None:
+                frame["hue"] = np.asarray(hue)
+                hue = "hue"
+            x_col, y_col = "x", "y"
+
+        if not self.is_large(frame):
+            return _scatter(ax, frame, x_col, y_col, hue, **kwargs)
+
+        if method == "hexbin" or (method == "auto" and hue is None):
+            self._note(f"dispersão de {len(frame):,} pontos exibida como densidade (hexbin)")
+            return ax.hexbin(frame[x_col], frame[y_col], gridsize=gridsize, mincnt=1, cmap="viridis")
+
+        sampled = self.sample(frame, stratify=hue)
+        return _scatter(ax, sampled, x_col, y_col, hue, **kwargs)
+
+
+def _scatter(ax, frame, x_col, y_col, hue, **kwargs):
+    kwargs.setdefault("s", 8)
+    kwargs.setdefault("alpha", 0.6)
+    if hue is None:
+        return ax.scatter(frame[x_col], frame[y_col], **kwargs)
+    for label, group in frame.groupby(hue, observed=True):
+        ax.scatter(group[x_col], group[y_col], label=str(label), **kwargs)
+    ax.legend()
+    return ax
+
+
+def _finite_values(data):
+    values = pd.Series(data).to_numpy(dtype="float64", na_value=np.nan)
+    return values[np.isfinite(values)]
+
+
+# ===========================
+# Library Wrappers
+# ===========================
+class _Proxy:
+    def __init__(self, module, accelerator):
+        self._module = module
+        self._accel = accelerator
+
+    def __getattr__(self, name):
+        return getattr(self._module, name)
+
+
+class FastSeaborn(_Proxy):
+    """`sns` do sandbox: amostra/agrega automaticamente acima do limite de linhas."""
+
+    def _data(self, args, kwargs):
+        return kwargs.get("data", args[0] if args else None)
+
+    def _with_sample(self, fn, args, kwargs, stratify=None):
+        data = self._data(args, kwargs)
+        if isinstance(data, (pd.DataFrame, pd.Series)) and self._accel.is_large(data):
+            sampled = self._accel.sample(data, stratify=stratify if isinstance(stratify, str) else None)
+            if "data" in kwargs:
+                kwargs["data"] = sampled
+            else:
+                args = (sampled,) + tuple(args[1:])
+        return fn(*args, **kwargs)
+
+    def scatterplot(self, *args, **kwargs):
+        return self._with_sample(self._module.scatterplot, args, kwargs, kwargs.get("hue"))
+
+    def pairplot(self, *args, **kwargs):
+        return self._with_sample(self._module.pairplot, args, kwargs, kwargs.get("hue"))
+
+    def kdeplot(self, *args, **kwargs):
+        return self._with_sample(self._module.kdeplot, args, kwargs)
+
+    def stripplot(self, *args, **kwargs):
+        return self._with_sample(self._module.stripplot, args, kwargs, kwargs.get("hue"))
+
+    def swarmplot(self, *args, **kwargs):
+        return self._with_sample(self._module.swarmplot, args, kwargs, kwargs.get("hue"))
+
+    def histplot(self, *args, **kwargs):
+        data = self._data(args, kwargs)
+        x = kwargs.get("x")
+        simple = set(kwargs) <= {"data", "x", "bins", "ax", "color", "alpha"}
+        if simple and self._accel.is_large(data):
+            series = data[x] if x is not None and isinstance(data, pd.DataFrame) else data
+            if isinstance(series, pd.Series):
+                ax = kwargs.get("ax") or plt.gca()
+                style = {k: kwargs[k] for k in ("color", "alpha") if k in kwargs}
+                # Mesmo padrão de bins do seaborn
+                self._accel.hist(ax, series, bins=kwargs.get("bins", "auto"), **style)
+                return ax
+        return self._module.histplot(*args, **kwargs)
+
+    def boxplot(self, *args, **kwargs):
+        data = self._data(args, kwargs)
+        simple = set(kwargs) <= {"data", "ax"}
+        if simple and isinstance(data, (pd.DataFrame, pd.Series)) and self._accel.is_large(data):
+            ax = kwargs.get("ax") or plt.gca()
+            self._accel.boxplot(ax, data)
+            return ax
+        return self._module.boxplot(*args, **kwargs)
+
+
+class FastPyplot(_Proxy):
+    """`plt` do sandbox: `plt.hist` pré-agregado e `plt.scatter` com amostragem/hexbin."""
+
+    def hist(self, x, bins=None, *args, **kwargs):
+        if isinstance(x, (pd.Series, np.ndarray)) and self._accel.is_large(x) and not args and not kwargs:
+            return self._accel.hist(self._module.gca(), x, bins=bins)
+        return self._module.hist(x, bins, *args, **kwargs)
+
+    def scatter(self, x, y, *args, **kwargs):
+        if not args and not kwargs and self._accel.is_large(x):
+            return self._accel.scatter(self._module.gca(), x, y)
+        return self._module.scatter(x, y, *args, **kwargs)
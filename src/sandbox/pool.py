@@ -0,0 +1,337 @@
+import atexit
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_LIMITS = {
+    "wall_seconds": 120,
+    "cpu_seconds": 90,
+    "memory_mb": 4096,
+}
+# Worker é reciclado após um job se o pico de memória passar deste valor
+RECYCLE_RSS_MB = 3072
+WORKER_DATASETS = 2
+POLL_INTERVAL = 0.1
+
+
+class CPUTimeExceeded(Exception):
+    pass
+
+
+# ===========================
+# Worker Process
+# ===========================
+def _worker_main(conn):
+    """
+    Loop do processo worker. As bibliotecas são importadas uma vez na
+    inicialização e os últimos datasets usados ficam em memória entre jobs.
+    """
+    import signal
+
+    from src.data import columnar_cache
+    from src.data.shared_frame import attach_frame
+    from src.data.tables import LazyTables, columnar_loader
+    from src.sandbox import runner
+    from src.sandbox.rendering import FigureSink
+
+    def on_cpu_limit(signum, frame):
+        raise CPUTimeExceeded("Limite de tempo de CPU excedido")
+
+    if hasattr(signal, "SIGXCPU"):
+        signal.signal(signal.SIGXCPU, on_cpu_limit)
+
+    datasets = OrderedDict()
+    conn.send({"ready": True, "pid": os.getpid()})
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if job is None:
+            break
+
+        # A versão da entrada do store entra na chave: um DataFrame substituído não é reaproveitado
+        key = (job["dataset_id"], job.get("dataset_version"))
+        columns = job.get("columns")
+        try:
+            if key in datasets:
+                datasets.move_to_end(key)
+                df, profile, _ = datasets[key]
+            elif "profile" not in job:
+                conn.send({"need_dataset": True})
+                continue
+            elif columns is not None and _has_projection_source(job):
+                # Só as colunas usadas pelo código; o recorte não fica guardado no worker
+                df = columnar_cache.read_columns(columns, job["columnar_path"], job.get("csv_path"))
+                profile = job["profile"]
+            else:
+                blocks = None
+                if job.get("shared_frame") is not None:
+                    df, blocks = attach_frame(job["shared_frame"])
+                elif job.get("dataframe") is not None:
+                    df = job["dataframe"]
+                else:
+                    df = columnar_cache.read_frame(job["columnar_path"])
+                # Os blocos de memória compartilhada ficam abertos junto com o DataFrame
+                datasets[key] = (df, job["profile"], blocks)
+                while len(datasets) > WORKER_DATASETS:
+                    datasets.popitem(last=False)
+                profile = job["profile"]
+        except Exception as e:
+            # Mesma resposta de erro de uma falha no código: o worker segue vivo
+            conn.send({"stdout": "", "error": f"Erro ao carregar o dataset no sandbox: {type(e).__name__}: {e}",
+                       "images": []})
+            continue
+
+        sink = FigureSink(job.get("figure_format"), job.get("figure_dpi"))
+        tables = LazyTables(job["tables"], columnar_loader) if job.get("tables") else None
+        namespace = runner.build_namespace(
+            df, sink, profile, job.get("columnar_path"), tables, job.get("engine", "pandas"),
+            csv_path=job.get("csv_path"),
+        )
+        restore = _apply_limits(job["limits"])
+        try:
+            result = runner.run_code(job["code"], namespace)
+        finally:
+            restore()
+            if tables is not None:
+                tables.close()
+
+        result["rss_mb"] = _peak_rss_mb()
+        conn.send(result)
+
+
+def _has_projection_source(job):
+    """Cache colunar ou cópia do CSV em disco, de onde um subconjunto de colunas pode ser lido."""
+    return any(path and os.path.exists(path) for path in (job.get("columnar_path"), job.get("csv_path")))
+
+
+def _apply_limits(limits):
+    """Aplica limites de CPU e memória ao job atual; retorna função que os desfaz."""
+    try:
+        import resource
+    except ImportError:  # Windows: apenas o limite de tempo de parede vale
+        return lambda: None
+
+    previous = {}
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    cpu_used = usage.ru_utime + usage.ru_stime
+
+    if limits.get("cpu_seconds"):
+        previous[resource.RLIMIT_CPU] = resource.getrlimit(resource.RLIMIT_CPU)
+        soft = int(cpu_used + limits["cpu_seconds"]) + 1
+        hard = previous[resource.RLIMIT_CPU][1]
+        if hard == resource.RLIM_INFINITY or soft < hard:
+            resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+    if limits.get("memory_mb") and hasattr(resource, "RLIMIT_AS"):
+        previous[resource.RLIMIT_AS] = resource.getrlimit(resource.RLIMIT_AS)
+        soft = _virtual_memory_bytes() + limits["memory_mb"] * 1024 ** 2
+        hard = previous[resource.RLIMIT_AS][1]
+        if hard == resource.RLIM_INFINITY or soft < hard:
+            resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+    def restore():
+        for limit, values in previous.items():
+            resource.setrlimit(limit, values)
+
+    return restore
+
+
+def _virtual_memory_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Linux reporta em KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# ===========================
+# Sandbox Pool
+# ===========================
+class _Worker:
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def wait_ready(self):
+        if not self.ready:
+            self.conn.recv()
+            self.ready = True
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.join(timeout=5)
+        finally:
+            self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+            self.process.join(timeout=5)
+        except (OSError, BrokenPipeError):
+            pass
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class SandboxJob:
+    """Job submetido ao pool. `cancel()` encerra o worker que o está executando."""
+
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self.future = None
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout=timeout)
+
+
+class SandboxPool:
+    """
+    Pool de processos pré-aquecidos para executar o código gerado pelo LLM
+    fora do processo do Streamlit, com limites de tempo de parede, tempo de
+    CPU e memória por job. Workers que estouram o tempo ou são cancelados
+    são encerrados e substituídos.
+    """
+
+    def __init__(self, size=None, limits=None):
+        self.size = size or min(4, os.cpu_count() or 1)
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="sandbox")
+        self._closed = False
+        for _ in range(self.size):
+            self._idle.put(_Worker(self._ctx))
+
+    def submit(self, code, dataset_id, columnar_path=None, csv_path=None, profile=None,
+               dataframe_loader=None, shared_frame_loader=None, limits=None,
+               figure_format=None, figure_dpi=None, tables=None, engine="pandas", columns=None,
+               dataset_version=None):
+        """
+        Agenda a execução do código. Quando o worker ainda não tem o dataset,
+        ele é entregue, em ordem de preferência, via memória compartilhada
+        (`shared_frame_loader`), cache colunar em disco ou `dataframe_loader`.
+        As demais tabelas da sessão (`tables`, de `table_sources`) são lidas
+        no worker a partir do cache colunar, sob demanda. Com `columns`, um
+        worker que ainda não tem o dataset lê só essas colunas do cache colunar
+        ou, antes dele existir, da cópia do CSV em disco (`csv_path`).
+        Os workers guardam datasets por `(dataset_id, dataset_version)`.
+        """
+        job = SandboxJob()
+        payload = {
+            "code": code,
+            "dataset_id": dataset_id,
+            "dataset_version": dataset_version,
+            "columnar_path": columnar_path,
+            "csv_path": csv_path,
+            "limits": {**self.limits, **(limits or {})},
+            "figure_format": figure_format,
+            "figure_dpi": figure_dpi,
+            "tables": tables,
+            "engine": engine,
+            "columns": columns,
+        }
+        job.future = self._executor.submit(
+            self._execute, job, payload, profile, dataframe_loader, shared_frame_loader
+        )
+        return job
+
+    def run(self, code, dataset_id, **kwargs):
+        return self.submit(code, dataset_id, **kwargs).result()
+
+    def _execute(self, job, payload, profile, dataframe_loader, shared_frame_loader):
+        if self._closed:
+            raise RuntimeError("Sandbox encerrado")
+
+        worker = self._idle.get()
+        try:
+            worker.wait_ready()
+            deadline = time.monotonic() + payload["limits"]["wall_seconds"]
+
+            worker.conn.send(payload)
+            result = self._wait(worker, job, deadline)
+
+            if result.get("need_dataset"):
+                payload = {**payload, "profile": profile}
+                has_columnar = payload["columnar_path"] and os.path.exists(payload["columnar_path"])
+                # Com projeção de colunas, o worker lê só elas do cache colunar ou da cópia do CSV
+                projected = payload["columns"] is not None and _has_projection_source(payload)
+                if shared_frame_loader is not None and not projected:
+                    payload["shared_frame"] = shared_frame_loader()
+                elif not has_columnar:
+                    payload["dataframe"] = dataframe_loader()
+                worker.conn.send(payload)
+                result = self._wait(worker, job, deadline)
+
+            if (result.get("rss_mb") or 0) > RECYCLE_RSS_MB:
+                print(f"♻️ Reciclando worker do sandbox ({result['rss_mb']:.0f} MB)")
+                worker.stop()
+                worker = _Worker(self._ctx)
+            return result
+
+        except (TimeoutError, InterruptedError) as e:
+            worker.kill()
+            worker = _Worker(self._ctx)
+            return {"stdout": "", "error": str(e), "images": []}
+
+        except (EOFError, OSError) as e:
+            # Worker morreu (ex.: OOM killer); substitui e reporta o erro
+            worker.kill()
+            worker = _Worker(self._ctx)
+            return {"stdout": "", "error": f"Worker do sandbox encerrado: {e}", "images": []}
+
+        finally:
+            self._idle.put(worker)
+
+    @staticmethod
+    def _wait(worker, job, deadline):
+        while not worker.conn.poll(POLL_INTERVAL):
+            if job.cancelled.is_set():
+                raise InterruptedError("Execução cancelada")
+            if time.monotonic() > deadline:
+                raise TimeoutError("Tempo limite de execução excedido")
+        return worker.conn.recv()
+
+    def shutdown(self):
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        while not self._idle.empty():
+            self._idle.get_nowait().stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool():
+    """Pool único do processo; o tamanho vem de `CSV_AGENT_SANDBOX_WORKERS`."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            size = int(os.environ.get("CSV_AGENT_SANDBOX_WORKERS", 0)) or None
+            _pool = SandboxPool(size=size)
+            atexit.register(_pool.shutdown)
+        return _pool
@@ -0,0 +1,93 @@
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+
+DEFAULT_FORMAT = "png"
+DEFAULT_DPI = 150
+SUPPORTED_FORMATS = ("png", "webp", "svg")
+MAX_RENDER_THREADS = 4
+# O estado do pyplot (figura atual, `plt.close("all")`) é global ao processo:
+# execuções concorrentes no mesmo processo (modo assíncrono, lote) são serializadas
+PYPLOT_LOCK = threading.RLock()
+
+
+# ===========================
+# Figure Sink
+# ===========================
+class FigureSink:
+    """
+    Destino em memória usado como `img_path` no código gerado.
+
+    `plt.savefig(img_path, ...)` não grava em disco: a figura é apenas
+    registrada e rasterizada depois, em `render`, junto com as figuras que
+    ficaram abertas ao final da execução. Cada execução tem o seu sink, mas
+    as figuras abertas são estado global do pyplot: execução, captura e
+    `plt.close("all")` precisam acontecer sob `PYPLOT_LOCK` para que turnos
+    concorrentes no mesmo processo não capturem nem fechem as figuras uns
+    dos outros (`run_code` e `run_analysis` fazem isso).
+    """
+
+    def __init__(self, fmt=None, dpi=None):
+        fmt = (fmt or DEFAULT_FORMAT).lower()
+        if fmt not in SUPPORTED_FORMATS:
+            raise ValueError(f"Formato de imagem não suportado: {fmt}")
+        self.format = fmt
+        self.dpi = dpi
+        self._captured = []
+
+    def __repr__(self):
+        return f"<img_path em memória ({self.format})>"
+
+    def capture(self, fig, savefig_kwargs=None):
+        if any(captured is fig for captured, _ in self._captured):
+            return
+        self._captured.append((fig, dict(savefig_kwargs or {})))
+
+    def capture_open_figures(self):
+        """Registra as figuras ainda abertas que o código não salvou explicitamente."""
+        with PYPLOT_LOCK:
+            for num in plt.get_fignums():
+                self.capture(plt.figure(num), {"bbox_inches": "tight"})
+
+    def render(self, parallel=True):
+        """Rasteriza as figuras registradas e retorna a lista de bytes (na ordem de criação)."""
+        if not self._captured:
+            return []
+        if not parallel or len(self._captured) == 1:
+            return [self._render_one(fig, kwargs) for fig, kwargs in self._captured]
+
+        # A compressão PNG/WebP (Pillow) libera o GIL, então figuras grandes
+        # são codificadas em paralelo; cada thread usa a sua própria figura.
+        workers = min(MAX_RENDER_THREADS, len(self._captured))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda item: self._render_one(*item), self._captured))
+
+    def _render_one(self, fig, kwargs):
+        kwargs = {key: value for key, value in kwargs.items() if key not in ("format", "fname")}
+        kwargs["dpi"] = self.dpi or kwargs.get("dpi") or DEFAULT_DPI
+        kwargs.setdefault("bbox_inches", "tight")
+
+        buffer = io.BytesIO()
+        _original_savefig(fig, buffer, format=self.format, **kwargs)
+        return buffer.getvalue()
+
+
+_original_savefig = Figure.savefig
+
+
+def _savefig(self, fname, *args, **kwargs):
+    if isinstance(fname, FigureSink):
+        fname.capture(self, kwargs)
+        return None
+    return _original_savefig(self, fname, *args, **kwargs)
+
+
+# `plt.savefig` delega para `Figure.savefig`; só chamadas com um FigureSink
+# são interceptadas, qualquer outro destino segue o fluxo normal.
+Figure.savefig = _savefig
@@ -0,0 +1,87 @@
+import contextlib
+import io
+
+import matplotlib
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+from src.data import columnar_cache
+from src.sandbox.engines import close_engine, engine_namespace
+from src.sandbox.rendering import PYPLOT_LOCK  # o import instala a captura de savefig em memória
+from src.sandbox.fast_plots import FastPyplot, FastSeaborn, PlotAccelerator
+
+
+# ===========================
+# Code Runner
+# ===========================
+def build_namespace(df, img_path, profile=None, columnar_path=None, tables=None, engine="pandas", csv_path=None):
+    """
+    Variáveis disponíveis para o código gerado pelo LLM. `img_path` é um
+    `FigureSink`: as figuras salvas nele ficam em memória. `plt` e `sns` são
+    wrappers que agregam/amostram gráficos acima do limite de linhas.
+    `tables` (`LazyTables`) dá acesso às demais tabelas da sessão e `engine`
+    acrescenta as variáveis do duckdb/polars (ver `engines.engine_namespace`).
+    """
+    fastplot = PlotAccelerator()
+    namespace = {
+        "df": df,
+        "plt": FastPyplot(plt, fastplot),
+        "pd": pd,
+        "np": np,
+        "sns": FastSeaborn(sns, fastplot),
+        "fastplot": fastplot,
+        "img_path": img_path,
+        "load_columns": columns_loader(df, columnar_path, csv_path),
+        "profile": profile,
+        "tables": tables if tables is not None else {},
+    }
+    namespace.update(engine_namespace(engine, df, columnar_path))
+    return namespace
+
+
+def columns_loader(df, columnar_path, csv_path=None):
+    """
+    Função `load_columns([...])` exposta ao código gerado: lê do cache
+    colunar (memory-map) ou da cópia do CSV apenas as colunas pedidas.
+    """
+    def load_columns(columns):
+        columns = [columns] if isinstance(columns, str) else list(columns)
+        loaded = columnar_cache.read_columns(columns, columnar_path, csv_path)
+        return loaded if loaded is not None else df[columns]
+
+    return load_columns
+
+
+def run_code(code, namespace, parallel_render=True):
+    """
+    Executa o código capturando stdout e as figuras geradas. Retorna
+    `{"stdout", "error", "images", "image_format", "sampling_notes"}`, com
+    `error` igual a None quando a execução termina sem exceção.
+    """
+    sink = namespace["img_path"]
+    stdout, stderr = io.StringIO(), io.StringIO()
+    error = None
+    with PYPLOT_LOCK, contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        plt.switch_backend("Agg")
+        plt.ioff()
+        try:
+            exec(code, namespace)
+            sink.capture_open_figures()
+        except (Exception, SystemExit) as e:
+            error = stderr.getvalue() or str(e) or type(e).__name__
+        finally:
+            plt.close("all")
+            close_engine(namespace)
+
+    images = [] if error else sink.render(parallel=parallel_render)
+    return {
+        "stdout": stdout.getvalue(),
+        "error": error,
+        "images": images,
+        "image_format": sink.format,
+        "sampling_notes": list(namespace["fastplot"].notes),
+    }
@@ -0,0 +1,52 @@
+"""
+Serviço HTTP do CSV Agent, sem Streamlit.
+
+Uso:
+    python -m src.service --port 8765 --workers 4 --queue-size 32
+    CSV_AGENT_SERVICE_URL=http://127.0.0.1:8765 streamlit run app.py
+"""
+import argparse
+import sys
+
+from src.service.server import make_server
+from src.service.service import DEFAULT_QUEUE_SIZE, DEFAULT_TENANT_LIMITS, DEFAULT_WORKERS, AgentService
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço HTTP do CSV Agent")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Perguntas processadas em paralelo")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Pedidos em espera antes de responder 503")
+    parser.add_argument("--sandbox", choices=["inline", "process"], default="process")
+    parser.add_argument("--base-url", help="Servidor compatível com a API da OpenAI")
+    for name, value in DEFAULT_TENANT_LIMITS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=value, help="Limite por tenant")
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    service = AgentService(
+        base_url=args.base_url,
+        workers=args.workers,
+        queue_size=args.queue_size,
+        tenant_limits={name: getattr(args, name) for name in DEFAULT_TENANT_LIMITS},
+        sandbox=args.sandbox,
+    )
+    server = make_server(service, args.host, args.port, verbose=args.verbose)
+    print(f"🛰️ Serviço em http://{args.host}:{args.port} ({args.workers} workers, fila {args.queue_size})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
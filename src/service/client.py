@@ -0,0 +1,88 @@
+import json
+import os
+import urllib.error
+import urllib.parse
+import urllib.request
+
+SERVICE_URL_ENV = "CSV_AGENT_SERVICE_URL"
+TENANT_ENV = "CSV_AGENT_TENANT"
+TENANT_HEADER = "X-Tenant-Id"
+API_KEY_HEADER = "X-OpenAI-Key"
+DEFAULT_TIMEOUT = 600
+
+
+class ServiceError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+# ===========================
+# Service Client
+# ===========================
+class ServiceClient:
+    """
+    Cliente HTTP mínimo (stdlib) do serviço, usado pelo app no modo thin
+    client (`CSV_AGENT_SERVICE_URL`). `ask` devolve o mesmo formato do estado
+    final do grafo, com as figuras já baixadas.
+    """
+
+    def __init__(self, base_url, tenant=None, api_key=None, timeout=DEFAULT_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.tenant = tenant
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def _request(self, method, path, body=None, content_type=None):
+        headers = {}
+        if self.tenant:
+            headers[TENANT_HEADER] = self.tenant
+        if self.api_key:
+            headers[API_KEY_HEADER] = self.api_key
+        if content_type:
+            headers["Content-Type"] = content_type
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read(), response.headers.get("Content-Type", "")
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            raise ServiceError(e.code, message) from None
+
+    def _json(self, method, path, body=None, content_type="application/json"):
+        data, _ = self._request(method, path, body, content_type)
+        return json.loads(data)
+
+    def upload(self, file_bytes, name=None):
+        query = f"?{urllib.parse.urlencode({'name': name})}" if name else ""
+        return self._json("POST", f"/datasets{query}", file_bytes, "text/csv")
+
+    def ask(self, dataset_id, question, session_id=None, tables=None, **options):
+        payload = {"dataset_id": dataset_id, "question": question, "session_id": session_id, **options}
+        if tables:
+            payload["tables"] = list(tables)
+        answer = self._json("POST", "/ask", json.dumps(payload).encode("utf-8"))
+        images = [self._request("GET", figure["url"])[0] for figure in answer["figures"]]
+        return {
+            "session_id": answer["session_id"],
+            "final_answer": answer.get("answer"),
+            "mode": answer.get("mode"),
+            "code": answer.get("code"),
+            "images": images,
+            "image_format": answer["figures"][0]["format"] if answer["figures"] else None,
+            "cache_status": answer.get("cache_status"),
+            "node_timings": answer.get("node_timings", []),
+            "execution_error": answer.get("error"),
+        }
+
+    def health(self):
+        return self._json("GET", "/health")
+
+
+def get_service_client(api_key=None):
+    """Cliente do serviço se `CSV_AGENT_SERVICE_URL` estiver definido (tenant em `CSV_AGENT_TENANT`); senão None."""
+    base_url = os.environ.get(SERVICE_URL_ENV)
+    return ServiceClient(base_url, os.environ.get(TENANT_ENV), api_key) if base_url else None
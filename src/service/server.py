@@ -0,0 +1,137 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from src.service.client import API_KEY_HEADER, TENANT_HEADER
+from src.service.service import AgentService, ServiceBusy, TenantLimitExceeded
+
+DEFAULT_TENANT = "default"
+MAX_JSON_BYTES = 1024 ** 2
+CONTENT_TYPES = {"png": "image/png", "webp": "image/webp", "svg": "image/svg+xml"}
+
+
+def _json_default(value):
+    # Inteiros/floats do numpy (ex.: `total_rows` da ingestão em chunks)
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+# ===========================
+# HTTP Handler
+# ===========================
+class ServiceHandler(BaseHTTPRequestHandler):
+    """
+    Endpoints:
+
+    - `POST /datasets?name=vendas.csv` (corpo: bytes do CSV) → dataset_id, schema, data_info
+    - `POST /ask` (JSON: dataset_id, question, session_id, tables, engine, ...) → resposta
+    - `GET /figures/<id>` → imagem gerada em uma resposta
+    - `GET /health` → contadores do serviço
+
+    O tenant vem do cabeçalho `X-Tenant-Id`; a chave da OpenAI, do
+    `X-OpenAI-Key` ou da configuração do serviço.
+    """
+
+    protocol_version = "HTTP/1.1"
+    service = None
+    verbose = False
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            return self._send_json(200, self.service.health())
+        if url.path.startswith("/figures/"):
+            figure = self.service.figure(self._tenant(), url.path.rsplit("/", 1)[-1])
+            if figure is None:
+                return self._send_json(404, {"error": "Figura não encontrada"})
+            data, fmt = figure
+            return self._send(200, data, CONTENT_TYPES.get(fmt, "application/octet-stream"))
+        self._send_json(404, {"error": f"Rota desconhecida: {url.path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path == "/datasets":
+            limit = self.service.tenant_limits["max_upload_mb"] * 1024 ** 2
+            body = self._read_body(limit)
+            if body is None:
+                return
+            name = parse_qs(url.query).get("name", [None])[0]
+            return self._handle(201, lambda: self.service.upload(self._tenant(), body, name))
+        if url.path == "/ask":
+            body = self._read_body(MAX_JSON_BYTES)
+            if body is None:
+                return
+            try:
+                payload = json.loads(body or b"{}")
+            except json.JSONDecodeError as e:
+                return self._send_json(400, {"error": f"JSON inválido: {e}"})
+            api_key = self.headers.get(API_KEY_HEADER)
+            return self._handle(200, lambda: self.service.ask(self._tenant(), payload, api_key))
+        self._send_json(404, {"error": f"Rota desconhecida: {url.path}"})
+
+    def _handle(self, status, operation):
+        try:
+            return self._send_json(status, operation())
+        except ServiceBusy as e:
+            return self._send_json(503, {"error": str(e)}, {"Retry-After": "1"})
+        except TenantLimitExceeded as e:
+            return self._send_json(429, {"error": str(e)}, {"Retry-After": "5"})
+        except KeyError as e:
+            return self._send_json(404, {"error": str(e.args[0] if e.args else e)})
+        except ValueError as e:
+            return self._send_json(400, {"error": str(e)})
+        except TimeoutError as e:
+            return self._send_json(504, {"error": str(e)})
+        except Exception as e:
+            print(f"❌ Erro no serviço: {type(e).__name__}: {e}")
+            return self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def _tenant(self):
+        return self.headers.get(TENANT_HEADER) or DEFAULT_TENANT
+
+    def _read_body(self, limit):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > limit:
+            self._send_json(413, {"error": f"Corpo acima do limite de {limit // 1024 ** 2} MB"})
+            self.close_connection = True
+            return None
+        return self.rfile.read(length)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
+        self._send(status, body, "application/json; charset=utf-8", headers)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+
+# ===========================
+# Server
+# ===========================
+def make_server(service=None, host="127.0.0.1", port=8765, verbose=False):
+    """Servidor HTTP (uma thread por conexão) ligado a um `AgentService`."""
+    service = service or AgentService()
+    handler = type("BoundServiceHandler", (ServiceHandler,), {"service": service, "verbose": verbose})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def start_in_thread(server):
+    """Sobe o servidor em uma thread daemon (testes de carga, app no mesmo processo)."""
+    thread = threading.Thread(target=server.serve_forever, name="csv-agent-service", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,286 @@
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from src.batch.runner import prepare_dataset
+from src.data.dataset_store import get_dataset_store
+from src.data.tables import table_name
+from src.memory.conversation_memory import ConversationMemory
+from src.workflow.graph import build_graph
+
+DEFAULT_WORKERS = 4
+# Pedidos aceitos além dos que estão rodando; acima disso o serviço responde 503
+DEFAULT_QUEUE_SIZE = 32
+REQUEST_TIMEOUT_SECONDS = 300
+MAX_SESSIONS = 1000
+MAX_FIGURE_BYTES = 256 * 1024 ** 2
+
+DEFAULT_TENANT_LIMITS = {
+    "max_inflight": 2,
+    "requests_per_minute": 60,
+    "max_datasets": 5,
+    "max_upload_mb": 512,
+}
+
+
+class ServiceBusy(Exception):
+    """Fila de pedidos cheia (HTTP 503)."""
+
+
+class TenantLimitExceeded(Exception):
+    """Limite do tenant excedido (HTTP 429)."""
+
+
+# ===========================
+# Figure Store
+# ===========================
+class FigureStore:
+    """Figuras das respostas, servidas por id; as mais antigas saem acima de `max_bytes`."""
+
+    def __init__(self, max_bytes=MAX_FIGURE_BYTES):
+        self.max_bytes = max_bytes
+        self._figures = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, tenant, data, fmt):
+        figure_id = uuid.uuid4().hex
+        with self._lock:
+            self._figures[figure_id] = (tenant, data, fmt)
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes and len(self._figures) > 1:
+                _, (_, old, _) = self._figures.popitem(last=False)
+                self._bytes -= len(old)
+        return figure_id
+
+    def get(self, tenant, figure_id):
+        with self._lock:
+            item = self._figures.get(figure_id)
+        if item is None or item[0] != tenant:
+            return None
+        return item[1], item[2]
+
+
+# ===========================
+# Agent Service
+# ===========================
+class AgentService:
+    """
+    Núcleo do serviço HTTP, independente do Streamlit: datasets ficam no
+    store compartilhado do processo e cada pergunta roda o grafo em um pool
+    limitado de threads (o código gerado vai para o sandbox de processos).
+
+    - backpressure: no máximo `workers + queue_size` pedidos aceitos ao mesmo
+      tempo; acima disso, `ServiceBusy`
+    - por tenant: pedidos simultâneos, pedidos por minuto, número de datasets
+      e tamanho do upload (`tenant_limits`); acima deles, `TenantLimitExceeded`
+    - isolamento: um tenant só pergunta sobre datasets que ele mesmo enviou
+      e só lê as próprias figuras
+    - memória da conversa por `(tenant, session_id)`
+    """
+
+    def __init__(self, api_key=None, base_url=None, workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE,
+                 tenant_limits=None, temp_dir=None, sandbox="process"):
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        self.base_url = base_url
+        self.workers = workers
+        self.queue_size = queue_size
+        self.tenant_limits = {**DEFAULT_TENANT_LIMITS, **(tenant_limits or {})}
+        self.temp_dir = temp_dir or tempfile.mkdtemp(prefix="csv_agent_service_")
+        self.sandbox = sandbox
+        self.graph = build_graph()
+        self.figures = FigureStore()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="service")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._tenants = {}
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"accepted": 0, "rejected_busy": 0, "rejected_tenant": 0, "active": 0}
+
+    # --- admissão ------------------------------------------------------------
+    def _tenant(self, tenant):
+        with self._lock:
+            return self._tenants.setdefault(
+                tenant, {"inflight": 0, "requests": deque(), "datasets": OrderedDict()}
+            )
+
+    def _admit(self, tenant):
+        info = self._tenant(tenant)
+        limits = self.tenant_limits
+        now = time.monotonic()
+        with self._lock:
+            while info["requests"] and now - info["requests"][0] > 60:
+                info["requests"].popleft()
+            if info["inflight"] >= limits["max_inflight"]:
+                self.stats["rejected_tenant"] += 1
+                raise TenantLimitExceeded(f"Máximo de {limits['max_inflight']} pedidos simultâneos por tenant")
+            if len(info["requests"]) >= limits["requests_per_minute"]:
+                self.stats["rejected_tenant"] += 1
+                raise TenantLimitExceeded(f"Máximo de {limits['requests_per_minute']} pedidos por minuto")
+            if not self._slots.acquire(blocking=False):
+                self.stats["rejected_busy"] += 1
+                raise ServiceBusy("Fila de pedidos cheia")
+            info["inflight"] += 1
+            info["requests"].append(now)
+            self.stats["accepted"] += 1
+            self.stats["active"] += 1
+        return info
+
+    def _release(self, info):
+        with self._lock:
+            info["inflight"] -= 1
+            self.stats["active"] -= 1
+        self._slots.release()
+
+    def _run(self, tenant, fn, *args):
+        """
+        Executa `fn` no pool respeitando a fila e os limites do tenant. O tempo
+        limite conta a partir do início da execução (não da espera na fila) e
+        o slot só é liberado quando o job termina de fato: após um timeout, o
+        job que continua rodando ainda ocupa a fila e o limite do tenant.
+        """
+        info = self._admit(tenant)
+        started = threading.Event()
+
+        def job():
+            started.set()
+            return fn(*args)
+
+        try:
+            future = self._executor.submit(job)
+        except BaseException:
+            self._release(info)
+            raise
+        future.add_done_callback(lambda _: self._release(info))
+        # Um job cancelado na fila (shutdown) também encerra a espera
+        future.add_done_callback(lambda _: started.set())
+
+        started.wait()
+        try:
+            return future.result(timeout=REQUEST_TIMEOUT_SECONDS)
+        except FutureTimeout:
+            raise TimeoutError("Tempo limite do pedido excedido")
+
+    # --- operações -----------------------------------------------------------
+    def upload(self, tenant, file_bytes, name=None, options=None):
+        """Ingere e perfila um CSV (uma vez por conteúdo, entre todos os tenants)."""
+        max_bytes = self.tenant_limits["max_upload_mb"] * 1024 ** 2
+        if len(file_bytes) > max_bytes:
+            raise TenantLimitExceeded(f"Upload acima de {self.tenant_limits['max_upload_mb']} MB")
+
+        state = self._run(tenant, prepare_dataset, file_bytes, self.temp_dir, options)
+        dataset_id = state["dataset_id"]
+
+        info = self._tenant(tenant)
+        with self._lock:
+            datasets = info["datasets"]
+            previous = datasets.pop(dataset_id, None)
+            table = previous["table"] if previous else table_name(
+                name or "tabela", {item["table"] for item in datasets.values()}
+            )
+            datasets[dataset_id] = {"table": table, "name": name}
+            # Acima da cota, o tenant perde acesso ao dataset mais antigo (o cache é do processo)
+            while len(datasets) > self.tenant_limits["max_datasets"]:
+                datasets.popitem(last=False)
+
+        # Vem do estado preparado: a entrada do store pode já ter sido evictada
+        return {
+            "dataset_id": dataset_id,
+            "table": table,
+            "schema": state["schema"],
+            "data_info": state["data_info"],
+        }
+
+    def ask(self, tenant, payload, api_key=None):
+        """
+        Responde uma pergunta. `payload`: `dataset_id`, `question` e,
+        opcionalmente, `session_id`, `tables` (ids de outros datasets do
+        tenant), `engine`, `figure_format`, `optimize_dtypes`.
+        """
+        question = (payload.get("question") or "").strip()
+        if not question:
+            raise ValueError("Campo `question` obrigatório")
+        api_key = api_key or self.api_key
+        if not api_key:
+            raise ValueError("Nenhuma chave da OpenAI configurada no serviço ou enviada no pedido")
+
+        dataset_id = payload.get("dataset_id")
+        owned = self._tenant(tenant)["datasets"]
+        if dataset_id not in owned:
+            raise KeyError(f"Dataset desconhecido para o tenant: {dataset_id}")
+        # Como no app, `tables` inclui o dataset principal e só vale com mais de uma tabela
+        tables = {}
+        for table_id in [dataset_id, *(payload.get("tables") or [])]:
+            if table_id not in owned:
+                raise KeyError(f"Dataset desconhecido para o tenant: {table_id}")
+            tables[owned[table_id]["table"]] = table_id
+
+        session_id = payload.get("session_id") or uuid.uuid4().hex
+        session = self._session(tenant, session_id)
+        state = {
+            "dataset_id": dataset_id,
+            "tables": tables if len(tables) > 1 else {},
+            "temp_dir": self.temp_dir,
+            "api_key": api_key,
+            "base_url": self.base_url,
+            "sandbox": self.sandbox,
+            "question": question,
+            "memory": session["memory"],
+        }
+        for option in ("engine", "figure_format", "optimize_dtypes", "fastpath"):
+            if option in payload:
+                state[option] = payload[option]
+
+        def invoke():
+            # Perguntas da mesma sessão são respondidas em ordem
+            with session["lock"]:
+                return self.graph.invoke(state)
+
+        result = self._run(tenant, invoke)
+        fmt = result.get("image_format") or "png"
+        figures = [self.figures.put(tenant, image, fmt) for image in result.get("images") or []]
+        error = result.get("execution_error") if result.get("code_error") else None
+        return {
+            "session_id": session_id,
+            "answer": result.get("final_answer"),
+            "mode": result.get("mode"),
+            "code": result.get("code"),
+            "figures": [{"id": figure_id, "url": f"/figures/{figure_id}", "format": fmt} for figure_id in figures],
+            "cache_status": result.get("cache_status", {}),
+            "node_timings": result.get("node_timings", []),
+            "error": error,
+        }
+
+    def figure(self, tenant, figure_id):
+        return self.figures.get(tenant, figure_id)
+
+    def _session(self, tenant, session_id):
+        key = (tenant, session_id)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = {"memory": ConversationMemory(), "lock": threading.Lock()}
+                self._sessions[key] = session
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > MAX_SESSIONS:
+                self._sessions.popitem(last=False)
+        return session
+
+    def health(self):
+        with self._lock:
+            return {
+                **self.stats,
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "tenants": len(self._tenants),
+                "sessions": len(self._sessions),
+                "datasets": len(get_dataset_store()),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,210 @@
+import asyncio
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+
+TRACE_FILE_ENV = "CSV_AGENT_TRACE_FILE"
+TRACE_MEMORY_ENV = "CSV_AGENT_TRACE_MEMORY"
+
+# Campos que os nós gravam no estado e viram atributos do span de quem os gravou
+NODE_METRICS = ("llm_usage", "bytes_parsed")
+
+
+# ===========================
+# Exporters
+# ===========================
+class JsonlSpanExporter:
+    """
+    Grava cada span como uma linha JSON no formato de span do OpenTelemetry
+    (`trace_id`, `span_id`, `name`, `start_time_unix_nano`,
+    `end_time_unix_nano`, `attributes`).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        line = json.dumps(span, ensure_ascii=False, default=str)
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class OpenTelemetrySpanExporter:
+    """Reemite os spans por um tracer do `opentelemetry` (se instalado e configurado)."""
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+
+    def export(self, span):
+        otel_span = self.tracer.start_span(
+            span["name"], start_time=span["start_time_unix_nano"], attributes=span["attributes"]
+        )
+        otel_span.end(end_time=span["end_time_unix_nano"])
+
+
+_exporters = None
+_exporters_lock = threading.Lock()
+
+
+def get_exporters():
+    """
+    Exportadores do processo: arquivo JSONL em `CSV_AGENT_TRACE_FILE` e, se o
+    pacote `opentelemetry` estiver instalado, o tracer global dele.
+    """
+    global _exporters
+    with _exporters_lock:
+        if _exporters is None:
+            _exporters = []
+            if os.environ.get(TRACE_FILE_ENV):
+                _exporters.append(JsonlSpanExporter(os.environ[TRACE_FILE_ENV]))
+            try:
+                from opentelemetry import trace
+                _exporters.append(OpenTelemetrySpanExporter(trace.get_tracer("csv-agent")))
+            except ImportError:  # opentelemetry é opcional
+                pass
+        return _exporters
+
+
+def add_exporter(exporter):
+    get_exporters().append(exporter)
+
+
+# ===========================
+# Node Instrumentation
+# ===========================
+def memory_tracing_enabled(state):
+    if "trace_memory" in state:
+        return bool(state["trace_memory"])
+    return os.environ.get(TRACE_MEMORY_ENV, "") == "1"
+
+
+# O tracemalloc desacelera todas as alocações do processo: fica ligado só
+# enquanto houver algum span com `trace_memory` ativo
+_memory_spans = 0
+_owns_tracemalloc = False
+_memory_lock = threading.Lock()
+
+
+def _start_memory_trace():
+    global _memory_spans, _owns_tracemalloc
+    with _memory_lock:
+        if _memory_spans == 0:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _owns_tracemalloc = True
+            # O pico é global: só é zerado quando nenhum outro span o está medindo
+            tracemalloc.reset_peak()
+        _memory_spans += 1
+
+
+def _stop_memory_trace():
+    """Pico (bytes) desde o início do span mais antigo ainda ativo; desliga o tracemalloc no último."""
+    global _memory_spans, _owns_tracemalloc
+    with _memory_lock:
+        peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+        _memory_spans -= 1
+        if _memory_spans == 0 and _owns_tracemalloc:
+            tracemalloc.stop()
+            _owns_tracemalloc = False
+    return peak
+
+
+class _NodeSpan:
+    def __init__(self, name, state):
+        self.name = name
+        self.trace_memory = memory_tracing_enabled(state)
+        self.metrics_before = {key: state.get(key) for key in NODE_METRICS}
+
+    def start(self):
+        if self.trace_memory:
+            _start_memory_trace()
+        self.start_ns = time.time_ns()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+
+    def finish(self, state, error=None):
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.thread_time() - self.cpu_start
+        peak = _stop_memory_trace() if self.trace_memory else None
+
+        attributes = {
+            "node": self.name,
+            "seconds": round(wall, 4),
+            "cpu_seconds": round(cpu, 4),
+        }
+        if peak is not None:
+            attributes["peak_memory_mb"] = round(peak / 1024 ** 2, 2)
+        for key in NODE_METRICS:
+            value = state.get(key)
+            if value is None or value is self.metrics_before[key]:
+                continue
+            if isinstance(value, dict):
+                # Atributos de span são escalares: {"llm_usage": {"total_tokens": 9}} → "llm_usage.total_tokens"
+                attributes.update({f"{key}.{field}": field_value for field, field_value in value.items()})
+            else:
+                attributes[key] = value
+        if error is not None:
+            attributes["error"] = f"{type(error).__name__}: {error}"
+
+        trace_id = state.setdefault("trace_id", uuid.uuid4().hex)
+        span = {
+            "trace_id": trace_id,
+            "span_id": uuid.uuid4().hex[:16],
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.start_ns + int(wall * 1e9),
+            "attributes": attributes,
+        }
+        state.setdefault("node_timings", []).append(attributes)
+        for exporter in get_exporters():
+            try:
+                exporter.export(span)
+            except Exception as e:
+                print(f"⚠️ Falha ao exportar span de {self.name}: {e}")
+        return state
+
+
+def instrument(name, fn):
+    """
+    Envolve um nó do grafo registrando tempo de parede, tempo de CPU da thread,
+    pico de memória (tracemalloc, opt-in por `trace_memory`), uso de tokens do
+    LLM e bytes lidos. Cada execução vira um item de `state["node_timings"]` e
+    um span enviado aos exportadores.
+
+    O pico de memória é aproximado com nós concorrentes: o tracemalloc mede o
+    processo inteiro, então o pico inclui as alocações dos outros spans ativos
+    e é contado desde o início do mais antigo deles.
+    """
+    if asyncio.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(state):
+            span = _NodeSpan(name, state)
+            span.start()
+            try:
+                result = await fn(state)
+            except Exception as e:
+                span.finish(state, e)
+                raise
+            return span.finish(result, None)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(state):
+        span = _NodeSpan(name, state)
+        span.start()
+        try:
+            result = fn(state)
+        except Exception as e:
+            span.finish(state, e)
+            raise
+        return span.finish(result, None)
+    return wrapper
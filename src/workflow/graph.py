@@ -1,22 +1,89 @@
+import asyncio
+import functools
+
 from langgraph.graph import StateGraph, END
 
-from src.nodes.load_csv_node import load_csv
-from src.nodes.answer_question_node import answer_question
+from src.nodes.load_csv_node import load_csv, attach_dataset, is_dataset_ready
+from src.nodes.profile_dataset_node import profile_dataset
+from src.nodes.answer_question_node import answer_question, answer_question_async
 from src.nodes.execute_code_node import execute_code
 from src.nodes.format_output_node import format_output
+from src.telemetry.tracing import instrument
+
+# Quantas vezes o código gerado que falhou volta ao LLM com a mensagem de erro
+DEFAULT_MAX_CODE_RETRIES = 1
+
+def build_graph(async_mode=False):
+    """
+    Monta o grafo de perguntas. Com `async_mode=True` o nó do LLM usa o
+    cliente assíncrono e os nós de CPU rodam em threads, para uso com
+    `graph.ainvoke` (várias sessões concorrentes no mesmo processo).
 
-def build_graph():
+    Fluxo:
+    - dataset já no store → `attach_dataset`; senão → `load_csv`
+    - resposta em texto (ou direta) termina em `answer_question`
+    - código com erro volta a `answer_question` com a mensagem de erro,
+      até `max_code_retries` vezes (padrão 1)
+
+    Cada nó é instrumentado (`src/telemetry/tracing.py`): tempo, CPU, memória,
+    tokens e bytes lidos vão para `state["node_timings"]` e para os exportadores.
+    """
     graph = StateGraph(dict)
-    
-    graph.add_node("load_csv", load_csv)
-    graph.add_node("answer_question", answer_question)
-    graph.add_node("execute_code", execute_code)
-    graph.add_node("format_output", format_output)
-
-    graph.set_entry_point("load_csv")
-    graph.add_edge("load_csv", "answer_question")
-    graph.add_edge("answer_question", "execute_code")
-    graph.add_edge("execute_code", "format_output")
+
+    # No modo assíncrono a instrumentação roda dentro da thread do nó, para
+    # que o tempo de CPU medido seja o da thread que fez o trabalho
+    def node(name, fn):
+        return _to_thread(instrument(name, fn)) if async_mode else instrument(name, fn)
+
+    graph.add_node("load_csv", node("load_csv", load_csv))
+    graph.add_node("attach_dataset", node("attach_dataset", attach_dataset))
+    graph.add_node("profile_dataset", node("profile_dataset", profile_dataset))
+    graph.add_node(
+        "answer_question",
+        instrument("answer_question", answer_question_async if async_mode else answer_question),
+    )
+    graph.add_node("execute_code", node("execute_code", execute_code))
+    graph.add_node("format_output", node("format_output", format_output))
+
+    graph.set_conditional_entry_point(
+        route_dataset, {"attach_dataset": "attach_dataset", "load_csv": "load_csv"}
+    )
+    graph.add_edge("load_csv", "profile_dataset")
+    graph.add_edge("attach_dataset", "profile_dataset")
+    graph.add_edge("profile_dataset", "answer_question")
+    graph.add_conditional_edges(
+        "answer_question", route_answer, {"execute_code": "execute_code", END: END}
+    )
+    graph.add_conditional_edges(
+        "execute_code", route_execution,
+        {"answer_question": "answer_question", "format_output": "format_output"},
+    )
     graph.add_edge("format_output", END)
 
-    return graph.compile()
\ No newline at end of file
+    return graph.compile()
+
+# ===========================
+# Routing
+# ===========================
+def route_dataset(state):
+    return "attach_dataset" if is_dataset_ready(state) else "load_csv"
+
+def route_answer(state):
+    return END if state.get("mode") == "text" else "execute_code"
+
+def route_execution(state):
+    """Em caso de erro no código gerado, prepara uma nova tentativa com o LLM."""
+    if not state.get("code_error") or state.get("mode") != "code":
+        return "format_output"
+
+    max_retries = state.get("max_code_retries", DEFAULT_MAX_CODE_RETRIES)
+    if state.get("code_retries", 0) >= max_retries:
+        return "format_output"
+    return "answer_question"
+
+def _to_thread(fn):
+    """Executa um nó síncrono em thread sem bloquear o event loop."""
+    @functools.wraps(fn)
+    async def wrapper(state):
+        return await asyncio.to_thread(fn, state)
+    return wrapper
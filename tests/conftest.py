@@ -0,0 +1,12 @@
+import pytest
+
+from src.data.dataset_store import get_dataset_store
+
+
+@pytest.fixture
+def store():
+    """Store do processo vazio antes e depois do teste."""
+    store = get_dataset_store()
+    store.clear()
+    yield store
+    store.clear()
@@ -0,0 +1,51 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+
+from src.data.chunked_reader import stream_csv_stats
+
+
+def _csv(rows=5_000):
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        "valor": rng.normal(100, 15, rows),
+        "qtd": rng.integers(0, 50, rows),
+        "regiao": rng.choice(["N", "S", "L"], rows),
+    })
+    df.loc[::7, "valor"] = np.nan
+    return df, df.to_csv(index=False).encode("utf-8")
+
+
+def test_stats_match_pandas_across_chunks():
+    df, data = _csv()
+    progress = []
+    result = stream_csv_stats(data, chunksize=700, progress_callback=progress.append)
+
+    stats = result["column_stats"]["valor"]
+    assert result["data_info"]["total_rows"] == len(df)
+    assert result["data_info"]["columns"] == ["valor", "qtd", "regiao"]
+    assert stats["nulls"] == df["valor"].isna().sum()
+    assert stats["count"] == df["valor"].notna().sum()
+    assert stats["min"] == pytest.approx(df["valor"].min())
+    assert stats["max"] == pytest.approx(df["valor"].max())
+    assert stats["mean"] == pytest.approx(df["valor"].mean())
+    assert stats["quantiles"]["0.5"] == pytest.approx(df["valor"].median(), rel=0.05)
+    assert "min" not in result["column_stats"]["regiao"]
+    assert progress[-1] == 1.0
+
+
+def test_row_sample_is_bounded_and_uniform_over_chunks():
+    df, data = _csv()
+    sample = stream_csv_stats(data, chunksize=500, sample_rows=1_000)["sample"]
+
+    assert len(sample) == 1_000
+    assert list(sample.columns) == list(df.columns)
+    # Linhas de todos os chunks, não só das primeiras
+    assert sample["qtd"].mean() == pytest.approx(df["qtd"].mean(), rel=0.1)
+
+
+def test_dtypes_are_merged_between_chunks():
+    data = b"a\n" + b"1\n" * 10 + b"1.5\n"
+    result = stream_csv_stats(data, chunksize=5)
+    assert result["schema"]["a"] == "float64"
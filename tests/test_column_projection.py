@@ -0,0 +1,50 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from src.data import columnar_cache
+from src.nodes.execute_code_node import _projection, load_frame
+from src.nodes.load_csv_node import ingest_chunked, register_columnar
+from src.sandbox.code_analysis import prepare_code
+
+COLUMNS = [f"c{i}" for i in range(8)]
+# Usa 3 das 8 colunas
+CODE = 'print(df["c1"].mean(), df["c4"].max())\nprint(df.groupby("c6")["c1"].sum())'
+
+
+def _csv_bytes(rows=500):
+    frame = pd.DataFrame({name: [(i * (n + 1)) % 7 for i in range(rows)] for n, name in enumerate(COLUMNS)})
+    return frame.to_csv(index=False).encode("utf-8")
+
+
+def _projected_columns(entry):
+    prepared = prepare_code(CODE, entry["schema"], entry["data_info"]["total_rows"])
+    return _projection(entry["schema"], prepared["columns"])
+
+
+def test_chunked_dataset_reads_only_used_columns_from_spool(store, tmp_path):
+    entry = ingest_chunked(_csv_bytes(), "proj", cache_dir=str(tmp_path))
+    assert entry["csv_path"] and not columnar_cache.exists(entry["columnar_path"])
+
+    columns = _projected_columns(entry)
+    df = load_frame("proj", columns, entry)
+
+    assert sorted(columns) == ["c1", "c4", "c6"]
+    assert sorted(df.columns) == ["c1", "c4", "c6"]
+    assert len(df) == 500
+    # O DataFrame completo não foi materializado no store
+    assert store.get("proj")["df"] is None
+
+
+def test_columnar_dataset_reads_only_used_columns(store, tmp_path):
+    entry = ingest_chunked(_csv_bytes(), "proj", cache_dir=str(tmp_path))
+    store.get_dataframe("proj")  # grava o cache colunar
+    store.clear()
+    entry = register_columnar("proj", entry["columnar_path"])
+
+    df = load_frame("proj", _projected_columns(entry), entry)
+
+    assert sorted(df.columns) == ["c1", "c4", "c6"]
+    assert len(df) == 500
+    assert store.get("proj")["df"] is None
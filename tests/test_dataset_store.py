@@ -0,0 +1,63 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from src.data.dataset_store import DatasetStore
+
+
+def _frame(rows=100):
+    return pd.DataFrame({"x": range(rows)})
+
+
+def test_lru_eviction_by_entries_keeps_recently_used():
+    store = DatasetStore(max_entries=2)
+    evicted = []
+    store.add_eviction_listener(evicted.append)
+    store.put("a", _frame(), {}, {})
+    store.put("b", _frame(), {}, {})
+    store.get("a")
+    store.put("c", _frame(), {}, {})
+
+    assert "a" in store and "c" in store and "b" not in store
+    assert evicted == ["b"]
+
+
+def test_eviction_by_bytes_always_keeps_newest_entry():
+    store = DatasetStore(max_bytes=1)
+    store.put("a", _frame(), {}, {})
+    store.put("b", _frame(), {}, {})
+    assert len(store) == 1 and "b" in store
+
+
+def test_loader_materializes_once_and_counts_declared_bytes():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return _frame()
+
+    store = DatasetStore()
+    entry = store.put("a", None, {"x": "int64"}, {"total_rows": 100}, loader=loader, nbytes=0)
+    assert entry["df"] is None and store.total_bytes == 0
+
+    first = store.get_dataframe("a")
+    second = store.get_dataframe("a")
+    assert first is second and calls == [1]
+    assert store.total_bytes > 0
+
+
+def test_put_requires_frame_or_loader():
+    with pytest.raises(ValueError):
+        DatasetStore().put("a", None, {}, {})
+
+
+def test_require_raises_for_missing_dataset():
+    with pytest.raises(KeyError):
+        DatasetStore().require("ausente")
+
+
+def test_update_with_new_frame_bumps_version():
+    store = DatasetStore()
+    version = store.put("a", _frame(), {}, {})["version"]
+    assert store.update("a", profile="p")["version"] == version
+    assert store.update("a", df=_frame(10))["version"] > version
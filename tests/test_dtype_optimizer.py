@@ -0,0 +1,44 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from src.data.dtype_optimizer import optimize_dtypes
+
+
+def _frame(rows=1_000):
+    return pd.DataFrame({
+        "cidade": [("SP", "RJ", "BH")[i % 3] for i in range(rows)],
+        "data": [f"2024-01-{i % 28 + 1:02d}" for i in range(rows)],
+        "x": list(range(rows)),
+    })
+
+
+@pytest.mark.parametrize("text_dtype", [object, "string"])
+def test_text_columns_become_category_and_datetime(text_dtype):
+    df = _frame()
+    df["cidade"] = df["cidade"].astype(text_dtype)
+    df["data"] = df["data"].astype(text_dtype)
+
+    optimized, report = optimize_dtypes(df)
+
+    assert isinstance(optimized["cidade"].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_datetime64_any_dtype(optimized["data"])
+    assert optimized["x"].dtype == "int16"
+    assert set(report["conversions"]) == {"cidade", "data", "x"}
+    assert report["after_bytes"] < report["before_bytes"]
+
+
+def test_csv_read_frame_is_optimized():
+    import io
+
+    df = pd.read_csv(io.StringIO(_frame().to_csv(index=False)))
+    optimized, report = optimize_dtypes(df)
+
+    assert {"cidade", "data"} <= set(report["conversions"])
+    assert optimized["cidade"].tolist() == df["cidade"].tolist()
+
+
+def test_high_cardinality_text_is_left_as_text():
+    df = pd.DataFrame({"id": [f"id-{i}" for i in range(1_000)]})
+    optimized, _ = optimize_dtypes(df)
+    assert pd.api.types.is_string_dtype(optimized["id"])
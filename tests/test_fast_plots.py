@@ -0,0 +1,80 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+matplotlib = pytest.importorskip("matplotlib")
+matplotlib.use("Agg")
+sns = pytest.importorskip("seaborn")
+
+import matplotlib.pyplot as plt
+from matplotlib.container import BarContainer
+
+from src.sandbox.fast_plots import FastPyplot, FastSeaborn, PlotAccelerator
+
+
+@pytest.fixture
+def large_frame():
+    rng = np.random.default_rng(0)
+    rows = 2_000
+    return pd.DataFrame({
+        "x": rng.normal(size=rows),
+        "y": rng.normal(size=rows),
+        "g": rng.choice(["a", "b", "c"], rows, p=[0.7, 0.2, 0.1]),
+    })
+
+
+@pytest.fixture
+def accel():
+    # Limite baixo: o frame de teste já conta como "grande"
+    return PlotAccelerator(row_threshold=500, sample_size=300)
+
+
+@pytest.fixture(autouse=True)
+def close_figures():
+    yield
+    plt.close("all")
+
+
+def test_stratified_sample_keeps_group_column_and_proportions(accel, large_frame):
+    sampled = accel.sample(large_frame, stratify="g")
+
+    assert list(sampled.columns) == ["x", "y", "g"]
+    assert 290 <= len(sampled) <= 310
+    share = sampled["g"].value_counts(normalize=True)
+    assert share["a"] == pytest.approx(0.7, abs=0.05)
+    assert accel.notes
+
+
+def test_scatter_with_hue_on_large_frame(accel, large_frame):
+    fig, ax = plt.subplots()
+    accel.scatter(ax, "x", "y", hue="g", data=large_frame)
+    assert {text.get_text() for text in ax.get_legend().get_texts()} == {"a", "b", "c"}
+
+
+def test_seaborn_scatterplot_and_stripplot_with_hue(accel, large_frame):
+    fast_sns = FastSeaborn(sns, accel)
+    fast_sns.scatterplot(data=large_frame, x="x", y="y", hue="g")
+    plt.figure()
+    fast_sns.stripplot(data=large_frame, x="g", y="y", hue="g")
+
+
+def test_pyplot_hist_matches_matplotlib_signature(accel, large_frame):
+    fast_plt = FastPyplot(plt, accel)
+
+    n, bins, patches = fast_plt.hist(large_frame["x"])
+    assert len(n) == plt.rcParams["hist.bins"] and len(bins) == len(n) + 1
+    assert isinstance(patches, BarContainer)
+    assert n.sum() == len(large_frame)
+
+    small = large_frame["x"].head(100)
+    n, bins, patches = fast_plt.hist(small)
+    assert len(n) == plt.rcParams["hist.bins"]
+    n, _, _ = fast_plt.hist(small, 5, density=True)
+    assert len(n) == 5
+
+
+def test_accelerator_hist_returns_counts_edges_and_bars(accel, large_frame):
+    fig, ax = plt.subplots()
+    n, bins, patches = accel.hist(ax, large_frame["x"], bins=20)
+    assert len(n) == 20 and len(patches) == 20
+    assert n.sum() == len(large_frame)
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("langgraph")
+pytest.importorskip("openai")
+
+from benchmarks.stub_llm import StubLLMServer
+from src.memory.conversation_memory import ConversationMemory
+from src.workflow.graph import build_graph
+
+
+@pytest.fixture(scope="module")
+def stub():
+    with StubLLMServer() as server:
+        yield server
+
+
+@pytest.fixture
+def csv_bytes():
+    df = pd.DataFrame({"valor": [float(i % 13) for i in range(300)], "qtd": [i % 4 for i in range(300)]})
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def _state(stub, tmp_path, csv_bytes, question):
+    return {
+        "file_content": csv_bytes,
+        "temp_dir": str(tmp_path),
+        "api_key": "stub",
+        "base_url": stub.base_url,
+        "question": question,
+        "memory": ConversationMemory(),
+        "fastpath": False,
+        "sandbox": "inline",
+        "use_response_cache": False,
+        "use_result_cache": False,
+    }
+
+
+def test_code_question_runs_generated_code(store, stub, tmp_path, csv_bytes):
+    result = build_graph().invoke(_state(stub, tmp_path, csv_bytes, "Calcule um resumo das variáveis"))
+
+    assert result["mode"] == "code"
+    assert not result.get("code_error"), result.get("execution_error")
+    assert result["images"]
+    assert result["llm_usage"]["total_tokens"] > 0
+    assert {timing["node"] for timing in result["node_timings"]} >= {"load_csv", "answer_question", "execute_code"}
+
+
+def test_text_question_streams_tokens(store, stub, tmp_path, csv_bytes):
+    tokens = []
+    state = _state(stub, tmp_path, csv_bytes, "O que este dataset representa?")
+    state["stream_callback"] = tokens.append
+    result = build_graph().invoke(state)
+
+    assert result["mode"] == "text"
+    assert "".join(tokens).strip() == result["final_answer"].strip()
+
+
+def test_async_graph_serves_concurrent_questions(store, stub, tmp_path, csv_bytes):
+    graph = build_graph(async_mode=True)
+    build_graph().invoke(_state(stub, tmp_path, csv_bytes, "O que este dataset representa?"))
+
+    async def ask_all():
+        return await asyncio.gather(*(
+            graph.ainvoke(_state(stub, tmp_path, csv_bytes, f"Calcule um resumo das variáveis ({i})"))
+            for i in range(3)
+        ))
+
+    results = asyncio.run(ask_all())
+    assert all(result["mode"] == "code" and not result.get("code_error") for result in results)
+
+
+def test_generated_code_runs_in_process_sandbox_by_default(store, stub, tmp_path, csv_bytes, monkeypatch):
+    monkeypatch.delenv("CSV_AGENT_SANDBOX", raising=False)
+    monkeypatch.setenv("CSV_AGENT_SANDBOX_WORKERS", "1")
+    # Execução no próprio processo faria o teste falhar
+    monkeypatch.setattr("src.nodes.execute_code_node.run_code", None)
+    state = _state(stub, tmp_path, csv_bytes, "Calcule um resumo das variáveis")
+    del state["sandbox"]
+    result = build_graph().invoke(state)
+
+    assert not result.get("code_error"), result.get("execution_error")
+    assert result["images"]
@@ -0,0 +1,67 @@
+import os
+import stat
+
+from src.router.classifier import QuestionClassifier, QuestionLog, classifier_route
+from src.router.intent_router import IntentRouter
+
+STATE = {
+    "dataset_id": "ds",
+    "schema": {"valor": "float64", "regiao": "object"},
+    "data_info": {"total_rows": 1_234, "total_columns": 2},
+}
+
+
+def test_metadata_questions_are_answered_directly():
+    decision = IntentRouter().route("Quantas linhas tem o dataset?", STATE)
+    assert decision["route"] == "direct"
+    assert "1,234" in decision["answer"]
+
+    columns = IntentRouter().route("Quais são as colunas?", STATE)
+    assert columns["route"] == "direct" and "`regiao`" in columns["answer"]
+
+
+def test_conditional_metadata_question_goes_to_llm():
+    assert IntentRouter().route("Quantas linhas por região?", STATE)["route"] != "direct"
+
+
+def test_standard_analysis_uses_fastpath_unless_disabled():
+    decision = IntentRouter().route("Histograma do valor", STATE)
+    assert decision["route"] == "fastpath"
+    assert decision["analysis"] == "histograms"
+    assert decision["columns"] == ["valor"]
+
+    disabled = IntentRouter().route("Histograma do valor", {**STATE, "fastpath": False})
+    assert disabled["route"] == "code"
+
+
+def test_conditional_analysis_is_not_fastpath():
+    assert IntentRouter().route("Histograma do valor por região", STATE)["route"] == "code"
+
+
+def test_keyword_fallback_routes_code_or_text():
+    router = IntentRouter()
+    assert router.route("Calcule a mediana do valor", STATE)["route"] == "code"
+    assert router.route("O que significa este dataset?", STATE)["route"] == "text"
+
+
+def test_registered_classifier_runs_before_keywords():
+    classifier = QuestionClassifier()
+    classifier.fit([("explique o conceito", "text")] * 30 + [("calcule a soma", "code")] * 30)
+    router = IntentRouter()
+    router.register(classifier_route(classifier, min_confidence=0.5))
+    assert router.route("explique o conceito de media", STATE)["route"] == "text"
+
+
+def test_question_log_is_private_and_rotated(tmp_path):
+    path = str(tmp_path / "router" / "questions.jsonl")
+    log = QuestionLog(path, max_bytes=200)
+    router = IntentRouter(log=log)
+    for i in range(20):
+        router.record(f"pergunta número {i}", "code")
+    router.record("ignorada", "direct")
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert os.path.exists(path + ".1")
+    samples = log.read()
+    assert samples[-1] == ("pergunta número 19", "code")
+    assert all(route == "code" for _, route in samples)
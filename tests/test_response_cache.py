@@ -0,0 +1,55 @@
+from src.cache.response_cache import DEFAULT_FUZZY_THRESHOLD, ResponseCache
+
+CONTEXT = ResponseCache.context_key("ds", {"valor": "float64", "regiao": "object"}, "code", [])
+QUESTION = "Mostre a distribuição das vendas por região com gráfico de barras ordenado para o último trimestre"
+
+
+def _fuzzy_cache():
+    return ResponseCache(fuzzy_threshold=DEFAULT_FUZZY_THRESHOLD)
+
+
+def test_exact_match_ignores_case_accents_and_punctuation():
+    cache = ResponseCache()
+    cache.put(CONTEXT, "Qual a média do valor?", "resposta")
+    assert cache.get(CONTEXT, "qual a MEDIA do valor") == "resposta"
+    assert cache.get("outro contexto", "qual a media do valor") is None
+
+
+def test_fuzzy_matching_is_opt_in():
+    cache = ResponseCache()
+    cache.put(CONTEXT, QUESTION, "resposta")
+    assert cache.get(CONTEXT, QUESTION + " atual") is None
+
+
+def test_fuzzy_matches_near_duplicate():
+    cache = _fuzzy_cache()
+    cache.put(CONTEXT, QUESTION, "resposta")
+    assert cache.get(CONTEXT, QUESTION + " atual") == "resposta"
+
+
+def test_fuzzy_rejects_questions_that_differ_in_meaning():
+    cache = _fuzzy_cache()
+    long_tail = " ordenado por regiao para o ultimo trimestre fiscal da empresa inteira"
+    cache.put(CONTEXT, "Histograma das vendas com devoluções" + long_tail, "com")
+    cache.put(CONTEXT, "Qual a maior venda registrada" + long_tail, "maior")
+    cache.put(CONTEXT, "Liste as top 10 vendas registradas" + long_tail, "top10")
+    cache.put(CONTEXT, "Resumo estatístico da coluna valor" + long_tail, "valor")
+
+    assert cache.get(CONTEXT, "Histograma das vendas sem devoluções" + long_tail) is None
+    assert cache.get(CONTEXT, "Qual a menor venda registrada" + long_tail) is None
+    assert cache.get(CONTEXT, "Liste as top 20 vendas registradas" + long_tail) is None
+    assert cache.get(
+        CONTEXT, "Resumo estatístico da coluna regiao" + long_tail, columns=["valor", "regiao"]
+    ) is None
+
+
+def test_entries_expire_and_evict():
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    for question in ("a1", "a2", "a3"):
+        cache.put(CONTEXT, question, question)
+    assert len(cache) == 2
+    assert cache.get(CONTEXT, "a1") is None
+
+    expired = ResponseCache(ttl_seconds=0)
+    expired.put(CONTEXT, "a1", "x")
+    assert expired.get(CONTEXT, "a1") is None
@@ -0,0 +1,42 @@
+from src.cache.result_cache import ResultCache, result_key
+
+
+def test_result_round_trip_with_images(tmp_path):
+    cache = ResultCache(cache_dir=str(tmp_path))
+    key = result_key("print(1)", "ds", ["png", None, "pandas"])
+    cache.put(key, "1\n", final_answer="um", images=[b"img-a", b"img-b"], sampling_notes=["n"])
+
+    result = cache.get(key)
+    assert result["raw_output"] == "1\n"
+    assert result["final_answer"] == "um"
+    assert result["images"] == [b"img-a", b"img-b"]
+    assert result["sampling_notes"] == ["n"]
+
+    cache.update(key, final_answer="outro")
+    assert cache.get(key)["final_answer"] == "outro"
+
+
+def test_key_depends_on_dataset_and_options():
+    assert result_key("x", "a") != result_key("x", "b")
+    assert result_key("x", "a", ["png"]) != result_key("x", "a", ["svg"])
+    assert result_key(" x \n", "a") == result_key("x", "a")
+
+
+def test_put_replaces_old_images_and_evicts_oldest(tmp_path):
+    cache = ResultCache(cache_dir=str(tmp_path), max_entries=2)
+    cache.put("k1", "a", images=[b"1", b"2"])
+    cache.put("k1", "a", images=[b"3"])
+    assert cache.get("k1")["images"] == [b"3"]
+
+    import os
+    import time
+    os.utime(tmp_path / "k1.json", (time.time() - 60, time.time() - 60))
+    os.utime(tmp_path / "k1.0.img", (time.time() - 60, time.time() - 60))
+    cache.put("k2", "b")
+    cache.put("k3", "c")
+    assert cache.get("k1") is None
+    assert cache.get("k2") is not None and cache.get("k3") is not None
+
+
+def test_missing_entry_is_a_miss(tmp_path):
+    assert ResultCache(cache_dir=str(tmp_path)).get("nada") is None
@@ -0,0 +1,80 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+pytest.importorskip("matplotlib")
+pytest.importorskip("seaborn")
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from src.analysis import routines
+from src.analysis.routines import AnalysisContext
+from src.data.profile import build_profile
+from src.sandbox.fast_plots import PlotAccelerator
+
+
+@pytest.fixture
+def full():
+    rng = np.random.default_rng(1)
+    a = rng.exponential(10, 20_000)
+    return pd.DataFrame({"a": a, "b": a * 2 + rng.normal(0, 1, 20_000)})
+
+
+def _context(profile, full, loads):
+    def load_frame(columns):
+        loads.append(list(columns))
+        return full[columns]
+    return AnalysisContext(profile, load_frame, PlotAccelerator())
+
+
+def _run(routine, ctx):
+    try:
+        return routine(ctx)
+    finally:
+        plt.close("all")
+
+
+def test_sampled_profile_statistics_are_recomputed_on_full_columns(full):
+    # Amostra enviesada: o perfil estimado difere bastante do dataset inteiro
+    sample = full.nsmallest(500, "a")
+    profile = build_profile(sample, total_rows=len(full))
+    loads = []
+    ctx = _context(profile, full, loads)
+
+    answer = _run(routines.describe, ctx)
+
+    exact = full["a"].describe()
+    assert f"média {exact['mean']:.4g}" in answer
+    assert f"mediana {exact['50%']:.4g}" in answer
+    assert loads == [["a", "b"]]
+
+    ctx.columns = ["a", "b"]
+    corr = full["a"].corr(full["b"])
+    assert f"({corr:+.2f})" in _run(routines.correlation, ctx)
+
+
+def test_sampled_histogram_counts_cover_every_row(full):
+    profile = build_profile(full.sample(500, random_state=0), total_rows=len(full))
+    ctx = _context(profile, full, [])
+
+    try:
+        routines.histograms(ctx)
+        counts = plt.gcf().axes[0].patches[0].get_data().values
+    finally:
+        plt.close("all")
+
+    edges = profile.histograms["a"][1]
+    expected, _ = np.histogram(np.clip(full["a"], edges[0], edges[-1]), bins=edges)
+    np.testing.assert_array_equal(counts, expected)
+
+
+def test_exact_profile_does_not_load_columns(full):
+    loads = []
+    ctx = _context(build_profile(full), full, loads)
+
+    answer = _run(routines.describe, ctx)
+
+    assert f"média {full['a'].mean():.4g}" in answer
+    assert loads == []
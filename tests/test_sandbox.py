@@ -0,0 +1,114 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("matplotlib")
+
+from src.sandbox.code_analysis import prepare_code
+from src.sandbox.pool import SandboxPool
+from src.sandbox.rendering import FigureSink
+from src.sandbox.runner import build_namespace, run_code
+
+SCHEMA = {"valor": "float64", "qtd": "int64", "regiao": "object"}
+
+
+def _frame(rows=200):
+    return pd.DataFrame({
+        "valor": [float(i) for i in range(rows)],
+        "qtd": [i % 5 for i in range(rows)],
+        "regiao": [("N", "S")[i % 2] for i in range(rows)],
+    })
+
+
+def test_prepare_code_rewrites_io_and_extracts_columns():
+    code = (
+        "import pandas as pd\n"
+        "import matplotlib.pyplot as plt\n"
+        "df = pd.read_csv('dados.csv')\n"
+        "df.groupby('regiao')['valor'].mean().plot.bar()\n"
+        "plt.savefig('saida.png')\n"
+    )
+    prepared = prepare_code(code, SCHEMA)
+
+    assert "read_csv" not in prepared["code"]
+    assert "savefig(img_path)" in prepared["code"]
+    assert "import matplotlib.pyplot" not in prepared["code"]
+    assert sorted(prepared["columns"]) == ["regiao", "valor"]
+
+
+def test_prepare_code_drops_from_imports_of_wrapped_modules():
+    code = (
+        "from matplotlib import pyplot as plt, cm\n"
+        "import seaborn as sns\n"
+        "from seaborn import histplot\n"
+        "print(type(plt).__name__, type(sns).__name__)\n"
+    )
+    prepared = prepare_code(code, SCHEMA)["code"]
+
+    assert "pyplot" not in prepared and "import seaborn" not in prepared
+    assert "from matplotlib import cm" in prepared
+    assert "from seaborn import histplot" in prepared
+    # `plt`/`sns` continuam sendo os wrappers do namespace
+    result = run_code(prepared, build_namespace(_frame(), FigureSink()))
+    assert result["stdout"].split() == ["FastPyplot", "FastSeaborn"]
+
+
+def test_prepare_code_needs_whole_frame_for_describe():
+    assert prepare_code("print(df.describe())", SCHEMA)["columns"] is None
+
+
+def test_prepare_code_keeps_syntax_errors_for_execution():
+    prepared = prepare_code("print(df[", SCHEMA)
+    assert prepared["code"] == "print(df[" and prepared["columns"] is None
+
+
+def test_run_code_captures_stdout_and_figures():
+    namespace = build_namespace(_frame(), FigureSink("png"))
+    result = run_code("print(len(df))\nplt.plot(df['valor'])\nplt.savefig(img_path)", namespace)
+
+    assert result["error"] is None
+    assert result["stdout"].strip() == "200"
+    assert len(result["images"]) == 1 and result["images"][0].startswith(b"\x89PNG")
+
+
+def test_run_code_reports_errors_without_images():
+    result = run_code("plt.plot([1, 2])\nraise ValueError('falhou')", build_namespace(_frame(), FigureSink()))
+    assert "falhou" in result["error"]
+    assert result["images"] == []
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = SandboxPool(size=1, limits={"wall_seconds": 60})
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_runs_code_with_loaded_dataset(pool):
+    df = _frame()
+    result = pool.run(
+        "print(df['valor'].sum())", "pool-ds", dataset_version=1, dataframe_loader=lambda: df,
+    )
+    assert result["error"] is None
+    assert float(result["stdout"]) == df["valor"].sum()
+
+
+def test_pool_kills_job_over_wall_limit_and_recovers(pool):
+    df = _frame()
+    result = pool.run(
+        "import time\ntime.sleep(30)", "pool-ds", dataset_version=1, dataframe_loader=lambda: df,
+        limits={"wall_seconds": 1},
+    )
+    assert "Tempo limite" in result["error"]
+
+    after = pool.run("print('ok')", "pool-ds", dataset_version=1, dataframe_loader=lambda: df)
+    assert after["stdout"].strip() == "ok"
+
+
+def test_process_sandbox_is_the_default(monkeypatch):
+    from src.nodes.execute_code_node import use_process_sandbox
+
+    monkeypatch.delenv("CSV_AGENT_SANDBOX", raising=False)
+    assert use_process_sandbox({})
+    assert not use_process_sandbox({"sandbox": "inline"})
+    monkeypatch.setenv("CSV_AGENT_SANDBOX", "inline")
+    assert not use_process_sandbox({})
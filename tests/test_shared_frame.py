@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from src.data.shared_frame import SharedFrameRegistry, attach_frame
+
+SPAWNED_ATTACH = textwrap.dedent("""
+    import multiprocessing
+    import pandas as pd
+    from src.data.shared_frame import attach_frame, publish_frame, with_rest
+
+    def child(descriptor):
+        df, blocks = attach_frame(descriptor)
+        total = float(df["x"].sum())
+        for block in blocks:
+            block.close()
+        return total
+
+    if __name__ == "__main__":
+        df = pd.DataFrame({"x": [1.0, 2.0, 3.0], "s": ["a", "b", "c"]})
+        descriptor, blocks = publish_frame(df)
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            print(pool.apply(child, (with_rest(descriptor, df),)))
+        for block in blocks:
+            block.close()
+            block.unlink()
+""")
+
+
+def test_attached_frame_is_a_read_only_view():
+    registry = SharedFrameRegistry()
+    df = pd.DataFrame({"x": [1.5, 2.5], "n": [1, 2], "s": ["a", "b"]})
+    try:
+        attached, blocks = attach_frame(registry.publish("ds", df))
+        pd.testing.assert_frame_equal(attached, df, check_dtype=False)
+        assert not attached["x"].to_numpy().flags.writeable
+        for block in blocks:
+            block.close()
+    finally:
+        registry.release("ds")
+
+
+def test_spawned_worker_does_not_steal_creator_tracker_registration(tmp_path):
+    script = tmp_path / "attach.py"
+    script.write_text(SPAWNED_ATTACH, encoding="utf-8")
+    completed = subprocess.run(
+        [sys.executable, str(script)], capture_output=True, text=True, timeout=120,
+        cwd=Path(__file__).resolve().parents[1], env={**os.environ, "PYTHONPATH": "."},
+    )
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip().endswith("6.0")
+    assert "KeyError" not in completed.stderr
+    assert "leaked" not in completed.stderr
@@ -0,0 +1,74 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+duckdb = pytest.importorskip("duckdb")
+
+from src.data.tables import LazyTables
+
+
+def _sources():
+    frames = {
+        "vendas": pd.DataFrame({"id": [1, 2, 3], "valor": [10.0, 20.0, 30.0]}),
+        "clientes": pd.DataFrame({"id": [1, 2], "nome": ["ana", "bia"]}),
+    }
+    sources = {
+        name: {"dataset_id": name, "columnar_path": None, "schema": {col: str(t) for col, t in df.dtypes.items()}}
+        for name, df in frames.items()
+    }
+
+    def loader(source, columns=None):
+        df = frames[source["dataset_id"]]
+        return df if columns is None else df[columns]
+
+    return sources, loader
+
+
+def test_join_uses_duckdb_and_close_releases_connection():
+    sources, loader = _sources()
+    tables = LazyTables(sources, loader)
+
+    joined = tables.join("vendas", "clientes", on="id")
+    connection = tables._connection
+    tables.close()
+
+    assert sorted(joined["nome"]) == ["ana", "bia"]
+    assert tables._connection is None
+    with pytest.raises(duckdb.Error):
+        connection.execute("SELECT 1")
+    # Fechar de novo, ou sem conexão aberta, não falha
+    tables.close()
+    LazyTables(sources, loader).close()
+
+
+def test_inline_execution_closes_tables_after_run(monkeypatch, store):
+    from src.nodes import execute_code_node
+
+    closed = []
+    original_close = LazyTables.close
+
+    def close(self):
+        closed.append(self._connection)
+        original_close(self)
+
+    monkeypatch.setattr(LazyTables, "close", close)
+    sources, loader = _sources()
+    for name in sources:
+        store.put(name, loader(sources[name]), sources[name]["schema"], {"total_rows": 3})
+
+    state = {
+        "dataset_id": "vendas",
+        "schema": sources["vendas"]["schema"],
+        "data_info": {"total_rows": 3},
+        "tables": {name: name for name in sources},
+        "sandbox": "inline",
+        "use_result_cache": False,
+        "code": 'print(tables.join("vendas", "clientes", on="id").shape)',
+    }
+    result = execute_code_node.execute_code(state)
+
+    assert not result["code_error"]
+    assert "(2, 3)" in result["raw_output"]
+    # A conexão aberta pelo join foi fechada ao fim da execução
+    assert len(closed) == 1 and closed[0] is not None
+    with pytest.raises(duckdb.Error):
+        closed[0].execute("SELECT 1")